@@ -100,6 +100,14 @@ class Expr:
             setattr(result, k, deepcopy(v, memo))
         return result
 
+    # explicit pickling support, since __getattr__ would otherwise be
+    # consulted for __setstate__ before _expr is set
+    def __getstate__(self):
+        return self.__dict__
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
     # the type: ignore statements are needed because the type of object.__eq__
     # in typeshed is overly restrictive (to catch common errors)
     @overload  # type: ignore
@@ -16,8 +16,10 @@ import ast
 import copy
 import importlib
 import logging
+import sys
 import time
 import traceback
+from abc import ABC, abstractmethod
 from importlib import util
 from typing import (
     TYPE_CHECKING,
@@ -930,6 +932,213 @@ def write_batch_output_to_file(
     return file_obj
 
 
+def concat_batches(batches: List[Any]) -> Any:
+    """Concatenate a list of batches with a single copy, unlike calling
+    append_batch once per batch, which copies quadratically often."""
+    if len(batches) == 0:
+        return None
+    first = batches[0]
+    if len(batches) == 1 or first is None:
+        return first
+    if isinstance(first, tuple):
+        return tuple(concat_batches([b[i] for b in batches]) for i in range(len(first)))
+    if isinstance(first, np.ndarray):
+        if all(len(b.shape) == 1 for b in batches):
+            return np.concatenate(batches)
+        return np.vstack(batches)
+    if torch_installed and isinstance(first, torch.Tensor):
+        return torch.cat(batches)
+    if isinstance(first, (pd.Series, pd.DataFrame)):
+        return pd.concat(batches, axis=0)
+    if scipy.sparse.issparse(first):
+        return scipy.sparse.vstack(batches, format=first.format)
+    raise ValueError(
+        f"{type(first)} is unsupported. Supported types are np.ndarray, torch.Tensor, pd.DataFrame, pd.Series, and scipy.sparse matrices"
+    )
+
+
+def _batch_to_numpy(batch) -> np.ndarray:
+    if isinstance(batch, (pd.DataFrame, pd.Series)):
+        batch = batch.to_numpy()
+    if not isinstance(batch, np.ndarray):
+        raise ValueError(f"expected np.ndarray or pandas batch, got {type(batch)}")
+    return batch
+
+
+class BatchSink(ABC):
+    """Destination for the output batches of `transform_with_batches`,
+    which writes each batch exactly once instead of keeping all of
+    them in memory."""
+
+    @abstractmethod
+    def write(self, batch) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> Any:
+        """Finish writing and return the result of the transformation."""
+
+
+class NpyBatchSink(BatchSink):
+    """Append batches to a `.npy` file and return it memory-mapped.
+
+    The header gets rewritten with the final number of rows on `close`,
+    so the total length need not be known in advance.
+
+    Parameters
+    ----------
+    path : path-like
+        File to create or overwrite.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._dtype: Optional[np.dtype] = None
+        self._row_shape: Tuple[int, ...] = ()
+        self._header_len = 0
+        self._n_rows = 0
+
+    def _header(self, n_rows: int) -> bytes:
+        assert self._dtype is not None
+        header = {
+            "descr": np.lib.format.dtype_to_descr(self._dtype),
+            "fortran_order": False,
+            "shape": (n_rows,) + self._row_shape,
+        }
+        magic = np.lib.format.magic(1, 0)
+        if self._header_len == 0:  # reserve room for the largest row count
+            text = repr({**header, "shape": (sys.maxsize,) + self._row_shape})
+            unpadded = len(magic) + 2 + len(text) + 1
+            self._header_len = 64 * ((unpadded + 63) // 64)
+        text_len = self._header_len - len(magic) - 2
+        text = repr(header).ljust(text_len - 1) + "\n"
+        return magic + text_len.to_bytes(2, "little") + text.encode("latin1")
+
+    def write(self, batch) -> None:
+        batch = _batch_to_numpy(batch)
+        if batch.dtype.hasobject:
+            raise ValueError("object arrays cannot be memory-mapped")
+        if self._dtype is None:
+            self._dtype = batch.dtype
+            self._row_shape = batch.shape[1:]
+            with open(self.path, "wb") as f:
+                f.write(self._header(0))
+        elif batch.shape[1:] != self._row_shape:
+            raise ValueError(
+                f"expected batch rows of shape {self._row_shape}, got {batch.shape[1:]}"
+            )
+        with open(self.path, "ab") as f:
+            np.ascontiguousarray(batch, dtype=self._dtype).tofile(f)
+        self._n_rows += len(batch)
+
+    def close(self) -> Optional[np.memmap]:
+        if self._dtype is None:
+            return None
+        with open(self.path, "r+b") as f:
+            f.write(self._header(self._n_rows))
+        return np.load(self.path, mmap_mode="r")
+
+
+class ParquetBatchSink(BatchSink):
+    """Append batches as row groups to a Parquet file and return its path.
+
+    Parameters
+    ----------
+    path : path-like
+        File to create or overwrite.
+    **kwargs
+        Passed to `pyarrow.parquet.ParquetWriter`, e.g. `compression`.
+    """
+
+    def __init__(self, path, **kwargs):
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as exc:
+            raise ImportError(
+                """ParquetBatchSink uses pyarrow. It is not installed in the
+                current environment, please install the package and try again."""
+            ) from exc
+        self.path = path
+        self.kwargs = kwargs
+        self._writer: Any = None
+
+    def write(self, batch) -> None:
+        import pyarrow
+        import pyarrow.parquet
+
+        if isinstance(batch, pd.Series):
+            batch = batch.to_frame()
+        elif isinstance(batch, np.ndarray):
+            batch = pd.DataFrame(batch.reshape(len(batch), -1))
+        if not isinstance(batch, pd.DataFrame):
+            raise ValueError(f"expected np.ndarray or pandas batch, got {type(batch)}")
+        batch = batch.rename(columns=str)
+        table = pyarrow.Table.from_pandas(batch, preserve_index=False)
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(
+                self.path, table.schema, **self.kwargs
+            )
+        elif not table.schema.equals(self._writer.schema):
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        return self.path
+
+
+class Hdf5BatchSink(BatchSink):
+    """Append batches to a resizable HDF5 dataset and return the file path.
+
+    Parameters
+    ----------
+    path : path-like
+        File to create or overwrite.
+    dataset : str
+        Name of the dataset in the file.
+    compression : str, optional
+        For example "gzip", by default no compression.
+    """
+
+    def __init__(self, path, dataset: str = "X", compression: Optional[str] = None):
+        try:
+            import h5py  # noqa: F401
+        except ImportError as exc:
+            raise ImportError(
+                """Hdf5BatchSink uses h5py. It is not installed in the
+                current environment, please install the package and try again."""
+            ) from exc
+        self.path = path
+        self.dataset = dataset
+        self.compression = compression
+        self._file: Any = None
+
+    def write(self, batch) -> None:
+        import h5py
+
+        batch = _batch_to_numpy(batch)
+        if self._file is None:
+            self._file = h5py.File(self.path, "w")
+            self._file.create_dataset(
+                self.dataset,
+                shape=(0,) + batch.shape[1:],
+                maxshape=(None,) + batch.shape[1:],
+                dtype=batch.dtype,
+                chunks=True,
+                compression=self.compression,
+            )
+        data = self._file[self.dataset]
+        n_rows = data.shape[0]
+        data.resize(n_rows + len(batch), axis=0)
+        data[n_rows:] = batch
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        return self.path
+
+
 def add_missing_values(orig_X, missing_rate=0.1, seed=None):
     # see scikit-learn.org/stable/auto_examples/impute/plot_missing_values.html
     n_samples, n_features = orig_X.shape
@@ -211,3 +211,26 @@ schema_max_opt_time: JSON_TYPE = {
     ],
     "default": None,
 }
+
+schema_monoid_fit_n_jobs: JSON_TYPE = {
+    "description": "The number of jobs to run in parallel for `fit` on in-memory data, each lifting a chunk of the rows to a monoid.",
+    "anyOf": [
+        {
+            "description": "Lift all rows at once.",
+            "enum": [None],
+        },
+        {"description": "Use all processors.", "enum": [-1]},
+        {
+            "description": "Number of CPU cores.",
+            "type": "integer",
+            "minimum": 1,
+        },
+    ],
+    "default": None,
+}
+
+schema_executor: JSON_TYPE = {
+    "description": "Whether the parallel workers are threads or processes.",
+    "enum": ["thread", "process"],
+    "default": "thread",
+}
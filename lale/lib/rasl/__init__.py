@@ -79,13 +79,22 @@ Other Facilities
 ================
 * lale.lib.rasl. `Prio`_
 * lale.lib.rasl. `PrioBatch`_
+* lale.lib.rasl. `PrioCostModel`_
 * lale.lib.rasl. `PrioResourceAware`_
 * lale.lib.rasl. `PrioStep`_
+* lale.lib.rasl. `RunTrace`_
+* lale.lib.rasl. `SpillArrow`_
+* lale.lib.rasl. `SpillFormat`_
+* lale.lib.rasl. `SpillPickle`_
 * lale.lib.rasl. `cross_val_score`_
 * lale.lib.rasl. `cross_validate`_
 * lale.lib.rasl. `fit_with_batches`_
 * lale.lib.rasl. `is_associative`_
 * lale.lib.rasl. `is_incremental`_
+* lale.lib.rasl. `predict_with_batches`_
+* lale.lib.rasl. `refit_with_batches`_
+* lale.lib.rasl. `register_space_estimator`_
+* lale.lib.rasl. `score_with_batches`_
 
 .. _`Aggregate`: lale.lib.rasl.aggregate.html
 .. _`Alias`: lale.lib.rasl.alias.html
@@ -119,8 +128,13 @@ Other Facilities
 
 .. _`Prio`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.Prio
 .. _`PrioBatch`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.PrioBatch
+.. _`PrioCostModel`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.PrioCostModel
 .. _`PrioResourceAware`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.PrioResourceAware
 .. _`PrioStep`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.PrioStep
+.. _`RunTrace`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.RunTrace
+.. _`SpillArrow`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.SpillArrow
+.. _`SpillFormat`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.SpillFormat
+.. _`SpillPickle`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.SpillPickle
 .. _`accuracy_score`: lale.lib.rasl.metrics.html#lale.lib.rasl.metrics.accuracy_score
 .. _`balanced_accuracy_score`: lale.lib.rasl.metrics.html#lale.lib.rasl.metrics.balanced_accuracy_score
 .. _`cross_val_score`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.cross_val_score
@@ -130,6 +144,10 @@ Other Facilities
 .. _`get_scorer`: lale.lib.rasl.metrics.html#lale.lib.rasl.metrics.get_scorer
 .. _`is_associative`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.is_associative
 .. _`is_incremental`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.is_incremental
+.. _`predict_with_batches`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.predict_with_batches
+.. _`refit_with_batches`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.refit_with_batches
+.. _`register_space_estimator`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.register_space_estimator
+.. _`score_with_batches`: lale.lib.rasl.task_graphs.html#lale.lib.rasl.task_graphs.score_with_batches
 .. _`csv_data_loader`: lale.lib.rasl.datasets.html#lale.lib.rasl.datasets.csv_data_loader
 .. _`mockup_data_loader`: lale.lib.rasl.datasets.html#lale.lib.rasl.datasets.mockup_data_loader
 .. _`openml_data_loader`: lale.lib.rasl.datasets.html#lale.lib.rasl.datasets.openml_data_loader
@@ -167,6 +185,7 @@ from .min_max_scaler import MinMaxScaler as MinMaxScaler
 from .monoid import Monoid as Monoid
 from .monoid import MonoidableOperator as MonoidableOperator
 from .monoid import MonoidFactory as MonoidFactory
+from .monoid import to_monoid_parallel as to_monoid_parallel
 from .one_hot_encoder import OneHotEncoder as OneHotEncoder
 from .orderby import OrderBy as OrderBy
 from .ordinal_encoder import OrdinalEncoder as OrdinalEncoder
@@ -181,10 +200,19 @@ from .split_xy import SplitXy as SplitXy
 from .standard_scaler import StandardScaler as StandardScaler
 from .task_graphs import Prio as Prio
 from .task_graphs import PrioBatch as PrioBatch
+from .task_graphs import PrioCostModel as PrioCostModel
 from .task_graphs import PrioResourceAware as PrioResourceAware
 from .task_graphs import PrioStep as PrioStep
+from .task_graphs import RunTrace as RunTrace
+from .task_graphs import SpillArrow as SpillArrow
+from .task_graphs import SpillFormat as SpillFormat
+from .task_graphs import SpillPickle as SpillPickle
 from .task_graphs import cross_val_score as cross_val_score
 from .task_graphs import cross_validate as cross_validate
 from .task_graphs import fit_with_batches as fit_with_batches
 from .task_graphs import is_associative as is_associative
 from .task_graphs import is_incremental as is_incremental
+from .task_graphs import predict_with_batches as predict_with_batches
+from .task_graphs import refit_with_batches as refit_with_batches
+from .task_graphs import register_space_estimator as register_space_estimator
+from .task_graphs import score_with_batches as score_with_batches
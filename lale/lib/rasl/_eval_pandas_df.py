@@ -139,19 +139,62 @@ def ite(df: Any, call: ast.Call):
 def hash(df: Any, call: ast.Call):  # pylint:disable=redefined-builtin
     hashing_method = ast.literal_eval(call.args[0])
     column = _eval_ast_expr_pandas_df(df, call.args[1])  # type: ignore
+    return _hash_column(column, hashing_method)
+
+
+def hash_mod(df: Any, call: ast.Call):
+    hashing_method = ast.literal_eval(call.args[0])
+    column = _eval_ast_expr_pandas_df(df, call.args[1])  # type: ignore
+    N = ast.literal_eval(call.args[2])
+    return _hash_mod_column(column, hashing_method, N)
+
+
+def _hash_column(column, hashing_method):
+    # "pandas" hashes the whole column at once into uint64 values, any other
+    # method is a hashlib algorithm giving the hex digest of each value
+    if hashing_method == "pandas":
+        hashes = pd.util.hash_array(column.to_numpy())
+        return pd.Series(hashes, index=column.index, name=column.name)
 
     def hash_fun(v):
         hasher = hashlib.new(hashing_method)
         hasher.update(bytes(str(v), "utf-8"))
         return hasher.hexdigest()
 
-    return column.map(hash_fun)
+    return _map_distinct(column, hash_fun)
 
 
-def hash_mod(df: Any, call: ast.Call):
-    h_column = hash(df, call)
-    N = ast.literal_eval(call.args[2])
-    return h_column.map(lambda h: int(h, 16) % N)
+def _hash_mod_column(column, hashing_method, N):
+    if hashing_method == "pandas":
+        hashes = pd.util.hash_array(column.to_numpy())
+        return pd.Series(
+            (hashes % np.uint64(N)).astype(np.int64),
+            index=column.index,
+            name=column.name,
+        )
+
+    def hash_mod_fun(v):
+        hasher = hashlib.new(hashing_method)
+        hasher.update(bytes(str(v), "utf-8"))
+        return int(hasher.hexdigest(), 16) % N
+
+    return _map_distinct(column, hash_mod_fun)
+
+
+def _map_distinct(column, fun):
+    # Calls fun only once per distinct value and gathers the results by
+    # position. Falls back to calling it per element when the distinct
+    # values cannot form a unique index, e.g., when both None and nan occur.
+    uniques = column.unique()
+    try:
+        codes = pd.Index(uniques).get_indexer(column)
+    except (TypeError, pd.errors.InvalidIndexError):
+        return column.map(fun)
+    values = np.empty(len(uniques), dtype=object)
+    values[:] = [fun(v) for v in uniques]
+    return pd.Series(
+        values[codes], index=column.index, name=column.name
+    ).infer_objects()
 
 
 def replace(df: Any, call: ast.Call):
@@ -174,13 +217,45 @@ def replace(df: Any, call: ast.Call):
     handle_unknown = ast.literal_eval(call.args[2])
     if handle_unknown == "use_encoded_value":
         unknown_value = ast.literal_eval(call.args[3])
-        mapping2 = collections.defaultdict(lambda: unknown_value, mapping_dict)
-        new_column = column.map(mapping2)  # type: ignore
+        new_column = _replace_by_codes(column, mapping_dict, True, unknown_value)
+        if new_column is None:
+            mapping2 = collections.defaultdict(lambda: unknown_value, mapping_dict)
+            new_column = column.map(mapping2)  # type: ignore
     else:
-        new_column = column.replace(mapping_dict)
+        new_column = _replace_by_codes(column, mapping_dict, False, None)
+        if new_column is None:
+            new_column = column.replace(mapping_dict)
     return new_column
 
 
+def _replace_by_codes(column, mapping_dict, use_unknown_value, unknown_value):
+    # Looks up the position of each value among the mapping keys in one
+    # vectorized step and gathers the replacements by position. Returns
+    # None to fall back to the element-wise path for categorical columns,
+    # keys that an index cannot hold, or plain replace with unmapped values
+    # or non-object columns, whose result dtype pandas derives differently.
+    if not isinstance(column, pd.Series) or not isinstance(column.dtype, np.dtype):
+        return None
+    if not use_unknown_value and column.dtype != object:
+        return None
+    try:
+        codes = pd.Index(list(mapping_dict.keys())).get_indexer(column)
+    except (TypeError, pd.errors.InvalidIndexError):
+        return None
+    lookup = list(mapping_dict.values())
+    unknown = codes < 0
+    if unknown.any():
+        if not use_unknown_value:
+            return None
+        lookup.append(unknown_value)
+        codes[unknown] = len(lookup) - 1
+    values = np.empty(len(lookup), dtype=object)
+    values[:] = lookup
+    return pd.Series(
+        values[codes], index=column.index, name=column.name
+    ).infer_objects()
+
+
 def identity(df: Any, call: ast.Call):
     return _eval_ast_expr_pandas_df(df, call.args[0])  # type: ignore
 
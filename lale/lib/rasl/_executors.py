@@ -0,0 +1,50 @@
+# Copyright 2022 IBM Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import concurrent.futures
+import os
+from typing import Callable, Optional, Tuple
+
+
+def _create_executor(
+    executor: str,
+    n_jobs: Optional[int],
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple = (),
+) -> Optional[concurrent.futures.Executor]:
+    """Pool of `n_jobs` workers (-1 means all cores) that are threads if
+    `executor` is "thread" or processes if it is "process", or None if
+    there is only one worker, so the caller can run tasks inline.
+    Each worker calls `initializer(*initargs)` when it starts."""
+    n_workers = _n_workers(n_jobs)
+    if n_workers == 1:
+        return None
+    if executor == "thread":
+        return concurrent.futures.ThreadPoolExecutor(
+            n_workers, initializer=initializer, initargs=initargs
+        )
+    if executor == "process":
+        return concurrent.futures.ProcessPoolExecutor(
+            n_workers, initializer=initializer, initargs=initargs
+        )
+    raise ValueError(f"expected executor in ['thread', 'process'], got {executor}")
+
+
+def _n_workers(n_jobs: Optional[int]) -> int:
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    assert n_jobs >= 1, n_jobs
+    return n_jobs
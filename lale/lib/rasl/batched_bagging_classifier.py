@@ -12,11 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
 import copy
 import inspect
-from typing import Any, Tuple
+from typing import Any, List, Optional, Tuple
 
-import pandas as pd
+import numpy as np
 import sklearn.base
 
 import lale.docstrings
@@ -24,6 +25,7 @@ import lale.operators
 from lale.lib._common_schemas import schema_estimator
 from lale.lib.sklearn import DecisionTreeClassifier, bagging_classifier
 
+from ._executors import _create_executor
 from .monoid import Monoid, MonoidableOperator
 
 
@@ -37,34 +39,121 @@ class _BatchedBaggingClassifierMonoid(Monoid):
         return _BatchedBaggingClassifierMonoid(classifiers=orig_classifiers)
 
 
+def _call_classifier(classifier, method_name, X):
+    return getattr(classifier, method_name)(X)
+
+
+# in worker processes, the classifiers of the ensemble that owns the pool,
+# so they get shipped once per pool instead of once per call
+_worker_classifiers: List[Any] = []
+
+
+def _init_worker(classifiers):
+    global _worker_classifiers  # pylint:disable=global-statement
+    _worker_classifiers = classifiers
+
+
+def _call_worker_classifier(index, method_name, X):
+    return getattr(_worker_classifiers[index], method_name)(X)
+
+
 class _BatchedBaggingClassifierImpl(
     MonoidableOperator[_BatchedBaggingClassifierMonoid]
 ):
-    def __init__(self, base_estimator=None):
+    def __init__(
+        self, base_estimator=None, *, voting="hard", n_jobs=None, executor="thread"
+    ):
         if base_estimator is None:
             base_estimator = DecisionTreeClassifier()
-        self._hyperparams = {"base_estimator": base_estimator}
+        self._hyperparams = {
+            "base_estimator": base_estimator,
+            "voting": voting,
+            "n_jobs": n_jobs,
+            "executor": executor,
+        }
+        self._pool: Optional[concurrent.futures.Executor] = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None  # pools cannot be pickled, recreated lazily
+        return state
 
     def predict(self, X):
+        if self._hyperparams["voting"] == "soft":
+            probabilities, classes = self._soft_vote(X)
+            return classes[probabilities.argmax(axis=1)]
         if len(self.classifiers_list) == 1:
             return self.classifiers_list[0].predict(X)
+        # Take a voting of the classifiers, counting the integer-coded
+        # predictions of all rows at once
+        predictions_list = self._call_classifiers("predict", X)
+        assert all(
+            np.ndim(p) == 1 for p in predictions_list
+        ), "hard voting expects one prediction per row from each classifier"
+        predictions = np.stack([np.asarray(p) for p in predictions_list])
+        classes, codes = np.unique(predictions, return_inverse=True)
+        n_rows, n_classes = predictions.shape[1], len(classes)
+        codes = codes.reshape(predictions.shape) + np.arange(n_rows) * n_classes
+        votes = np.bincount(codes.ravel(), minlength=n_rows * n_classes)
+        # argmax picks the first mode, i.e., the smallest of tied classes
+        return classes[votes.reshape(n_rows, n_classes).argmax(axis=1)]
+
+    def predict_proba(self, X):
+        probabilities, _ = self._soft_vote(X)
+        return probabilities
+
+    def _soft_vote(self, X):
+        # average the probabilities of the classifiers, which may have seen
+        # different subsets of the classes in their batches
+        probabilities_list = self._call_classifiers("predict_proba", X)
+        classes_list = [np.asarray(c.classes_) for c in self.classifiers_list]
+        classes = np.unique(np.concatenate(classes_list))
+        result = np.zeros((probabilities_list[0].shape[0], len(classes)))
+        for probabilities, member_classes in zip(probabilities_list, classes_list):
+            result[:, np.searchsorted(classes, member_classes)] += probabilities
+        return result / len(self.classifiers_list), classes
+
+    def _get_pool(self) -> Optional[concurrent.futures.Executor]:
+        # created on first use and kept across calls, since starting workers
+        # and shipping classifiers to processes would dominate prediction
+        if self._pool is None and len(self.classifiers_list) > 1:
+            executor = self._hyperparams["executor"]
+            n_jobs = self._hyperparams["n_jobs"]
+            if executor == "process":
+                self._pool = _create_executor(
+                    executor, n_jobs, _init_worker, (self.classifiers_list,)
+                )
+            else:
+                self._pool = _create_executor(executor, n_jobs)
+        return self._pool
+
+    def _call_classifiers(self, method_name, X):
+        pool = self._get_pool()
+        if pool is None:
+            return [getattr(c, method_name)(X) for c in self.classifiers_list]
+        if self._hyperparams["executor"] == "process":
+            futures = [
+                pool.submit(_call_worker_classifier, i, method_name, X)
+                for i in range(len(self.classifiers_list))
+            ]
         else:
-            # Take a voting of the classifiers
-            predictions_list = [
-                classifier.predict(X) for classifier in self.classifiers_list
+            futures = [
+                pool.submit(_call_classifier, c, method_name, X)
+                for c in self.classifiers_list
             ]
-            df = pd.DataFrame(predictions_list).transpose()
-            predictions = df.mode(axis=1)
-            if (
-                predictions.shape[1] > 1
-            ):  # When there are multiple modes, pick the first one
-                predictions = predictions.iloc[:, 0]
-            predictions = predictions.squeeze()  # converts a dataframe to series.
-            return predictions
+        return [future.result() for future in futures]
+
+    def _fit_parallelism(self) -> Tuple[Optional[int], str]:
+        # n_jobs parallelizes the classifiers during prediction, splitting
+        # the rows for fit would train an ensemble instead of one classifier
+        return None, "thread"
 
     def from_monoid(self, monoid: _BatchedBaggingClassifierMonoid):
         self._monoid = monoid
         self.classifiers_list = monoid.classifiers
+        if self._pool is not None:  # workers may hold the old classifiers
+            self._pool.shutdown(wait=False)
+            self._pool = None
 
     def to_monoid(self, batch: Tuple[Any, Any]) -> _BatchedBaggingClassifierMonoid:
         X, y = batch
@@ -83,11 +172,40 @@ _hyperparams_schema = {
             "type": "object",
             "required": [
                 "base_estimator",
+                "voting",
+                "n_jobs",
+                "executor",
             ],
             "relevantToOptimizer": [],
             "additionalProperties": False,
             "properties": {
                 "base_estimator": schema_estimator,
+                "voting": {
+                    "description": "If `hard`, predict the majority vote of the classifiers, else the argmax of their averaged `predict_proba`.",
+                    "enum": ["hard", "soft"],
+                    "default": "hard",
+                },
+                "n_jobs": {
+                    "description": "The number of jobs to run in parallel for `predict` and `predict_proba`, each running one classifier at a time.",
+                    "anyOf": [
+                        {
+                            "description": "Run the classifiers one after another.",
+                            "enum": [None],
+                        },
+                        {"description": "Use all processors.", "enum": [-1]},
+                        {
+                            "description": "Number of CPU cores.",
+                            "type": "integer",
+                            "minimum": 1,
+                        },
+                    ],
+                    "default": None,
+                },
+                "executor": {
+                    "description": "Whether the parallel workers are threads or processes.",
+                    "enum": ["thread", "process"],
+                    "default": "thread",
+                },
             },
         }
     ]
@@ -109,6 +227,8 @@ _combined_schemas = {
         "input_fit": bagging_classifier._input_fit_schema,
         "input_predict": bagging_classifier.schema_X_numbers,
         "output_predict": bagging_classifier.schema_1D_cats,
+        "input_predict_proba": bagging_classifier.schema_X_numbers,
+        "output_predict_proba": bagging_classifier.schema_2D_numbers,
     },
 }
 
@@ -12,13 +12,168 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
+import time
+from typing import Any, Optional
+
 import numpy as np
+import pandas as pd
+import scipy.sparse
 
 import lale.docstrings
 import lale.helpers
 import lale.operators
 
-from .task_graphs import PrioBatch, PrioResourceAware, PrioStep, fit_with_batches
+from .task_graphs import (
+    PrioBatch,
+    PrioCostModel,
+    PrioResourceAware,
+    PrioStep,
+    SpillArrow,
+    SpillPickle,
+    _estimate_space,
+    _RunStats,
+    fit_with_batches,
+    predict_with_batches,
+)
+
+try:
+    import psutil
+
+    psutil_installed = True
+except ImportError:
+    psutil_installed = False
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+_AUTO_INITIAL_BATCH_SIZE = 1024
+
+
+def _available_memory() -> Optional[int]:
+    """Bytes of memory available to this process, taking cgroup limits
+    in containers into account, or None if that cannot be determined."""
+    candidates = []
+    if psutil_installed:
+        candidates.append(psutil.virtual_memory().available)
+    else:
+        try:
+            with open("/proc/meminfo", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        candidates.append(int(line.split()[1]) * 1024)
+        except OSError:
+            pass
+    cgroup_files = [
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),  # v2
+        (
+            "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+            "/sys/fs/cgroup/memory/memory.usage_in_bytes",
+        ),  # v1
+    ]
+    for limit_file, usage_file in cgroup_files:
+        try:
+            with open(limit_file, encoding="utf-8") as f:
+                limit = f.read().strip()
+            with open(usage_file, encoding="utf-8") as f:
+                usage = int(f.read().strip())
+        except (OSError, ValueError):
+            continue
+        if limit.isdigit() and int(limit) < 2**60:  # v1 uses a huge "no limit"
+            candidates.append(max(0, int(limit) - usage))
+        break
+    return min(candidates) if len(candidates) > 0 else None
+
+
+class _AdaptiveBatches:
+    """Iterator over row slices of (X, y) whose size adapts while the task
+    graph consumes them. The size halves when the task graph spilled since
+    the previous batch, doubles otherwise while that lowers the time per row,
+    and stays within a share of max_resident for each batch."""
+
+    def __init__(
+        self,
+        X,
+        y,
+        batch_size: int,
+        max_resident: Optional[int],
+        n_steps: int,
+        shuffle: bool,
+    ):
+        self.X = X
+        self.y = y
+        self.n_rows = X.shape[0]
+        self.order = np.random.permutation(self.n_rows) if shuffle else None
+        self.batch_size = batch_size
+        # the input batch plus one output per step
+        self.budget = None if max_resident is None else max_resident // (n_steps + 1)
+        self.max_rows: Optional[int] = None
+        self.position = 0
+        self.stats: Optional[_RunStats] = None
+        self.last_spill_count: float = 0
+        self.last_time: Optional[float] = None
+        self.last_rows = 0
+        self.last_time_per_row: Optional[float] = None
+
+    def set_run_stats(self, stats: _RunStats) -> None:
+        self.stats = stats
+
+    def _adapt(self) -> None:
+        if self.last_time is not None:
+            time_per_row = (time.time() - self.last_time) / self.last_rows
+            spill_count = 0 if self.stats is None else self.stats.spill_count
+            if spill_count > self.last_spill_count:
+                self.batch_size = max(1, self.batch_size // 2)
+            elif (
+                self.last_time_per_row is None
+                or time_per_row < 0.9 * self.last_time_per_row
+            ):
+                self.batch_size *= 2
+            self.last_spill_count = spill_count
+            self.last_time_per_row = time_per_row
+        if self.max_rows is not None:
+            self.batch_size = max(1, min(self.batch_size, self.max_rows))
+
+    def _take(self, data, start: int, stop: int):
+        if data is None:
+            return None
+        if self.order is None:
+            rows: Any = slice(start, stop)
+        else:
+            rows = self.order[start:stop]
+        if isinstance(data, (pd.DataFrame, pd.Series)):
+            return data.iloc[rows]
+        return data[rows]
+
+    def __iter__(self) -> "_AdaptiveBatches":
+        return self
+
+    def __next__(self):
+        if self.position >= self.n_rows:
+            raise StopIteration
+        self._adapt()
+        start, stop = self.position, min(self.position + self.batch_size, self.n_rows)
+        batch_X, batch_y = self._take(self.X, start, stop), self._take(
+            self.y, start, stop
+        )
+        if self.budget is not None and self.max_rows is None:
+            row_space = (_estimate_space(batch_X) + _estimate_space(batch_y)) / (
+                stop - start
+            )
+            self.max_rows = max(1, int(self.budget / max(1.0, row_space)))
+        self.position = stop
+        self.last_rows = stop - start
+        self.last_time = time.time()
+        return batch_X, batch_y
+
+
+def _Xy_batches(batches):
+    """Turn batches of features only into (features, None) tuples."""
+    for batch_data in batches:
+        if isinstance(batch_data, tuple):
+            yield batch_data
+        else:
+            yield batch_data, None
 
 
 class _BatchingImpl:
@@ -36,6 +191,13 @@ class _BatchingImpl:
         partial_transform=False,
         priority="resource_aware",
         verbose=0,
+        n_jobs=None,
+        executor="thread",
+        spill_format="pickle",
+        prefetch=0,
+        combine_fan_in=None,
+        checkpoint_dir=None,
+        memory_fraction=0.5,
     ):
         self.operator = operator
         self.batch_size = batch_size
@@ -49,15 +211,63 @@ class _BatchingImpl:
         self.partial_transform = partial_transform
         self.priority = priority
         self.verbose = verbose
+        self.n_jobs = n_jobs
+        self.executor = executor
+        self.spill_format = spill_format
+        self.prefetch = prefetch
+        self.combine_fan_in = combine_fan_in
+        self.checkpoint_dir = checkpoint_dir
+        self.memory_fraction = memory_fraction
+
+    def _get_max_resident(self) -> Optional[int]:
+        if self.max_resident != "auto":
+            return self.max_resident
+        available = _available_memory()
+        if available is None:
+            logger.warning("could not determine available memory for max_resident")
+            return None
+        return int(self.memory_fraction * available)
+
+    def _get_batch_size(self) -> int:
+        if self.batch_size == "auto":
+            return _AUTO_INITIAL_BATCH_SIZE
+        return self.batch_size
+
+    def _get_prio(self):
+        if self.priority == "batch":
+            return PrioBatch()
+        if self.priority == "step":
+            return PrioStep()
+        if self.priority == "cost_model":
+            return PrioCostModel()
+        return PrioResourceAware()
+
+    def _get_spill_format(self):
+        if self.spill_format == "pickle":
+            return SpillPickle()
+        compression = {"arrow": None, "arrow_lz4": "lz4", "arrow_zstd": "zstd"}
+        return SpillArrow(compression[self.spill_format])
 
     def fit(self, X, y=None, classes=None):
         if self.operator is None:
             raise ValueError("The pipeline object can't be None at the time of fit.")
+        max_resident = self._get_max_resident()
         if hasattr(X, "__next__") and hasattr(
             X, "__iter__"
         ):  # allow an iterable that is not a torch data loader
             assert y is None, "When X is an Iterable, y should be None"
             data_loader = X
+        elif self.batch_size == "auto" and isinstance(
+            X, (pd.DataFrame, np.ndarray, scipy.sparse.spmatrix)
+        ):
+            data_loader = _AdaptiveBatches(
+                X,
+                y,
+                _AUTO_INITIAL_BATCH_SIZE,
+                max_resident,
+                len(self.operator.steps_list()),
+                self.shuffle,
+            )
         else:
             try:
                 from torch.utils.data import DataLoader
@@ -76,30 +286,30 @@ class _BatchingImpl:
                 data_loader = lale.helpers.create_data_loader(
                     X=X,
                     y=y,
-                    batch_size=self.batch_size,
+                    batch_size=self._get_batch_size(),
                     num_workers=self.num_workers,
                     shuffle=self.shuffle,
                 )
         if y is not None and classes is None:
             classes = np.unique(y)
-        if self.priority == "batch":
-            prio = PrioBatch()
-        elif self.priority == "step":
-            prio = PrioStep()
-        else:
-            prio = PrioResourceAware()
 
         self.operator = fit_with_batches(
             pipeline=self.operator,
             batches_train=data_loader,  # type:ignore
             batches_valid=None,
             unique_class_labels=classes,  # type:ignore
-            max_resident=self.max_resident,
-            prio=prio,
+            max_resident=max_resident,
+            prio=self._get_prio(),
             partial_transform=self.partial_transform,
             scoring=self.scoring,
             progress_callback=self.progress_callback,
             verbose=self.verbose,
+            n_jobs=self.n_jobs,
+            executor=self.executor,
+            spill_format=self._get_spill_format(),
+            prefetch=self.prefetch,
+            combine_fan_in=self.combine_fan_in,
+            checkpoint_dir=self.checkpoint_dir,
         )
         return self
 
@@ -127,15 +337,23 @@ class _BatchingImpl:
                 data_loader = lale.helpers.create_data_loader(
                     X=X,
                     y=y,
-                    batch_size=self.batch_size,
+                    batch_size=self._get_batch_size(),
                     num_workers=self.num_workers,
                     shuffle=self.shuffle,
                 )
 
         op = self.operator
         assert op is not None
-        transformed_data = op.transform_with_batches(
-            data_loader, serialize=self.inmemory
+        transformed_data = predict_with_batches(
+            pipeline=op,
+            batches=_Xy_batches(data_loader),
+            max_resident=self._get_max_resident(),
+            prio=self._get_prio(),
+            verbose=self.verbose,
+            n_jobs=self.n_jobs,
+            executor=self.executor,
+            spill_format=self._get_spill_format(),
+            prefetch=self.prefetch,
         )
         return transformed_data
 
@@ -276,12 +494,20 @@ _hyperparams_schema = {
                 },
                 "batch_size": {
                     "description": "Batch size used for transform.",
-                    "type": "integer",
+                    "anyOf": [
+                        {
+                            "type": "integer",
+                            "minimum": 1,
+                            "distribution": "uniform",
+                            "minimumForOptimizer": 32,
+                            "maximumForOptimizer": 128,
+                        },
+                        {
+                            "description": "For fit on a pandas DataFrame, numpy array, or sparse matrix, start with 1024 rows and adapt the batch size to processing speed, spilling, and max_resident.",
+                            "enum": ["auto"],
+                        },
+                    ],
                     "default": 64,
-                    "minimum": 1,
-                    "distribution": "uniform",
-                    "minimumForOptimizer": 32,
-                    "maximumForOptimizer": 128,
                 },
                 "shuffle": {
                     "type": "boolean",
@@ -296,9 +522,8 @@ _hyperparams_schema = {
                 "inmemory": {
                     "type": "boolean",
                     "default": False,
-                    "description": """Whether all the computations are done in memory
-                    or intermediate outputs are serialized. Only applies to transform/predict.
-                    For fit, use the `max_resident` argument.""",
+                    "description": """Ignored, kept for backward compatibility.
+                    Use the `max_resident` argument to bound memory during fit, transform, and predict.""",
                 },
                 "num_epochs": {
                     "anyOf": [{"type": "integer"}, {"enum": [None]}],
@@ -306,7 +531,14 @@ _hyperparams_schema = {
                     "description": "Number of epochs. If the operator has `num_epochs` as a parameter, that takes precedence.",
                 },
                 "max_resident": {
-                    "anyOf": [{"type": "integer"}, {"enum": [None]}],
+                    "anyOf": [
+                        {"type": "integer"},
+                        {"enum": [None]},
+                        {
+                            "description": "Use memory_fraction of the memory available to the process, considering cgroup limits.",
+                            "enum": ["auto"],
+                        },
+                    ],
                     "default": None,
                     "description": "Amount of memory to be used in bytes.",
                 },
@@ -330,8 +562,10 @@ to transform data for training downstream operators even before the upstream ope
                     "description": """Scheduling priority in task graphs.
 "batch" will execute tasks from earlier batches first.
 "step" will execute tasks from earlier steps first, like nested-loop algorithm.
-And "resource_aware" will execute tasks with less non-resident data first.""",
-                    "enum": ["batch", "step", "resource_aware"],
+"resource_aware" will execute tasks with less non-resident data first.
+And "cost_model" will execute tasks on the longest estimated path first,
+with estimates learned from the first batches.""",
+                    "enum": ["batch", "step", "resource_aware", "cost_model"],
                     "default": "resource_aware",
                 },
                 "verbose": {
@@ -339,6 +573,71 @@ And "resource_aware" will execute tasks with less non-resident data first.""",
                     "default": 0,
                     "description": "Verbosity level, higher values mean more information.",
                 },
+                "n_jobs": {
+                    "description": """Number of workers that run independent tasks of the task graph concurrently during fit, transform, and predict.""",
+                    "anyOf": [
+                        {"description": "Run tasks sequentially.", "enum": [None]},
+                        {"description": "Use all processors.", "enum": [-1]},
+                        {
+                            "description": "Number of workers.",
+                            "type": "integer",
+                            "minimum": 1,
+                        },
+                    ],
+                    "default": None,
+                },
+                "executor": {
+                    "description": """Kind of worker pool used when n_jobs is not 1.
+"thread" shares data between workers without copying,
+whereas "process" avoids contention on the global interpreter lock
+but requires picklable operators and data.""",
+                    "enum": ["thread", "process"],
+                    "default": "thread",
+                },
+                "spill_format": {
+                    "description": """File format for intermediate batches that do not fit in max_resident.
+"pickle" pickles pandas data,
+whereas "arrow" uses Arrow IPC files for pandas data and raw .npy files for numpy arrays,
+memory-mapped when loaded back, and requires pyarrow.
+"arrow_lz4" and "arrow_zstd" additionally compress the Arrow files.""",
+                    "enum": ["pickle", "arrow", "arrow_lz4", "arrow_zstd"],
+                    "default": "pickle",
+                },
+                "prefetch": {
+                    "description": """Number of batches to read ahead from the data loader on a background thread,
+and number of upcoming tasks whose spilled inputs are loaded in the background, within max_resident.""",
+                    "type": "integer",
+                    "minimum": 0,
+                    "default": 0,
+                },
+                "combine_fan_in": {
+                    "description": """How monoids of batches are combined during fit.""",
+                    "anyOf": [
+                        {
+                            "description": "Combine all monoids of a step in a single task.",
+                            "enum": [None],
+                        },
+                        {
+                            "description": "Combine monoids in a balanced tree of tasks with this many inputs each, which can run concurrently with n_jobs.",
+                            "type": "integer",
+                            "minimum": 2,
+                        },
+                    ],
+                    "default": None,
+                },
+                "memory_fraction": {
+                    "description": "Fraction of available memory to use when max_resident is auto.",
+                    "type": "number",
+                    "minimum": 0.0,
+                    "exclusiveMinimum": True,
+                    "maximum": 1.0,
+                    "default": 0.5,
+                },
+                "checkpoint_dir": {
+                    "description": "Directory for saving finished tasks during fit, so that fitting again after an interruption resumes where it left off.",
+                    "anyOf": [{"type": "string"}, {"enum": [None]}],
+                    "default": None,
+                },
             },
         }
     ],
@@ -12,19 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import typing
 from functools import reduce
 from typing import Any, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
+import scipy.sparse
 
 import lale.docstrings
 import lale.helpers
 import lale.operators
+from lale.datasets.data_schemas import add_table_name, get_table_name
 from lale.expressions import Expr, hash_mod, it, ite
 from lale.helpers import _is_pandas_df, _is_spark_df
+from lale.lib._common_schemas import schema_executor, schema_monoid_fit_n_jobs
 from lale.lib.category_encoders import hashing_encoder
 from lale.lib.dataframe import count, get_columns
 
+from ._eval_pandas_df import _hash_mod_column
 from .map import Map
 from .monoid import Monoid, MonoidableOperator
 
@@ -55,15 +62,19 @@ def is_category(dtype):
 
 
 class _HashingEncoderMonoid(Monoid):
-    def __init__(self, *, n_samples_seen_, feature_names):
+    def __init__(self, *, n_samples_seen_, feature_names, cols):
         self.n_samples_seen_ = n_samples_seen_
         self.feature_names = feature_names
+        self.cols = cols
 
     def combine(self, other: "_HashingEncoderMonoid"):
         assert list(self.feature_names) == list(other.feature_names)
+        assert list(self.cols) == list(other.cols)
         n_samples_seen_ = self.n_samples_seen_ + other.n_samples_seen_
         return _HashingEncoderMonoid(
-            n_samples_seen_=n_samples_seen_, feature_names=self.feature_names
+            n_samples_seen_=n_samples_seen_,
+            feature_names=self.feature_names,
+            cols=self.cols,
         )
 
 
@@ -76,20 +87,63 @@ class _HashingEncoderImpl(MonoidableOperator[_HashingEncoderMonoid]):
         # drop_invariant=False,
         # return_df=True,
         hash_method="md5",
+        sparse=False,
+        n_jobs=None,
+        executor="thread",
     ):
         self._hyperparams = {
             "n_components": n_components,
             "cols": cols,
             # "drop_invariant": drop_invariant,
             "hash_method": hash_method,
+            "sparse": sparse,
+            "n_jobs": n_jobs,
+            "executor": executor,
         }
         self._dim = None
 
     def transform(self, X):
+        if _is_pandas_df(X):
+            return self._transform_pandas(X)
         if self._transformer is None:
             self._transformer = self._build_transformer(X)
         return self._transformer.transform(X)
 
+    def _transform_pandas(self, X):
+        # hash every encoded column once, then count all (row, component)
+        # pairs in a single bincount or sparse scatter
+        cols = self._hyperparams["cols"]
+        N = self._hyperparams["n_components"]
+        n_rows = X.shape[0]
+        hash_method = self._hyperparams["hash_method"]
+        codes = [
+            _hash_mod_column(X[c], hash_method, N).to_numpy(dtype=np.int64)
+            for c in cols
+        ]
+        row_ids = np.tile(np.arange(n_rows), len(cols))
+        col_ids = np.concatenate(codes) if len(codes) > 0 else np.empty(0, int)
+        remainder = [c for c in X.columns if c not in cols]
+        if self._hyperparams["sparse"]:
+            ones = np.ones(len(row_ids), dtype=np.int64)
+            result = scipy.sparse.csr_matrix(
+                (ones, (row_ids, col_ids)), shape=(n_rows, N)
+            )
+            if len(remainder) > 0:
+                result = scipy.sparse.hstack(
+                    [result, scipy.sparse.csr_matrix(X[remainder].to_numpy())],
+                    format="csr",
+                )
+            return result
+        counts = np.bincount(row_ids * N + col_ids, minlength=n_rows * N)
+        result_df = pd.DataFrame(
+            counts.reshape(n_rows, N),
+            index=X.index,
+            columns=[f"col_{i}" for i in range(N)],
+        )
+        if len(remainder) > 0:
+            result_df = pd.concat([result_df, X[remainder]], axis=1)
+        return add_table_name(result_df, get_table_name(X))
+
     @property
     def n_samples_seen_(self):
         return getattr(self._monoid, "n_samples_seen_", 0)
@@ -100,6 +154,8 @@ class _HashingEncoderImpl(MonoidableOperator[_HashingEncoderMonoid]):
 
     def from_monoid(self, monoid: _HashingEncoderMonoid):
         self._monoid = monoid
+        # to_monoid may have run on a copy of self, e.g. in a worker process
+        self._hyperparams["cols"] = monoid.cols
         self._transformer = None
 
     def _build_transformer(self, X):
@@ -125,7 +181,6 @@ class _HashingEncoderImpl(MonoidableOperator[_HashingEncoderMonoid]):
         cols = self._hyperparams["cols"]
         if cols is None:
             cols = get_obj_cols(X)
-            self._hyperparams["cols"] = cols
 
         N = self._hyperparams["n_components"]
         feature_names_cat = [f"col_{i}" for i in range(N)]
@@ -133,7 +188,7 @@ class _HashingEncoderImpl(MonoidableOperator[_HashingEncoderMonoid]):
         feature_names = feature_names_cat + feature_names_num  # type: ignore
         n_samples_seen_ = count(X)
         return _HashingEncoderMonoid(
-            n_samples_seen_=n_samples_seen_, feature_names=feature_names
+            n_samples_seen_=n_samples_seen_, feature_names=feature_names, cols=cols
         )
 
     # https://github.com/scikit-learn-contrib/category_encoders/blob/master/category_encoders/hashing.py
@@ -158,6 +213,7 @@ _combined_schemas = {
     "$schema": "http://json-schema.org/draft-04/schema#",
     "description": """Relational algebra reimplementation of scikit-learn contrib's `HashingEncoder`_ transformer.
 Works on both pandas and Spark dataframes by using `Map`_ for `transform`, which in turn use the appropriate backend.
+On pandas, `transform` counts all hash codes with vectorized operations and can return a sparse matrix.
 
 .. _`HashingEncoder`: https://contrib.scikit-learn.org/category_encoders/hashing.html
 .. _`Map`: https://lale.readthedocs.io/en/latest/modules/lale.lib.rasl.map.html
@@ -179,8 +235,28 @@ Works on both pandas and Spark dataframes by using `Map`_ for `transform`, which
 
 HashingEncoder = lale.operators.make_operator(_HashingEncoderImpl, _combined_schemas)
 
-# HashingEncoder = typing.cast(
-#     lale.operators.PlannedIndividualOp,
-# )
+# shake_128 and shake_256 have variable-length digests, whose hexdigest()
+# needs a length
+_FIXED_LENGTH_ALGORITHMS = sorted(
+    a for a in hashlib.algorithms_available if not a.startswith("shake")
+)
+
+HashingEncoder = typing.cast(
+    lale.operators.PlannedIndividualOp,
+    HashingEncoder.customize_schema(
+        n_jobs=schema_monoid_fit_n_jobs,
+        executor=schema_executor,
+        hash_method={
+            "description": "which hashing method to use. `pandas` hashes whole columns at once with `pandas.util.hash_array` and is only supported for pandas input.",
+            "enum": _FIXED_LENGTH_ALGORITHMS + ["pandas"],
+            "default": "md5",
+        },
+        sparse={
+            "description": "Will return sparse matrix if set true, else dataframe. Sparse output is only supported for pandas input, Spark input always gives a dense dataframe.",
+            "type": "boolean",
+            "default": False,
+        },
+    ),
+)
 
 lale.docstrings.set_docstrings(HashingEncoder)
@@ -35,6 +35,7 @@ from lale.expressions import it, ite
 from lale.expressions import max as agg_max
 from lale.expressions import min as agg_min
 from lale.helpers import _is_spark_df
+from lale.lib._common_schemas import schema_executor, schema_monoid_fit_n_jobs
 from lale.lib.dataframe import count, get_columns
 from lale.lib.rasl import Aggregate, Map
 from lale.lib.sklearn import min_max_scaler
@@ -72,10 +73,24 @@ class _MinMaxScalerMonoid(Monoid):
 
 
 class _MinMaxScalerImpl(MonoidableOperator[_MinMaxScalerMonoid]):
-    def __init__(self, feature_range=(0, 1), *, copy=True, clip=False):
+    def __init__(
+        self,
+        feature_range=(0, 1),
+        *,
+        copy=True,
+        clip=False,
+        n_jobs=None,
+        executor="thread",
+    ):
         if not copy:
             raise ValueError("`copy=False` is not supported by this implementation")
-        self._hyperparams = {"feature_range": feature_range, "copy": copy, "clip": clip}
+        self._hyperparams = {
+            "feature_range": feature_range,
+            "copy": copy,
+            "clip": clip,
+            "n_jobs": n_jobs,
+            "executor": executor,
+        }
 
     def transform(self, X):
         if self._transformer is None:
@@ -189,6 +204,8 @@ MinMaxScaler = lale.operators.make_operator(_MinMaxScalerImpl, _combined_schemas
 MinMaxScaler = typing.cast(
     lale.operators.PlannedIndividualOp,
     MinMaxScaler.customize_schema(
+        n_jobs=schema_monoid_fit_n_jobs,
+        executor=schema_executor,
         copy=Enum(
             values=[True],
             desc="`copy=True` is the only value currently supported by this implementation",
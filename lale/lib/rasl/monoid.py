@@ -12,11 +12,34 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import functools
+import importlib
+import json
+import pickle  # nosec
+import struct
 from abc import ABC, abstractmethod
-from typing import Any, Generic, Optional, TypeVar
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
 
+import numpy as np
+import pandas as pd
+import scipy.sparse
 from typing_extensions import Protocol, runtime_checkable
 
+from ._executors import _create_executor, _n_workers
+
 _InputType_contra = TypeVar("_InputType_contra", contravariant=True)
 _OutputType_co = TypeVar("_OutputType_co", covariant=True)
 _SelfType = TypeVar("_SelfType")
@@ -46,6 +69,230 @@ class Monoid(ABC):
         """
         return False
 
+    def to_bytes(self) -> bytes:
+        """
+        Serialize this monoid to a compact, versioned binary format.
+        The default implementation encodes the instance attributes:
+        numeric numpy arrays and scalars are stored as raw buffers,
+        Python scalars, strings, lists, tuples, dicts, pandas dataframes,
+        series, and indexes, and nested monoids are described in a small JSON header, and
+        any other attribute values, including subclasses of the above, fall back to pickle.
+        """
+        buffers: List[bytes] = []
+        header = {"root": _encode_monoid(self, buffers)}
+        return _pack(header, buffers)
+
+    @classmethod
+    def from_bytes(
+        cls: Type[_SelfType], data: bytes, allow_pickle: bool = False
+    ) -> _SelfType:
+        """
+        Deserialize a monoid written by :method:to_bytes.  This imports the
+        recorded classes, so only use it on trusted data.  Attribute values
+        that :method:to_bytes pickled raise a ValueError unless
+        `allow_pickle` is True, since unpickling can run arbitrary code.
+        """
+        header, payload = _unpack(data)
+        result = _decode(header["root"], payload, allow_pickle)
+        if not isinstance(result, cls):
+            raise ValueError(
+                f"expected serialized {cls.__name__}, got {type(result).__name__}"
+            )
+        return result
+
+
+_STRUCTURED_TYPES = (
+    bytes,
+    list,
+    tuple,
+    dict,
+    pd.RangeIndex,
+    pd.Index,
+    pd.Series,
+    pd.DataFrame,
+)
+_MAGIC = b"LMON"
+_FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<4sBI")  # magic, version, header length
+_ALIGN = 8
+
+
+def _padding(n: int) -> int:
+    return -n % _ALIGN
+
+
+def _pack(header: Dict[str, Any], buffers: List[bytes]) -> bytes:
+    offsets = []
+    offset = 0
+    for buf in buffers:
+        offsets.append([offset, len(buf)])
+        offset += len(buf) + _padding(len(buf))
+    header["buffers"] = offsets
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    prefix_len = _PREAMBLE.size + len(header_bytes)
+    chunks = [
+        _PREAMBLE.pack(_MAGIC, _FORMAT_VERSION, len(header_bytes)),
+        header_bytes,
+        bytes(_padding(prefix_len)),
+    ]
+    for buf in buffers:
+        chunks.append(buf)
+        chunks.append(bytes(_padding(len(buf))))
+    return b"".join(chunks)
+
+
+def _unpack(data: bytes) -> Tuple[Dict[str, Any], List[memoryview]]:
+    if len(data) < _PREAMBLE.size:
+        raise ValueError("data too short for a serialized monoid")
+    magic, version, header_len = _PREAMBLE.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError("data is not a serialized monoid")
+    if version != _FORMAT_VERSION:
+        raise ValueError(f"unsupported monoid serialization version {version}")
+    start = _PREAMBLE.size
+    header = json.loads(bytes(data[start : start + header_len]).decode("utf-8"))
+    start += header_len
+    start += _padding(start)
+    view = memoryview(data)
+    payload = [view[start + o : start + o + n] for o, n in header["buffers"]]
+    return header, payload
+
+
+def _is_raw_dtype(dtype: np.dtype) -> bool:
+    return dtype != object and dtype.fields is None
+
+
+def _encode_monoid(monoid: Monoid, buffers: List[bytes]) -> Any:
+    cls = type(monoid)
+    if "<locals>" in cls.__qualname__ or not hasattr(monoid, "__dict__"):
+        return _encode_pickle(monoid, buffers)
+    fields = {k: _encode(v, buffers) for k, v in vars(monoid).items()}
+    return {"m": [cls.__module__, cls.__qualname__], "f": fields}
+
+
+def _encode_pickle(value, buffers: List[bytes]) -> Any:
+    buffers.append(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    return {"p": len(buffers) - 1}
+
+
+def _encode(value, buffers: List[bytes]) -> Any:
+    if type(value) in (type(None), bool, int, float, str):
+        return {"v": value}
+    if isinstance(value, Monoid):
+        return _encode_monoid(value, buffers)
+    if isinstance(value, (np.ndarray, np.generic)):
+        arr = np.asarray(value)
+        if _is_raw_dtype(arr.dtype):
+            buffers.append(np.ascontiguousarray(arr).tobytes())
+            kind = "s" if isinstance(value, np.generic) else "a"
+            return {kind: len(buffers) - 1, "dt": arr.dtype.str, "sh": arr.shape}
+        if isinstance(value, np.ndarray):
+            items = [_encode(x, buffers) for x in arr.ravel()]
+            return {"o": items, "sh": arr.shape}
+    if isinstance(value, _STRUCTURED_TYPES) and type(value) not in _STRUCTURED_TYPES:
+        # subclasses such as namedtuple or defaultdict would lose their type
+        return _encode_pickle(value, buffers)
+    if isinstance(value, bytes):
+        buffers.append(value)
+        return {"b": len(buffers) - 1}
+    if isinstance(value, list):
+        return {"l": [_encode(x, buffers) for x in value]}
+    if isinstance(value, tuple):
+        return {"t": [_encode(x, buffers) for x in value]}
+    if isinstance(value, dict):
+        return {
+            "d": [[_encode(k, buffers), _encode(v, buffers)] for k, v in value.items()]
+        }
+    if isinstance(value, pd.RangeIndex):
+        return {
+            "r": [value.start, value.stop, value.step],
+            "n": _encode(value.name, buffers),
+        }
+    if isinstance(value, pd.Index) and isinstance(value.dtype, np.dtype):
+        return {
+            "i": _encode(value.to_numpy(), buffers),
+            "n": _encode(value.name, buffers),
+        }
+    if isinstance(value, pd.Series) and isinstance(value.dtype, np.dtype):
+        return {
+            "sr": _encode(value.to_numpy(), buffers),
+            "ix": _encode(value.index, buffers),
+            "n": _encode(value.name, buffers),
+        }
+    if isinstance(value, pd.DataFrame) and all(
+        isinstance(dtype, np.dtype) for dtype in value.dtypes
+    ):
+        return {
+            "df": [
+                _encode(value.iloc[:, j].to_numpy(), buffers)
+                for j in range(value.shape[1])
+            ],
+            "c": _encode(value.columns, buffers),
+            "ix": _encode(value.index, buffers),
+        }
+    return _encode_pickle(value, buffers)
+
+
+def _decode(node: Dict[str, Any], payload: List[memoryview], allow_pickle: bool) -> Any:
+    if "v" in node:
+        return node["v"]
+    if "a" in node or "s" in node:
+        buf = payload[node["a"] if "a" in node else node["s"]]
+        arr = np.frombuffer(buf, dtype=np.dtype(node["dt"])).reshape(node["sh"])
+        return arr.copy() if "a" in node else arr[()]
+    if "o" in node:
+        arr = np.empty(len(node["o"]), dtype=object)
+        for i, item in enumerate(node["o"]):
+            arr[i] = _decode(item, payload, allow_pickle)
+        return arr.reshape(node["sh"])
+    if "b" in node:
+        return bytes(payload[node["b"]])
+    if "l" in node:
+        return [_decode(x, payload, allow_pickle) for x in node["l"]]
+    if "t" in node:
+        return tuple(_decode(x, payload, allow_pickle) for x in node["t"])
+    if "d" in node:
+        return {
+            _decode(k, payload, allow_pickle): _decode(v, payload, allow_pickle)
+            for k, v in node["d"]
+        }
+    if "i" in node:
+        return pd.Index(
+            _decode(node["i"], payload, allow_pickle),
+            name=_decode(node["n"], payload, allow_pickle),
+        )
+    if "r" in node:
+        return pd.RangeIndex(*node["r"], name=_decode(node["n"], payload, allow_pickle))
+    if "sr" in node:
+        return pd.Series(
+            _decode(node["sr"], payload, allow_pickle),
+            index=_decode(node["ix"], payload, allow_pickle),
+            name=_decode(node["n"], payload, allow_pickle),
+        )
+    if "df" in node:
+        columns = [_decode(x, payload, allow_pickle) for x in node["df"]]
+        result = pd.DataFrame(
+            dict(enumerate(columns)), index=_decode(node["ix"], payload, allow_pickle)
+        )
+        result.columns = _decode(node["c"], payload, allow_pickle)
+        return result
+    if "m" in node:
+        module_name, qualname = node["m"]
+        cls: Any = importlib.import_module(module_name)
+        for name in qualname.split("."):
+            cls = getattr(cls, name)
+        result = cls.__new__(cls)
+        for name, field in node["f"].items():
+            result.__dict__[name] = _decode(field, payload, allow_pickle)
+        return result
+    if "p" in node:
+        if not allow_pickle:
+            raise ValueError(
+                "serialized monoid contains pickled values, pass allow_pickle=True to load them from a trusted source"
+            )
+        return pickle.loads(payload[node["p"]])  # nosec  # opted in by caller
+    raise ValueError(f"unknown node in serialized monoid: {sorted(node.keys())}")
+
 
 _M = TypeVar("_M", bound=Monoid)
 
@@ -76,11 +323,90 @@ class MonoidFactory(Generic[_InputType_contra, _OutputType_co, _M], Protocol):
         ...
 
 
+def to_monoid_parallel(
+    factory: MonoidFactory[Any, Any, _M],
+    batches: Iterable[Any],
+    n_jobs: Optional[int] = -1,
+    executor: str = "thread",
+) -> _M:
+    """
+    Map `to_monoid` over the batches on a pool of `n_jobs` workers (-1 means
+    all cores), using threads if `executor` is "thread" or processes if it is
+    "process", and reduce the results with a balanced tree of `combine` calls.
+    Batches get read lazily with at most two per worker in flight, and
+    monoids get combined in batch order, in case they are not commutative.
+    Worker processes send their monoids back in the :method:Monoid.to_bytes
+    format.
+    """
+    stack: List[Tuple[int, _M]] = []  # (level, monoid) pairs
+
+    def push(monoid: _M) -> None:
+        level = 0
+        while len(stack) > 0 and stack[-1][0] == level:
+            monoid = stack.pop()[1].combine(monoid)
+            level += 1
+        stack.append((level, monoid))
+
+    pool = _create_executor(executor, n_jobs)
+    if pool is None:
+        for batch in batches:
+            push(factory.to_monoid(batch))
+    else:
+        max_pending = 2 * _n_workers(n_jobs)
+        pending: Deque[Any] = collections.deque()
+        as_bytes = executor == "process"
+        lift = (
+            functools.partial(_to_monoid_bytes, factory)
+            if as_bytes
+            else factory.to_monoid
+        )
+
+        def pop_result() -> _M:
+            result = pending.popleft().result()
+            if as_bytes:
+                return cast(_M, Monoid.from_bytes(result, allow_pickle=True))
+            return result
+
+        with pool:
+            for batch in batches:
+                pending.append(pool.submit(lift, batch))
+                if len(pending) >= max_pending:
+                    push(pop_result())
+            while len(pending) > 0:
+                push(pop_result())
+    if len(stack) == 0:
+        raise ValueError("expected at least one batch")
+    return functools.reduce(lambda a, b: a.combine(b), (m for _, m in stack))
+
+
+def _to_monoid_bytes(factory: MonoidFactory[Any, Any, _M], batch) -> bytes:
+    return factory.to_monoid(batch).to_bytes()
+
+
+def _row_chunks(data, n_chunks: int) -> List[Any]:
+    if data is None:
+        return [None] * n_chunks
+    bounds = np.linspace(0, data.shape[0], n_chunks + 1).astype(int)
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        return [data.iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+    return [data[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def _can_chunk(data) -> bool:
+    return data is None or (
+        isinstance(data, (pd.DataFrame, pd.Series, np.ndarray))
+        or scipy.sparse.isspmatrix_csr(data)
+    )
+
+
 class MonoidableOperator(MonoidFactory[Any, None, _M], Protocol):
     """
     This is a useful base class for operator implementations that support associative (monoid-based) fit.
     Given the implementation supplied :class:MonoidFactory methods, this class provides
     default :method:partial_fit and :method:fit implementations.
+    With an `n_jobs` hyperparameter other than None or 1, :method:fit
+    splits in-memory data into row chunks and lifts them in parallel with
+    :func:to_monoid_parallel, using the `executor` hyperparameter.
     """
 
     _monoid: Optional[_M] = None
@@ -93,7 +419,17 @@ class MonoidableOperator(MonoidFactory[Any, None, _M], Protocol):
             self.from_monoid(lifted)
         return self
 
+    def _fit_parallelism(self) -> Tuple[Optional[int], str]:
+        hyperparams = getattr(self, "_hyperparams", {})
+        return hyperparams.get("n_jobs"), hyperparams.get("executor", "thread")
+
     def fit(self, X, y=None):
-        lifted = self.to_monoid((X, y))
+        n_jobs, executor = self._fit_parallelism()
+        if n_jobs in [None, 1] or not (_can_chunk(X) and _can_chunk(y)):
+            lifted = self.to_monoid((X, y))
+        else:
+            n_chunks = min(_n_workers(n_jobs), max(1, X.shape[0]))
+            batches = zip(_row_chunks(X, n_chunks), _row_chunks(y, n_chunks))
+            lifted = to_monoid_parallel(self, batches, n_jobs, executor)
         self.from_monoid(lifted)
         return self
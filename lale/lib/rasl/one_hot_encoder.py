@@ -16,12 +16,16 @@ import typing
 from typing import Any, Tuple
 
 import numpy as np
+import pandas as pd
+import scipy.sparse
 
 import lale.docstrings
 import lale.helpers
 import lale.operators
+from lale.datasets.data_schemas import add_table_name, get_table_name
 from lale.expressions import collect_set, it, replace
-from lale.helpers import _ensure_pandas
+from lale.helpers import _ensure_pandas, _is_pandas_df
+from lale.lib._common_schemas import schema_executor, schema_monoid_fit_n_jobs
 from lale.lib.dataframe import count, get_columns
 from lale.lib.sklearn import one_hot_encoder
 
@@ -62,6 +66,8 @@ class _OneHotEncoderImpl(MonoidableOperator[_OneHotEncoderMonoid]):
         sparse=False,
         dtype="float64",
         handle_unknown="ignore",
+        n_jobs=None,
+        executor="thread",
     ):
         self._hyperparams = {
             "categories": categories,
@@ -69,13 +75,44 @@ class _OneHotEncoderImpl(MonoidableOperator[_OneHotEncoderMonoid]):
             "sparse": sparse,
             "dtype": dtype,
             "handle_unknown": handle_unknown,
+            "n_jobs": n_jobs,
+            "executor": executor,
         }
 
     def transform(self, X):
+        if _is_pandas_df(X):
+            return self._transform_pandas(X)
         if self._transformer is None:
             self._transformer = self._build_transformer()
         return self._transformer.transform(X)
 
+    def _transform_pandas(self, X):
+        # look up the category codes of each column once, then scatter
+        # all ones into the output in a single vectorized step
+        assert self._monoid is not None
+        dtype = self._hyperparams["dtype"]
+        rows, cols, names = [], [], []
+        n_out_columns = 0
+        for col_name, categories in zip(
+            self._monoid.feature_names_in_, self._monoid.categories_
+        ):
+            codes = pd.Index(categories).get_indexer(X[col_name])
+            known = codes >= 0
+            rows.append(np.flatnonzero(known))
+            cols.append(codes[known] + n_out_columns)
+            names.extend(f"{col_name}_{cat_value}" for cat_value in categories)
+            n_out_columns += len(categories)
+        row_ids = np.concatenate(rows) if len(rows) > 0 else np.empty(0, int)
+        col_ids = np.concatenate(cols) if len(cols) > 0 else np.empty(0, int)
+        shape = (X.shape[0], n_out_columns)
+        if self._hyperparams["sparse"]:
+            ones = np.ones(len(row_ids), dtype=dtype)
+            return scipy.sparse.csr_matrix((ones, (row_ids, col_ids)), shape=shape)
+        result = np.zeros(shape, dtype=dtype)
+        result[row_ids, col_ids] = 1
+        result_df = pd.DataFrame(result, index=X.index, columns=names)
+        return add_table_name(result_df, get_table_name(X))
+
     @property
     def n_samples_seen_(self):
         return getattr(self._monoid, "n_samples_seen_", 0)
@@ -99,9 +136,9 @@ class _OneHotEncoderImpl(MonoidableOperator[_OneHotEncoderMonoid]):
             columns={
                 f"{col_name}_{cat_value}": replace(
                     it[col_name],
-                    {cat_value: 1},
+                    {cat_value: 1.0},
                     handle_unknown="use_encoded_value",
-                    unknown_value=0,
+                    unknown_value=0.0,
                 )
                 for col_idx, col_name in enumerate(self._monoid.feature_names_in_)
                 for cat_value in self._monoid.categories_[col_idx]
@@ -128,6 +165,7 @@ _combined_schemas = {
     "$schema": "http://json-schema.org/draft-04/schema#",
     "description": """Relational algebra reimplementation of scikit-learn's `OneHotEncoder`_ transformer that encodes categorical features as numbers.
 Works on both pandas and Spark dataframes by using `Aggregate`_ for `fit` and `Map`_ for `transform`, which in turn use the appropriate backend.
+On pandas, `transform` looks up category codes with vectorized operations and can return a sparse matrix.
 
 .. _`OneHotEncoder`: https://scikit-learn.org/stable/modules/generated/sklearn.preprocessing.OneHotEncoder.html
 .. _`Aggregate`: https://lale.readthedocs.io/en/latest/modules/lale.lib.rasl.aggregate.html
@@ -153,14 +191,16 @@ OneHotEncoder = lale.operators.make_operator(_OneHotEncoderImpl, _combined_schem
 OneHotEncoder = typing.cast(
     lale.operators.PlannedIndividualOp,
     OneHotEncoder.customize_schema(
+        n_jobs=schema_monoid_fit_n_jobs,
+        executor=schema_executor,
         drop={
             "enum": [None],
             "description": "This implementation only supports `drop=None`.",
             "default": None,
         },
         sparse={
-            "enum": [False],
-            "description": "This implementation only supports `sparse=False`.",
+            "description": "Will return sparse matrix if set true, else array. Sparse output is only supported for pandas input, Spark input always gives a dense dataframe.",
+            "type": "boolean",
             "default": False,
         },
         dtype={
@@ -16,11 +16,14 @@ import typing
 from typing import Any, Tuple
 
 import numpy as np
+import pandas as pd
 
 import lale.docstrings
 import lale.helpers
 import lale.operators
+from lale.datasets.data_schemas import add_table_name, get_table_name
 from lale.expressions import collect_set, it, replace
+from lale.lib._common_schemas import schema_executor, schema_monoid_fit_n_jobs
 from lale.lib.dataframe import count, get_columns
 from lale.lib.sklearn import ordinal_encoder
 
@@ -60,19 +63,40 @@ class _OrdinalEncoderImpl(MonoidableOperator[_OrdinalEncoderMonoid]):
         dtype="float64",
         handle_unknown="error",
         unknown_value=None,
+        n_jobs=None,
+        executor="thread",
     ):
         self._hyperparams = {
             "categories": categories,
             "dtype": dtype,
             "handle_unknown": handle_unknown,
             "unknown_value": unknown_value,
+            "n_jobs": n_jobs,
+            "executor": executor,
         }
 
     def transform(self, X):
+        if lale.helpers._is_pandas_df(X):
+            return self._transform_pandas(X)
         if self._transformer is None:
             self._transformer = self._build_transformer()
         return self._transformer.transform(X)
 
+    def _transform_pandas(self, X):
+        # the position of a value among the sorted categories is its code
+        assert self._monoid is not None
+        unknown_value = self._hyperparams["unknown_value"]
+        result = {}
+        for col_name, categories in zip(
+            self._monoid.feature_names_in_, self._monoid.categories_
+        ):
+            codes = pd.Index(categories).get_indexer(X[col_name])
+            column = codes.astype(self._hyperparams["dtype"])
+            column[codes < 0] = np.nan if unknown_value is None else unknown_value
+            result[col_name] = column
+        result_df = pd.DataFrame(result, index=X.index)
+        return add_table_name(result_df, get_table_name(X))
+
     @property
     def n_samples_seen_(self):
         return getattr(self._monoid, "n_samples_seen_", 0)
@@ -97,7 +121,7 @@ class _OrdinalEncoderImpl(MonoidableOperator[_OrdinalEncoderMonoid]):
                 col_name: replace(
                     it[col_name],
                     {
-                        cat_value: cat_idx
+                        cat_value: float(cat_idx)
                         for cat_idx, cat_value in enumerate(
                             self._monoid.categories_[col_idx]
                         )
@@ -136,6 +160,7 @@ _combined_schemas = {
     "$schema": "http://json-schema.org/draft-04/schema#",
     "description": """Relational algebra reimplementation of scikit-learn's `OrdinalEncoder`_ transformer that encodes categorical features as numbers.
 Works on both pandas and Spark dataframes by using `Aggregate`_ for `fit` and `Map`_ for `transform`, which in turn use the appropriate backend.
+On pandas, `transform` looks up category codes with vectorized operations.
 
 .. _`OrdinalEncoder`: https://scikit-learn.org/stable/modules/generated/sklearn.preprocessing.OrdinalEncoder.html
 .. _`Aggregate`: https://lale.readthedocs.io/en/latest/modules/lale.lib.rasl.aggregate.html
@@ -161,6 +186,8 @@ OrdinalEncoder = lale.operators.make_operator(_OrdinalEncoderImpl, _combined_sch
 OrdinalEncoder = typing.cast(
     lale.operators.PlannedIndividualOp,
     OrdinalEncoder.customize_schema(
+        n_jobs=schema_monoid_fit_n_jobs,
+        executor=schema_executor,
         encode_unknown_with=None,
         dtype={
             "enum": ["float64"],
@@ -218,6 +218,7 @@ class _ProjectImpl:
         dcol = self._drop_columns.from_monoid(pm._drop_columns)
 
         self._fit_columns = [c for c in col if c not in dcol]
+        self._monoid = pm
 
     def from_monoid(self, monoid: _ProjectMonoid):
         self._from_monoid_internal(monoid)
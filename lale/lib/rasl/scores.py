@@ -12,20 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 from typing import Any, Tuple, TypeVar
 
 import numpy as np
+import pandas as pd
 from scipy import special
 from typing_extensions import Protocol
 
 from lale.expressions import count as agg_count
 from lale.expressions import it
+from lale.expressions import min as agg_min
 from lale.expressions import sum as agg_sum
-from lale.helpers import _ensure_pandas, _is_pandas_series
+from lale.helpers import _ensure_pandas, _is_pandas_df, _is_pandas_series
 from lale.lib.dataframe import get_columns
 from lale.lib.rasl import Aggregate, ConcatFeatures, GroupBy, Map
 
 from .monoid import Monoid, MonoidFactory
+from .sketches import KLLSketch
 
 ScoreMonoid = Monoid
 
@@ -119,6 +123,14 @@ def _gen_name(base, avoid):
     return f"{base}{cpt}"
 
 
+def _concat_target(X, y):
+    if get_columns(y)[0] is None:
+        if _is_pandas_series(y):
+            y = y.rename(_gen_name("target", get_columns(X)))
+    Xy = ConcatFeatures().transform([X, y])
+    return Xy, get_columns(y)[0]
+
+
 # The following function is a rewriting of sklearn.feature_selection.f_oneway
 # Compared to the sklearn.feature_selection.f_oneway implementation it
 # takes as input the dataset and the target vector.
@@ -139,38 +151,59 @@ def _f_oneway_lift(X, y) -> FOnewayData:
     monoid: FOnewayData
         The inermediate data that can be combine for incremental computation.
     """
-    if get_columns(y)[0] is None:
-        if _is_pandas_series(y):
-            y = y.rename(_gen_name("target", get_columns(X)))
-    Xy = ConcatFeatures().transform([X, y])
-    X_by_y = GroupBy(by=[it[get_columns(y)[0]]]).transform(Xy)
-
-    agg_sum_cols = Aggregate(columns={col: agg_sum(it[col]) for col in get_columns(X)})
-    sums_samples = _ensure_pandas(agg_sum_cols.transform(X_by_y))
-    n_samples_per_class = Aggregate(
-        columns={"n_samples_per_class": agg_count(it[get_columns(X)[0]])}
-    ).transform(X_by_y)
-    n_samples = _ensure_pandas(
-        Aggregate(columns={"sum": agg_sum(it["n_samples_per_class"])}).transform(
-            n_samples_per_class
-        )
-    )["sum"][0]
-    sqr_cols = Map(columns={col: it[col] ** 2 for col in get_columns(X)})
-    ss_alldata = _ensure_pandas((sqr_cols >> agg_sum_cols).transform(X)).loc[0]
-    sums_alldata = _ensure_pandas(agg_sum_cols.transform(X)).loc[0].to_numpy()
-    n_samples_per_class = _ensure_pandas(n_samples_per_class).to_dict()[
-        "n_samples_per_class"
-    ]
-    classes = list(n_samples_per_class.keys())
-    sums_samples = {k: sums_samples.loc[k].to_numpy() for k in classes}
+    if _is_pandas_df(X) and (_is_pandas_series(y) or _is_pandas_df(y)):
+        return _f_oneway_lift_pandas(X, y)
+    # one grouped aggregation of the features and their squares, which
+    # Spark evaluates as a single job
+    Xy, y_name = _concat_target(X, y)
+    columns = get_columns(X)
+    sum_names = [_gen_name(f"sum_{i}", {y_name}) for i in range(len(columns))]
+    ss_names = [_gen_name(f"ss_{i}", {y_name}) for i in range(len(columns))]
+    count_name = _gen_name("n_samples_per_class", {y_name})
+    mapped = {y_name: it[y_name]}
+    for col, sum_name, ss_name in zip(columns, sum_names, ss_names):
+        mapped[sum_name] = it[col]
+        mapped[ss_name] = it[col] ** 2
+    aggregated = {name: agg_sum(it[name]) for name in sum_names + ss_names}
+    aggregated[count_name] = agg_count(it[sum_names[0]])
+    X_by_y = GroupBy(by=[it[y_name]]).transform(Map(columns=mapped).transform(Xy))
+    agg_data = _ensure_pandas(Aggregate(columns=aggregated).transform(X_by_y))
 
+    n_samples_per_class = agg_data[count_name].to_dict()
+    classes = list(n_samples_per_class.keys())
+    sums_samples = {k: agg_data.loc[k, sum_names].to_numpy() for k in classes}
     return FOnewayData(
         classes=classes,
         n_samples_per_class=n_samples_per_class,
-        n_samples=n_samples,
-        ss_alldata=ss_alldata,
+        n_samples=agg_data[count_name].sum(),
+        ss_alldata=agg_data[ss_names].sum().to_numpy(),
         sums_samples=sums_samples,
-        sums_alldata=sums_alldata,
+        sums_alldata=agg_data[sum_names].sum().to_numpy(),
+    )
+
+
+def _f_oneway_lift_pandas(X, y) -> FOnewayData:
+    # group the features side by side with their squares, so one grouped
+    # sum gives the per-class sums and, added up, the global sums of squares
+    values = X.to_numpy(dtype=np.float64)
+    n_features = values.shape[1]
+    grouped = pd.DataFrame(np.hstack([values, values**2])).groupby(
+        np.asarray(y).ravel()
+    )
+    per_class = grouped.sum()
+    counts = grouped.size()
+    classes = list(per_class.index)
+    per_class_values = per_class.to_numpy()
+    totals = per_class_values.sum(axis=0)
+    return FOnewayData(
+        classes=classes,
+        n_samples_per_class=counts.to_dict(),
+        n_samples=counts.sum(),
+        ss_alldata=totals[n_features:],
+        sums_samples={
+            k: per_class_values[i, :n_features] for i, k in enumerate(classes)
+        },
+        sums_alldata=totals[:n_features],
     )
 
 
@@ -228,3 +261,328 @@ class FClassif(ScoreMonoidFactory[FOnewayData]):
 
     def from_monoid(self, monoid: FOnewayData):
         return _f_oneway_lower(monoid)
+
+
+class FRegressionData(Monoid):
+    def __init__(self, *, n_samples, sums_X, ss_X, sum_y, ss_y, sums_Xy):
+        """
+        Parameters
+        ----------
+        n_samples: number
+            The total number of samples.
+        sums_X: array
+            The sum of each feature.
+        ss_X: array
+            The sum of square of each feature.
+        sum_y: number
+            The sum of the target.
+        ss_y: number
+            The sum of square of the target.
+        sums_Xy: array
+            The sum of the product of each feature with the target.
+        """
+        self.n_samples = n_samples
+        self.sums_X = sums_X
+        self.ss_X = ss_X
+        self.sum_y = sum_y
+        self.ss_y = ss_y
+        self.sums_Xy = sums_Xy
+
+    def combine(self, other: "FRegressionData"):
+        return FRegressionData(
+            n_samples=self.n_samples + other.n_samples,
+            sums_X=self.sums_X + other.sums_X,
+            ss_X=self.ss_X + other.ss_X,
+            sum_y=self.sum_y + other.sum_y,
+            ss_y=self.ss_y + other.ss_y,
+            sums_Xy=self.sums_Xy + other.sums_Xy,
+        )
+
+
+def _f_regression_lift(X, y) -> FRegressionData:
+    """Compute the sufficient statistics of univariate linear regression tests.
+
+    Parameters
+    ----------
+    X: array
+        The sample measurements.
+    y: array
+        The target vector.
+
+    Returns
+    -------
+    monoid: FRegressionData
+        The inermediate data that can be combine for incremental computation.
+    """
+    Xy, y_name = _concat_target(X, y)
+    columns = get_columns(X)
+    products = {"y": it[y_name], "yy": it[y_name] ** 2}
+    for i, col in enumerate(columns):
+        products[f"x{i}"] = it[col]
+        products[f"xx{i}"] = it[col] ** 2
+        products[f"xy{i}"] = it[col] * it[y_name]
+    sums = {name: agg_sum(it[name]) for name in products}
+    sums["n_samples"] = agg_count(it["y"])
+    agg_op = Map(columns=products) >> Aggregate(columns=sums)
+    agg_data = _ensure_pandas(agg_op.transform(Xy)).loc[0]
+    return FRegressionData(
+        n_samples=agg_data["n_samples"],
+        sums_X=np.array([agg_data[f"x{i}"] for i in range(len(columns))]),
+        ss_X=np.array([agg_data[f"xx{i}"] for i in range(len(columns))]),
+        sum_y=agg_data["y"],
+        ss_y=agg_data["yy"],
+        sums_Xy=np.array([agg_data[f"xy{i}"] for i in range(len(columns))]),
+    )
+
+
+# The following function is a rewriting of sklearn.feature_selection.f_regression
+# with `center=True`, computing the correlations from sums instead of the data.
+def _f_regression_lower(lifted: FRegressionData):
+    """Performs univariate linear regression tests.
+
+    Parameters
+    ----------
+    lifted : FRegressionData
+        The result of `to_monoid`.
+
+    Returns
+    -------
+    F-value : array
+        The computed F-value of each feature.
+    p-value : array
+        The associated p-values from the F-distribution.
+    """
+    n_samples = float(lifted.n_samples)
+    mean_X = lifted.sums_X / n_samples
+    mean_y = lifted.sum_y / n_samples
+    with np.errstate(divide="ignore", invalid="ignore"):
+        X_norms = np.sqrt(lifted.ss_X - n_samples * mean_X**2)
+        y_norm = np.sqrt(lifted.ss_y - n_samples * mean_y**2)
+        corr = (lifted.sums_Xy - n_samples * mean_X * mean_y) / X_norms / y_norm
+        deg = n_samples - 2
+        corr_squared = corr**2
+        f = corr_squared / (1 - corr_squared) * deg
+    prob = special.fdtrc(1, deg, f)
+    return np.asarray(f).ravel(), np.asarray(prob).ravel()
+
+
+class FRegression(ScoreMonoidFactory[FRegressionData]):
+    """Compute the F-value of univariate linear regression tests."""
+
+    def to_monoid(self, batch: Tuple[Any, Any]) -> FRegressionData:
+        X, y = batch
+        return _f_regression_lift(X, y)
+
+    def from_monoid(self, monoid: FRegressionData):
+        return _f_regression_lower(monoid)
+
+
+class Chi2Data(Monoid):
+    def __init__(self, *, classes, n_samples_per_class, sums_samples):
+        """
+        Parameters
+        ----------
+        classes: list
+            The list of classes.
+        n_samples_per_class: dictionary
+            The number of samples in each class.
+        sums_samples: dictionary
+            The sum of each feaure per class.
+        """
+        self.classes = classes
+        self.n_samples_per_class = n_samples_per_class
+        self.sums_samples = sums_samples
+
+    def combine(self, other: "Chi2Data"):
+        classes = list(set(self.classes + other.classes))
+        n_samples_per_class = {
+            k: self.n_samples_per_class.get(k, 0) + other.n_samples_per_class.get(k, 0)
+            for k in classes
+        }
+        sums_samples = {
+            k: self.sums_samples.get(k, 0) + other.sums_samples.get(k, 0)
+            for k in classes
+        }
+        return Chi2Data(
+            classes=classes,
+            n_samples_per_class=n_samples_per_class,
+            sums_samples=sums_samples,
+        )
+
+
+def _chi2_lift(X, y) -> Chi2Data:
+    """Compute the per-class feature sums of a chi-squared test.
+
+    Parameters
+    ----------
+    X: array
+        The sample measurements, which must be non-negative.
+    y: array
+        The target vector.
+
+    Returns
+    -------
+    monoid: Chi2Data
+        The inermediate data that can be combine for incremental computation.
+    """
+    Xy, y_name = _concat_target(X, y)
+    X_by_y = GroupBy(by=[it[y_name]]).transform(Xy)
+    columns = get_columns(X)
+    sums = {col: agg_sum(it[col]) for col in columns}
+    count_name = _gen_name("n_samples_per_class", columns)
+    sums[count_name] = agg_count(it[columns[0]])
+    min_names = [_gen_name(f"min_{col}", columns) for col in columns]
+    for min_name, col in zip(min_names, columns):
+        sums[min_name] = agg_min(it[col])
+    agg_data = _ensure_pandas(Aggregate(columns=sums).transform(X_by_y))
+    if (agg_data[min_names] < 0).to_numpy().any():
+        raise ValueError("Input X must be non-negative.")
+    n_samples_per_class = agg_data[count_name].to_dict()
+    classes = list(n_samples_per_class.keys())
+    sums_samples = {k: agg_data.loc[k, columns].to_numpy() for k in classes}
+    return Chi2Data(
+        classes=classes,
+        n_samples_per_class=n_samples_per_class,
+        sums_samples=sums_samples,
+    )
+
+
+# The following function is a rewriting of sklearn.feature_selection.chi2
+# where the observed frequencies are the per-class feature sums.
+def _chi2_lower(lifted: Chi2Data):
+    """Performs a chi-squared test.
+
+    Parameters
+    ----------
+    lifted : Chi2Data
+        The result of `to_monoid`.
+
+    Returns
+    -------
+    chi2 : array
+        The chi-squared statistic of each feature.
+    p-value : array
+        The associated p-values.
+    """
+    classes = lifted.classes
+    observed = np.array([lifted.sums_samples[k] for k in classes], dtype=np.float64)
+    counts = np.array([lifted.n_samples_per_class[k] for k in classes])
+    class_prob = counts / counts.sum()
+    feature_count = observed.sum(axis=0)
+    expected = np.outer(class_prob, feature_count)
+    with np.errstate(invalid="ignore"):
+        chisq = ((observed - expected) ** 2 / expected).sum(axis=0)
+    prob = special.chdtrc(len(classes) - 1, chisq)
+    return chisq, prob
+
+
+class Chi2(ScoreMonoidFactory[Chi2Data]):
+    """Compute chi-squared stats between each non-negative feature and class."""
+
+    def to_monoid(self, batch: Tuple[Any, Any]) -> Chi2Data:
+        X, y = batch
+        return _chi2_lift(X, y)
+
+    def from_monoid(self, monoid: Chi2Data):
+        return _chi2_lower(monoid)
+
+
+class MutualInfoData(Monoid):
+    def __init__(self, *, classes, sketches):
+        """
+        Parameters
+        ----------
+        classes: list
+            The list of classes.
+        sketches: dictionary
+            The list of quantile sketches of each feature per class.
+        """
+        self.classes = classes
+        self.sketches = sketches
+
+    def combine(self, other: "MutualInfoData"):
+        # keep the order of first appearance, since merging sketches in a
+        # different order can compact them differently
+        classes = self.classes + [c for c in other.classes if c not in self.classes]
+        sketches = {}
+        for k in classes:
+            if k not in other.sketches:
+                sketches[k] = self.sketches[k]
+            elif k not in self.sketches:
+                sketches[k] = other.sketches[k]
+            else:
+                sketches[k] = [
+                    s1.combine(s2)
+                    for s1, s2 in zip(self.sketches[k], other.sketches[k])
+                ]
+        return MutualInfoData(classes=classes, sketches=sketches)
+
+
+def _mutual_info_lift(X, y, sketch_error) -> MutualInfoData:
+    X = _ensure_pandas(X)
+    y = _ensure_pandas(y)
+    X_values = X.to_numpy(dtype=np.float64)
+    y_values = np.asarray(y).ravel()
+    k = KLLSketch.k_for_error(sketch_error)
+    classes = list(pd.unique(y_values))
+    sketches = {}
+    for c in classes:
+        X_c = X_values[y_values == c]
+        sketches[c] = [KLLSketch.from_values(col[~np.isnan(col)], k) for col in X_c.T]
+    return MutualInfoData(classes=classes, sketches=sketches)
+
+
+def _mutual_info_lower(lifted: MutualInfoData, n_bins):
+    classes = lifted.classes
+    n_features = len(lifted.sketches[classes[0]])
+    scores = np.zeros(n_features)
+    for j in range(n_features):
+        class_sketches = [lifted.sketches[c][j] for c in classes]
+        merged = functools.reduce(lambda s1, s2: s1.combine(s2), class_sketches)
+        if merged.n == 0:
+            scores[j] = np.nan
+            continue
+        qs = np.linspace(0, 1, n_bins + 1)[1:-1]
+        edges = np.unique([merged.quantile(q) for q in qs])
+        counts = np.array(
+            [
+                np.diff(np.concatenate([[0], s.rank(edges), [s.n]]))
+                for s in class_sketches
+            ],
+            dtype=np.float64,
+        )
+        joint = counts / counts.sum()
+        outer = np.outer(joint.sum(axis=1), joint.sum(axis=0))
+        nonzero = joint > 0
+        scores[j] = max(
+            0.0, np.sum(joint[nonzero] * np.log(joint[nonzero] / outer[nonzero]))
+        )
+    return scores, None
+
+
+class MutualInfoClassif(ScoreMonoidFactory[MutualInfoData]):
+    """Estimate the mutual information between each feature and class.
+
+    Unlike sklearn's nearest-neighbor estimator, this discretizes each
+    feature into `n_bins` quantile bins, using one mergeable quantile sketch
+    per feature and class.  There are no p-values.  The sketches need the
+    raw values, so Spark batches get converted to pandas first.
+
+    Parameters
+    ----------
+    n_bins: int
+        The number of quantile bins per feature.
+    sketch_error: float
+        The normalized rank error of the quantile sketches.
+    """
+
+    def __init__(self, n_bins=16, sketch_error=0.01):
+        self.n_bins = n_bins
+        self.sketch_error = sketch_error
+
+    def to_monoid(self, batch: Tuple[Any, Any]) -> MutualInfoData:
+        X, y = batch
+        return _mutual_info_lift(X, y, self.sketch_error)
+
+    def from_monoid(self, monoid: MutualInfoData):
+        return _mutual_info_lower(monoid, self.n_bins)
@@ -11,6 +11,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import typing
 from typing import Any, Tuple
 
 import numpy as np
@@ -18,6 +19,7 @@ import numpy as np
 import lale.docstrings
 import lale.operators
 from lale.expressions import it
+from lale.lib._common_schemas import schema_executor, schema_monoid_fit_n_jobs
 from lale.lib.dataframe import count, get_columns
 from lale.lib.rasl import Map
 from lale.lib.sklearn import select_k_best
@@ -45,10 +47,20 @@ class _SelectKBestMonoid(Monoid):
 
 
 class _SelectKBestImpl(MonoidableOperator[_SelectKBestMonoid]):
-    def __init__(self, monoidable_score_func=FClassif, score_func=None, *, k=10):
+    def __init__(
+        self,
+        monoidable_score_func=FClassif,
+        score_func=None,
+        *,
+        k=10,
+        n_jobs=None,
+        executor="thread"
+    ):
         self._hyperparams = {
             "score_func": monoidable_score_func(),
             "k": k,
+            "n_jobs": n_jobs,
+            "executor": executor,
         }
 
     def transform(self, X):
@@ -97,7 +109,8 @@ class _SelectKBestImpl(MonoidableOperator[_SelectKBestMonoid]):
 
 _combined_schemas = {
     "$schema": "http://json-schema.org/draft-04/schema#",
-    "description": "Relational algebra implementation of SelectKBest.",
+    "description": """Relational algebra implementation of SelectKBest.
+The score comes from `monoidable_score_func`, one of `FClassif`, `FRegression`, `Chi2`, or `MutualInfoClassif` from `lale.lib.rasl.scores`, so fitting works in batches.""",
     "documentation_url": "https://lale.readthedocs.io/en/latest/modules/lale.lib.rasl.select_k_best.html",
     "type": "object",
     "tags": {
@@ -116,4 +129,17 @@ _combined_schemas = {
 SelectKBest: lale.operators.PlannedIndividualOp
 SelectKBest = lale.operators.make_operator(_SelectKBestImpl, _combined_schemas)
 
+SelectKBest = typing.cast(
+    lale.operators.PlannedIndividualOp,
+    SelectKBest.customize_schema(
+        n_jobs=schema_monoid_fit_n_jobs,
+        executor=schema_executor,
+        monoidable_score_func={
+            "laleType": "Any",
+            "default": FClassif,
+            "description": "Class of a score monoid factory from `lale.lib.rasl.scores`, such as `FClassif`, `FRegression`, `Chi2`, or `MutualInfoClassif`.",
+        },
+    ),
+)
+
 lale.docstrings.set_docstrings(SelectKBest)
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 import numbers
 import typing
 from typing import Any, Tuple
@@ -24,13 +25,15 @@ import lale.operators
 from lale.expressions import sum  # pylint:disable=redefined-builtin
 from lale.expressions import count, it, median, mode, replace
 from lale.helpers import _is_df, _is_pandas_df, _is_spark_df
+from lale.lib._common_schemas import schema_executor, schema_monoid_fit_n_jobs
 from lale.lib.dataframe import get_columns
 from lale.lib.sklearn import simple_imputer
-from lale.schemas import Enum
+from lale.schemas import Enum, Float
 
 from .aggregate import Aggregate
 from .map import Map
 from .monoid import Monoid, MonoidableOperator
+from .sketches import KLLSketch, MisraGriesSketch
 
 
 def _is_numeric_df(X):
@@ -64,6 +67,28 @@ def _is_string_df(X):
         return False
 
 
+def _sketch_columns(X: pd.DataFrame, strategy, missing_values, error) -> list:
+    sketches: list = []
+    for col_idx in range(X.shape[1]):
+        column = X.iloc[:, col_idx]
+        if isinstance(missing_values, float) and np.isnan(missing_values):
+            values = column[column.notna()]
+        else:
+            values = column[column != missing_values]
+        if strategy == "median":
+            k = KLLSketch.k_for_error(error)
+            sketches.append(KLLSketch.from_values(values.to_numpy(), k))
+        else:
+            capacity = MisraGriesSketch.capacity_for_error(error)
+            sketches.append(MisraGriesSketch.from_values(values, capacity))
+    return sketches
+
+
+def _sketch_partition(columns, strategy, missing_values, error, rows):
+    X = pd.DataFrame.from_records([tuple(row) for row in rows], columns=columns)
+    yield _sketch_columns(X, strategy, missing_values, error)
+
+
 class _SimpleImputerMonoid(Monoid):
     def __init__(self, *, feature_names_in_, lifted_statistics, strategy):
         self.feature_names_in_ = feature_names_in_
@@ -84,9 +109,11 @@ class _SimpleImputerMonoid(Monoid):
                 self.lifted_statistics["count"] + other.lifted_statistics["count"]
             )
         else:
-            raise ValueError(
-                "_combine is only supported for imputation strategy `mean` and `constant`."
-            )
+            assert len(self.lifted_statistics) == len(other.lifted_statistics)
+            combined_statistic = [
+                a.combine(b)
+                for a, b in zip(self.lifted_statistics, other.lifted_statistics)
+            ]
         return _SimpleImputerMonoid(
             feature_names_in_=self.feature_names_in_,
             lifted_statistics=combined_statistic,
@@ -103,6 +130,9 @@ class _SimpleImputerImpl(MonoidableOperator[_SimpleImputerMonoid]):
         verbose=0,
         copy=True,
         add_indicator=False,
+        sketch_error=0.01,
+        n_jobs=None,
+        executor="thread",
     ):
         self._hyperparams = {}
         self._hyperparams["missing_values"] = missing_values
@@ -115,6 +145,9 @@ class _SimpleImputerImpl(MonoidableOperator[_SimpleImputerMonoid]):
         if add_indicator:
             raise ValueError("This implementation only supports `add_indicator=False`.")
         self._hyperparams["add_indicator"] = add_indicator
+        self._hyperparams["sketch_error"] = sketch_error
+        self._hyperparams["n_jobs"] = n_jobs
+        self._hyperparams["executor"] = executor
         # the `indicator_`` property is always None as we do not support `add_indicator=True`
         self.indicator_ = None
 
@@ -148,9 +181,7 @@ class _SimpleImputerImpl(MonoidableOperator[_SimpleImputerMonoid]):
             lifted_statistics["sum"] = agg_sum
             lifted_statistics["count"] = agg_count
         else:
-            raise ValueError(
-                "SimpleImputer can create a Monoind only for imputation strategy `mean` and `constant`."
-            )
+            lifted_statistics = self._lift_sketches(X)
         return _SimpleImputerMonoid(
             feature_names_in_=feature_names_in_,
             lifted_statistics=lifted_statistics,
@@ -169,8 +200,33 @@ class _SimpleImputerImpl(MonoidableOperator[_SimpleImputerMonoid]):
             self.statistics_ = (
                 _lifted_statistics["sum"] / _lifted_statistics["count"]
             ).to_numpy()[0]
+        elif strategy == "median":
+            self.statistics_ = np.array([s.quantile(0.5) for s in _lifted_statistics])
+        elif strategy == "most_frequent":
+            statistics = [s.most_frequent() for s in _lifted_statistics]
+            if all(isinstance(v, numbers.Real) for v in statistics):
+                self.statistics_ = np.array(statistics, dtype=np.float64)
+            else:
+                self.statistics_ = np.array(statistics, dtype=object)
         self._transformer = None
 
+    def _lift_sketches(self, X):
+        hyperparams = self._hyperparams
+        strategy = hyperparams["strategy"]
+        missing_values = hyperparams["missing_values"]
+        error = hyperparams["sketch_error"]
+        if _is_spark_df(X):
+            # sketch each partition on the executors and merge the results
+            columns = get_columns(X)
+            sketch_partition = functools.partial(
+                _sketch_partition, columns, strategy, missing_values, error
+            )
+            partials = X.select(*columns).rdd.mapPartitions(sketch_partition)
+            return partials.reduce(
+                lambda a, b: [s1.combine(s2) for s1, s2 in zip(a, b)]
+            )
+        return _sketch_columns(X, strategy, missing_values, error)
+
     def fit(self, X, y=None):
 
         self._validate_input(X)
@@ -178,10 +234,14 @@ class _SimpleImputerImpl(MonoidableOperator[_SimpleImputerMonoid]):
         agg_op = None
         agg_data = None
         # learn the values to be imputed
-        if self._hyperparams["strategy"] in ["mean", "constant"]:
-            lifted = self.to_monoid((X, y))
-            self.from_monoid(lifted)
-            return self
+        # median and most_frequent are exact here unless fit in parallel,
+        # which combines approximate sketches
+        n_jobs = self._hyperparams["n_jobs"]
+        if self._hyperparams["strategy"] in ["mean", "constant"] or n_jobs not in [
+            None,
+            1,
+        ]:
+            return MonoidableOperator.fit(self, X, y)
         elif self._hyperparams["strategy"] == "median":
             agg_op = Aggregate(
                 columns={c: median(it[c]) for c in get_columns(X)},
@@ -281,6 +341,7 @@ _combined_schemas = {
     "$schema": "http://json-schema.org/draft-04/schema#",
     "description": """Relational algebra reimplementation of scikit-learn's `SimpleImputer`_.
 Works on both pandas and Spark dataframes by using `Aggregate`_ for `fit` and `Map`_ for `transform`, which in turn use the appropriate backend.
+For batched, partial, or parallel fit, the `median` strategy uses a KLL quantile sketch and the `most_frequent` strategy uses a Misra-Gries heavy-hitters sketch, so memory stays bounded and the statistics are approximate within `sketch_error`.
 
 .. _`SimpleImputer`: https://scikit-learn.org/stable/modules/generated/sklearn.imputer.SimpleImputer.html
 .. _`Aggregate`: https://lale.readthedocs.io/en/latest/modules/lale.lib.rasl.aggregate.html
@@ -306,6 +367,8 @@ SimpleImputer = lale.operators.make_operator(_SimpleImputerImpl, _combined_schem
 SimpleImputer = typing.cast(
     lale.operators.PlannedIndividualOp,
     SimpleImputer.customize_schema(
+        n_jobs=schema_monoid_fit_n_jobs,
+        executor=schema_executor,
         copy=Enum(
             values=[True],
             desc="`copy=True` is the only value currently supported by this implementation",
@@ -316,6 +379,14 @@ SimpleImputer = typing.cast(
             desc="`add_indicator=False` is the only value currently supported by this implementation",
             default=False,
         ),
+        sketch_error=Float(
+            desc="Approximation error of the sketches used for the `median` and `most_frequent` strategies when fitting in batches: the normalized rank error of the median, or the count error of the most frequent value as a fraction of the number of samples.",
+            default=0.01,
+            forOptimizer=False,
+            minimum=0.0,
+            exclusiveMinimum=True,
+            maximum=1.0,
+        ),
     ),
 )
 
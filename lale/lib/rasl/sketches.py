@@ -0,0 +1,170 @@
+# Copyright 2022 IBM Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Mergeable sketches with bounded memory for approximate statistics."""
+
+import math
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .monoid import Monoid
+
+
+class KLLSketch(Monoid):
+    """
+    Quantile sketch after Karnin, Lang, and Liberty (FOCS 2016).
+
+    Keeps a hierarchy of compactors, where an item at level `h` stands for
+    `2**h` input items.  When the sketch exceeds its capacity, the lowest
+    full compactor gets sorted and every other item is promoted to the next
+    level.  Offsets alternate per level instead of being random, so results
+    are reproducible.  The normalized rank error is about `2 / k`, and the
+    sketch is exact while it holds at most `k` items.
+    """
+
+    _CAPACITY_DECAY = 2.0 / 3.0
+
+    def __init__(self, k: int, levels: Optional[List[np.ndarray]] = None):
+        self.k = k
+        self.levels = [np.empty(0)] if levels is None else levels
+        self.offsets = np.zeros(len(self.levels), dtype=np.int8)
+
+    @classmethod
+    def from_values(cls, values, k: int) -> "KLLSketch":
+        result = cls(k, [np.asarray(values, dtype=np.float64)])
+        result._compress()
+        return result
+
+    @staticmethod
+    def k_for_error(error: float) -> int:
+        return max(8, math.ceil(2.0 / error))
+
+    @property
+    def n(self) -> int:
+        return int(sum(len(level) << h for h, level in enumerate(self.levels)))
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, math.ceil(self.k * self._CAPACITY_DECAY**depth))
+
+    def _compress(self) -> None:
+        while sum(len(level) for level in self.levels) > sum(
+            self._capacity(h) for h in range(len(self.levels))
+        ):
+            h = next(
+                h
+                for h, level in enumerate(self.levels)
+                if len(level) > self._capacity(h)
+            )
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+                self.offsets = np.append(self.offsets, np.int8(0))
+            level = np.sort(self.levels[h])
+            kept, level = level[: len(level) % 2], level[len(level) % 2 :]
+            self.levels[h + 1] = np.concatenate(
+                [self.levels[h + 1], level[self.offsets[h] :: 2]]
+            )
+            self.levels[h] = kept
+            self.offsets[h] ^= 1
+
+    def combine(self, other: "KLLSketch") -> "KLLSketch":
+        assert self.k == other.k
+        n_levels = max(len(self.levels), len(other.levels))
+        levels = [
+            np.concatenate(
+                [
+                    self.levels[h] if h < len(self.levels) else np.empty(0),
+                    other.levels[h] if h < len(other.levels) else np.empty(0),
+                ]
+            )
+            for h in range(n_levels)
+        ]
+        result = KLLSketch(self.k, levels)
+        result.offsets[: len(self.offsets)] = self.offsets
+        result._compress()
+        return result
+
+    def _sorted_items(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level), 1 << h) for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q: float) -> float:
+        if len(self.levels) == 1:  # nothing compacted yet, so exact
+            return float(np.quantile(self.levels[0], q)) if self.n > 0 else np.nan
+        values, cumulative = self._sorted_items()
+        idx = np.searchsorted(cumulative, q * cumulative[-1])
+        return float(values[min(idx, len(values) - 1)])
+
+    def rank(self, values) -> np.ndarray:
+        """Approximate number of items less than or equal to each of `values`."""
+        items, cumulative = self._sorted_items()
+        cumulative = np.concatenate([[0], cumulative])
+        return cumulative[np.searchsorted(items, values, side="right")]
+
+
+class MisraGriesSketch(Monoid):
+    """
+    Heavy-hitters sketch after Misra and Gries (1982), in the mergeable
+    form of Agarwal et al. (PODS 2012).
+
+    Keeps at most `capacity` counters.  When a merge exceeds that, all
+    counts get decremented by the count of the first counter that does not
+    fit, and counters that drop to zero get evicted.  Each count
+    underestimates the true frequency by at most `n / (capacity + 1)`, and
+    the sketch is exact while there are at most `capacity` distinct values.
+    """
+
+    def __init__(self, capacity: int, values: np.ndarray, counts: np.ndarray):
+        self.capacity = capacity
+        self.values = values
+        self.counts = counts
+
+    @classmethod
+    def from_values(cls, values, capacity: int) -> "MisraGriesSketch":
+        value_counts = pd.Series(values).value_counts(sort=False)
+        return cls._from_counts(value_counts, capacity)
+
+    @classmethod
+    def _from_counts(cls, counts: pd.Series, capacity: int) -> "MisraGriesSketch":
+        if len(counts) > capacity:
+            threshold = counts.nlargest(capacity + 1).iloc[-1]
+            counts = counts[counts > threshold] - threshold
+        return cls(capacity, counts.index.to_numpy(), counts.to_numpy(np.int64))
+
+    @staticmethod
+    def capacity_for_error(error: float) -> int:
+        return max(1, math.ceil(1.0 / error))
+
+    def combine(self, other: "MisraGriesSketch") -> "MisraGriesSketch":
+        assert self.capacity == other.capacity
+        counts = pd.concat(
+            [
+                pd.Series(self.counts, index=self.values, dtype=np.int64),
+                pd.Series(other.counts, index=other.values, dtype=np.int64),
+            ]
+        )
+        counts = counts.groupby(level=0, sort=False).sum()
+        return MisraGriesSketch._from_counts(counts, self.capacity)
+
+    def most_frequent(self) -> Any:
+        if len(self.counts) == 0:
+            return np.nan
+        tied = self.values[self.counts == self.counts.max()]
+        return min(tied)  # like sklearn, break ties by the smallest value
@@ -22,6 +22,7 @@ import lale.helpers
 import lale.operators
 from lale.expressions import it
 from lale.expressions import sum as agg_sum
+from lale.lib._common_schemas import schema_executor, schema_monoid_fit_n_jobs
 from lale.lib.dataframe import count, get_columns
 from lale.lib.sklearn import standard_scaler
 
@@ -64,8 +65,22 @@ class _StandardScalerMonoid(Monoid):
 
 
 class _StandardScalerImpl(MonoidableOperator[_StandardScalerMonoid]):
-    def __init__(self, *, copy=True, with_mean=True, with_std=True):
-        self._hyperparams = {"copy": copy, "with_mean": with_mean, "with_std": with_std}
+    def __init__(
+        self,
+        *,
+        copy=True,
+        with_mean=True,
+        with_std=True,
+        n_jobs=None,
+        executor="thread"
+    ):
+        self._hyperparams = {
+            "copy": copy,
+            "with_mean": with_mean,
+            "with_std": with_std,
+            "n_jobs": n_jobs,
+            "executor": executor,
+        }
         self.with_mean = with_mean
 
     def transform(self, X, copy=None):
@@ -176,6 +191,8 @@ StandardScaler = lale.operators.make_operator(_StandardScalerImpl, _combined_sch
 StandardScaler = typing.cast(
     lale.operators.PlannedIndividualOp,
     StandardScaler.customize_schema(
+        n_jobs=schema_monoid_fit_n_jobs,
+        executor=schema_executor,
         copy={
             "enum": [True],
             "description": "This implementation only supports `copy=True`.",
@@ -12,20 +12,30 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import concurrent.futures
+import copy
 import enum
 import functools
+import heapq
 import itertools
+import json
 import logging
+import os
 import pathlib
+import pickle  # nosec
 import sys
 import tempfile
+import threading
 import time
 from abc import ABC, abstractmethod
 from typing import (
     Any,
     Callable,
+    Deque,
     Dict,
     Iterable,
+    Iterator,
     List,
     Optional,
     Set,
@@ -38,6 +48,7 @@ from typing import (
 import graphviz
 import numpy as np
 import pandas as pd
+import scipy.sparse
 import sklearn.model_selection
 import sklearn.tree
 
@@ -45,6 +56,11 @@ import lale.helpers
 import lale.json_operator
 import lale.pretty_print
 from lale.datasets import pandas2spark
+from lale.datasets.data_schemas import (
+    SparkDataFrameWithIndex,
+    add_table_name,
+    get_table_name,
+)
 from lale.operators import (
     TrainableIndividualOp,
     TrainablePipeline,
@@ -52,18 +68,38 @@ from lale.operators import (
     TrainedPipeline,
 )
 
+from ._executors import _create_executor, _n_workers
 from .metrics import MetricMonoid, MetricMonoidFactory
 from .monoid import Monoid, MonoidFactory
 
 if lale.helpers.spark_installed:
+    from pyspark.sql import Window
     from pyspark.sql.dataframe import DataFrame as SparkDataFrame
+    from pyspark.sql.functions import col
+    from pyspark.sql.functions import count as spark_count
+    from pyspark.sql.functions import create_map, lit
+    from pyspark.sql.functions import min as spark_min
+    from pyspark.sql.functions import (
+        monotonically_increasing_id,
+        row_number,
+        spark_partition_id,
+        when,
+    )
+
+try:
+    import pyarrow
+    import pyarrow.feather
+
+    pyarrow_installed = True
+except ImportError:
+    pyarrow_installed = False
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
 _BatchStatus = enum.Enum("BatchStatus", "RESIDENT SPILLED")
 
-_TaskStatus = enum.Enum("_TaskStatus", "FRESH READY WAITING DONE")
+_TaskStatus = enum.Enum("_TaskStatus", "FRESH RUNNING READY WAITING DONE")
 
 _Operation = enum.Enum(
     "_Operation", "SCAN SPLIT TRANSFORM PREDICT FIT PARTIAL_FIT TO_MONOID COMBINE"
@@ -104,57 +140,230 @@ def _get_idx(batch_id: str) -> int:
     return _ALL_BATCHES if batch_id[1] == "*" else int(batch_id[1:])
 
 
+class SpillFormat(ABC):
+    """Abstract base class for how task graphs store batches on disk
+    when they do not fit in `max_resident`."""
+
+    @abstractmethod
+    def write(self, data: Any, stem: pathlib.Path) -> pathlib.Path:
+        """Write data to a file named stem plus a suffix and return its path."""
+        pass
+
+    @abstractmethod
+    def read(self, path: pathlib.Path) -> Any:
+        """Read data back from a path returned by `write`."""
+        pass
+
+
+_NPZ_FORMATS = ["csr", "csc", "coo", "bsr", "dia"]  # supported by save_npz
+
+
+def _write_other(data: Any, stem: pathlib.Path) -> pathlib.Path:
+    """Write sparse matrices with `save_npz` and pickle lists and tuples,
+    such as the inputs of steps with several predecessors."""
+    if scipy.sparse.issparse(data) and data.format in _NPZ_FORMATS:
+        path = stem.with_suffix(".npz")
+        scipy.sparse.save_npz(path, data, compressed=False)
+    elif scipy.sparse.issparse(data) or isinstance(data, (list, tuple)):
+        path = stem.with_suffix(".pkl")
+        pd.to_pickle(data, path)
+    else:
+        raise ValueError(
+            f"""Spilling of {type(data)} is not supported.
+        Supported types are: pandas DataFrame, pandas Series, numpy ndarray, scipy sparse matrix, list, and tuple."""
+        )
+    return path
+
+
+class SpillPickle(SpillFormat):
+    """Pickle pandas data and save numpy arrays with `np.save` and sparse
+    matrices with `scipy.sparse.save_npz`."""
+
+    def write(self, data: Any, stem: pathlib.Path) -> pathlib.Path:
+        if isinstance(data, (pd.DataFrame, pd.Series)):
+            path = stem.with_suffix(".pkl")
+            data.to_pickle(path)
+        elif isinstance(data, np.ndarray):
+            path = stem.with_suffix(".npy")
+            np.save(path, data, allow_pickle=True)
+        else:
+            path = _write_other(data, stem)
+        return path
+
+    def read(self, path: pathlib.Path) -> Any:
+        if path.suffix == ".npy":
+            return np.load(path, allow_pickle=True)
+        if path.suffix == ".npz":
+            return scipy.sparse.load_npz(path)
+        return pd.read_pickle(path)
+
+
+class SpillArrow(SpillFormat):
+    """Store pandas data in the Arrow IPC (Feather) format and numpy arrays
+    as raw `.npy` files, and memory-map both when reading them back.
+
+    This is mainly faster than `SpillPickle` for data with string or
+    categorical columns; purely numeric DataFrames pickle about as fast.
+    Data that Arrow cannot represent, such as columns of mixed types or
+    arrays of Python objects, falls back to pickle.
+
+    Parameters
+    ----------
+    compression : None, "lz4", or "zstd", default None
+        Compression of Arrow files. Arrays are never compressed, because
+        compressed files cannot be memory-mapped.
+    memory_map : bool, default True
+        Whether to memory-map files when reading, which avoids an extra
+        in-memory copy of the file contents. Arrays are mapped
+        copy-on-write, so they remain writable without changing the file."""
+
+    def __init__(self, compression: Optional[str] = None, memory_map: bool = True):
+        assert pyarrow_installed, """Your Python environment does not have pyarrow installed. You can install it with
+    pip install pyarrow"""
+        if compression not in [None, "lz4", "zstd"]:
+            raise ValueError(
+                f"expected compression in [None, 'lz4', 'zstd'], got {compression}"
+            )
+        self.compression = compression
+        self.memory_map = memory_map
+
+    def write(self, data: Any, stem: pathlib.Path) -> pathlib.Path:
+        if isinstance(data, (pd.DataFrame, pd.Series)):
+            try:
+                table = _pandas_to_arrow(data)
+            except (pyarrow.ArrowException, TypeError, ValueError):
+                path = stem.with_suffix(".pkl")
+                data.to_pickle(path)
+                return path
+            path = stem.with_suffix(".feather")
+            compression = (
+                "uncompressed" if self.compression is None else self.compression
+            )
+            pyarrow.feather.write_feather(table, path, compression=compression)
+        elif isinstance(data, np.ndarray) and not data.dtype.hasobject:
+            path = stem.with_suffix(".npy")
+            np.save(path, data, allow_pickle=False)
+        elif isinstance(data, np.ndarray):
+            path = stem.with_suffix(".pkl")
+            pd.to_pickle(data, path)
+        else:
+            path = _write_other(data, stem)
+        return path
+
+    def read(self, path: pathlib.Path) -> Any:
+        if path.suffix == ".feather":
+            table = pyarrow.feather.read_table(path, memory_map=self.memory_map)
+            return _arrow_to_pandas(table)
+        if path.suffix == ".npy":
+            data = np.load(path, mmap_mode="c" if self.memory_map else None)
+            return np.asarray(data)  # view as plain ndarray, not np.memmap
+        if path.suffix == ".npz":
+            return scipy.sparse.load_npz(path)
+        return pd.read_pickle(path)
+
+
+_ARROW_SERIES_NAME = b"lale_series_name"  # schema metadata marking a pd.Series
+
+
+def _pandas_to_arrow(data: Union[pd.DataFrame, pd.Series]) -> "pyarrow.Table":
+    if isinstance(data, pd.DataFrame):
+        return pyarrow.Table.from_pandas(data)
+    if data.name is not None and not isinstance(data.name, (str, int, float)):
+        raise TypeError(f"cannot store series name {data.name!r} in Arrow metadata")
+    name = json.dumps(data.name).encode()  # raises TypeError for numpy scalars
+    table = pyarrow.Table.from_pandas(data.to_frame(name="series"))
+    metadata = {**(table.schema.metadata or {}), _ARROW_SERIES_NAME: name}
+    return table.replace_schema_metadata(metadata)
+
+
+def _arrow_to_pandas(table: "pyarrow.Table") -> Union[pd.DataFrame, pd.Series]:
+    result = table.to_pandas()
+    metadata = table.schema.metadata or {}
+    if _ARROW_SERIES_NAME in metadata:
+        result = result["series"]
+        result.name = json.loads(metadata[_ARROW_SERIES_NAME])
+    return result
+
+
+_space_estimators: Dict[type, Callable[[Any], int]] = {}
+
+
+def register_space_estimator(data_type: type, estimator: Callable[[Any], int]) -> None:
+    """Register a function that returns the number of bytes that data of the
+    given type (or a subclass) occupies in memory, which task graphs use to
+    keep batches within `max_resident`."""
+    _space_estimators[data_type] = estimator
+
+
+def _object_space(values: np.ndarray) -> int:
+    # sys.getsizeof on a sample, since Python objects can vary in size
+    n_values = values.size
+    if n_values == 0:
+        return 0
+    sample = values.ravel()[:: max(1, n_values // 1000)]
+    return int(n_values * sum(sys.getsizeof(v) for v in sample) / len(sample))
+
+
+def _estimate_space(data: Any) -> int:
+    for cls in type(data).__mro__:
+        if cls in _space_estimators:
+            return int(_space_estimators[cls](data))
+    if data is None:
+        result = 0
+    elif isinstance(data, pd.DataFrame):
+        deep = any(dtype == object for dtype in data.dtypes)
+        result = int(data.memory_usage(deep=deep).sum())
+    elif isinstance(data, pd.Series):
+        result = int(data.memory_usage(deep=data.dtype == object))
+    elif isinstance(data, np.ndarray):
+        result = data.nbytes
+        if data.dtype == object:
+            result += _object_space(data)
+    elif scipy.sparse.issparse(data):
+        arrays = ["data", "indices", "indptr", "row", "col", "offsets"]
+        result = sum(
+            getattr(data, a).nbytes
+            for a in arrays
+            if isinstance(getattr(data, a, None), np.ndarray)
+        )
+    elif isinstance(data, (list, tuple)):
+        result = sum(_estimate_space(d) for d in data)
+    elif lale.helpers.spark_installed and isinstance(data, SparkDataFrame):
+        result = 1  # place-holder value, the data lives in Spark
+    else:
+        result = sys.getsizeof(data)
+    return result
+
+
 class _Batch:
     def __init__(self, X, y, task: Optional["_ApplyTask"]):
         self.X = X
         self.y = y
         self.task = task
-        if isinstance(X, pd.DataFrame) and isinstance(y, pd.Series):
-            space_X = int(cast(pd.DataFrame, X).memory_usage().sum())
-            space_y = cast(pd.Series, y).memory_usage()
-            self.space = space_X + space_y
-        else:
-            self.space = 1  # place-holder value for Spark
-
-    def spill(self, spill_dir: pathlib.Path) -> None:
-        name_X = spill_dir / f"X_{self}.pkl"
-        name_y = spill_dir / f"y_{self}.pkl"
-        if isinstance(self.X, pd.DataFrame):
-            cast(pd.DataFrame, self.X).to_pickle(name_X)
-        elif isinstance(self.X, np.ndarray):
-            np.save(name_X, self.X, allow_pickle=True)
-        else:
-            raise ValueError(
-                f"""Spilling of {type(self.X)} is not supported.
-            Supported types are: pandas DataFrame, numpy ndarray."""
-            )
-        if isinstance(self.y, pd.Series):
-            cast(pd.Series, self.y).to_pickle(name_y)
-        elif isinstance(self.y, np.ndarray):
-            np.save(name_y, self.y, allow_pickle=True)
-        else:
-            raise ValueError(
-                f"""Spilling of {type(self.y)} is not supported.
-            Supported types are: pandas DataFrame, pandas Series, and numpy ndarray."""
-            )
-        self.X, self.y = name_X, name_y
-
-    def load_spilled(self) -> None:
-        assert isinstance(self.X, pathlib.Path) and isinstance(self.y, pathlib.Path)
-        try:
-            data_X = pd.read_pickle(self.X)
-        except FileNotFoundError:
-            data_X = np.load(f"{self.X}" + ".npy", allow_pickle=True)
-        try:
-            data_y = pd.read_pickle(self.y)
-        except FileNotFoundError:
-            data_y = np.load(f"{self.y}" + ".npy", allow_pickle=True)
-        self.X, self.y = data_X, data_y
-
-    def delete_if_spilled(self) -> None:
-        if isinstance(self.X, pathlib.Path) and isinstance(self.y, pathlib.Path):
-            self.X.unlink()
-            self.y.unlink()
+        self.space = max(1, _estimate_space(X) + _estimate_space(y))
+        self.spilled_paths: Optional[Tuple[pathlib.Path, Optional[pathlib.Path]]] = None
+
+    def spill(self, spill_dir: pathlib.Path, spill_format: SpillFormat) -> None:
+        # batches are not modified after creation, so files from an
+        # earlier spill of the same batch can be reused
+        if self.spilled_paths is None:
+            path_X = spill_format.write(self.X, spill_dir / f"X_{self}")
+            path_y = None  # unlabeled batches, e.g. in predict_with_batches
+            if self.y is not None:
+                path_y = spill_format.write(self.y, spill_dir / f"y_{self}")
+            self.spilled_paths = path_X, path_y
+        self.X, self.y = self.spilled_paths
+
+    def load_spilled(self, spill_format: SpillFormat) -> None:
+        assert isinstance(self.X, pathlib.Path)
+        self.X, self.y = _read_spilled(spill_format, self.X, self.y)
+
+    def delete_spilled(self) -> None:
+        if self.spilled_paths is not None:
+            for path in self.spilled_paths:
+                if path is not None:
+                    path.unlink()
+            self.spilled_paths = None
 
     def __str__(self) -> str:
         assert self.task is not None
@@ -169,7 +378,7 @@ class _Batch:
 
     @property
     def status(self) -> _BatchStatus:
-        if isinstance(self.X, pathlib.Path) and isinstance(self.y, pathlib.Path):
+        if isinstance(self.X, pathlib.Path):
             return _BatchStatus.SPILLED
         return _BatchStatus.RESIDENT
 
@@ -192,6 +401,10 @@ class _Task:
         self.preds = []
         self.succs = []
         self.deletable_output = True
+        self.pred_set: Set[_Task] = set()  # for fast membership tests
+        self.unfinished_preds = 0  # number of preds whose status is not DONE
+        self.unfinished_succs = 0  # number of succs whose status is not DONE
+        self.n_batches_expanded = 0  # up_to of last expand_new_batches call
 
     @abstractmethod
     def get_operation(
@@ -200,15 +413,29 @@ class _Task:
         pass
 
     def add_pred(self, pred):
-        if pred not in self.preds:
+        if pred not in self.pred_set:
             self.preds.append(pred)
+            self.pred_set.add(pred)
             pred.succs.append(self)
+            if pred.status is not _TaskStatus.DONE:
+                self.unfinished_preds += 1
+            if self.status is not _TaskStatus.DONE:
+                pred.unfinished_succs += 1
+
+    def remove_pred(self, pred):
+        self.preds.remove(pred)
+        self.pred_set.remove(pred)
+        pred.succs.remove(self)
+        if pred.status is not _TaskStatus.DONE:
+            self.unfinished_preds -= 1
+        if self.status is not _TaskStatus.DONE:
+            pred.unfinished_succs -= 1
 
     def has_all_batches(self) -> bool:
         return any(b[1] == "*" for b in self.batch_ids)
 
     def can_be_ready(self, end_of_scanned_batches) -> bool:
-        if any(p.status is not _TaskStatus.DONE for p in self.preds):
+        if self.unfinished_preds > 0:
             return False
         if end_of_scanned_batches:
             return True
@@ -230,6 +457,25 @@ class _Task:
             result = self.batch_ids
         return result
 
+    def expand_new_batches(self, up_to) -> Tuple[str, ...]:
+        """Like expand_batches, but skip batches returned by earlier calls,
+        so re-chaining a task with all batches after each scan is cheap."""
+        if not self.has_all_batches():
+            return self.batch_ids
+        start = self.n_batches_expanded
+        result = tuple(
+            itertools.chain.from_iterable(
+                (
+                    (_batch_id(_get_fold(b), i) for i in range(start, up_to))
+                    if b[1] == "*"
+                    else [b]
+                )
+                for b in self.batch_ids
+            )
+        )
+        self.n_batches_expanded = max(start, up_to)
+        return result
+
     def memo_key(self) -> _MemoKey:
         return type(self), self.step_id, self.batch_ids, self.held_out
 
@@ -237,11 +483,13 @@ class _Task:
 class _TrainTask(_Task):
     monoid: Optional[Monoid]
     trained: Optional[TrainedIndividualOp]
+    prior_monoid: Optional[Monoid]
 
     def __init__(self, step_id: int, batch_ids: Tuple[str, ...], held_out: str):
         super().__init__(step_id, batch_ids, held_out)
         self.monoid = None
         self.trained = None
+        self.prior_monoid = None  # from earlier batches, for refit_with_batches
 
     def get_operation(
         self, pipeline: TrainablePipeline[TrainableIndividualOp]
@@ -262,14 +510,18 @@ class _TrainTask(_Task):
     ) -> TrainedIndividualOp:
         if self.trained is None:
             assert self.monoid is not None
+            if self.prior_monoid is None:
+                monoid = self.monoid
+            else:
+                monoid = self.prior_monoid.combine(self.monoid)
             trainable = pipeline.steps_list()[self.step_id]
             self.trained = trainable.convert_to_trained()
             hyperparams = trainable.impl._hyperparams
             self.trained._impl = trainable._impl_class()(**hyperparams)
             if trainable.has_method("_set_fit_attributes"):
-                self.trained._impl._set_fit_attributes(self.monoid)
+                self.trained._impl._set_fit_attributes(monoid)
             elif trainable.has_method("from_monoid"):
-                self.trained._impl.from_monoid(self.monoid)
+                self.trained._impl.from_monoid(monoid)
             else:
                 assert False, self.trained
         return self.trained
@@ -277,7 +529,7 @@ class _TrainTask(_Task):
 
 class _ApplyTask(_Task):
     batch: Optional[_Batch]
-    splits: Optional[List[Tuple[List[int], List[int]]]]
+    splits: Any  # list of (train, test) indices, or Spark fold assignment
 
     def __init__(self, step_id: int, batch_ids: Tuple[str, ...], held_out: str):
         super().__init__(step_id, batch_ids, held_out)
@@ -319,6 +571,9 @@ class Prio(ABC):
 
     arity: int
 
+    # whether task_priority depends on which input batches are resident
+    depends_on_residency: bool = False
+
     def bottom(self) -> Any:  # tuple of "inf" means all others are more important
         return self.arity * (float("inf"),)
 
@@ -328,7 +583,8 @@ class Prio(ABC):
             (
                 self.task_priority(s)
                 for s in batch.task.succs
-                if s.status in [_TaskStatus.READY, _TaskStatus.WAITING]
+                if s.status
+                in [_TaskStatus.RUNNING, _TaskStatus.READY, _TaskStatus.WAITING]
             ),
             default=self.bottom(),
         )
@@ -337,6 +593,9 @@ class Prio(ABC):
     def task_priority(self, task: _Task) -> Any:  # prefer to do first if lower
         pass
 
+    def record_task(self, task: _Task, task_time: float) -> None:
+        """Called after each finished task, for priorities that learn."""
+
 
 class PrioStep(Prio):
     """Execute tasks from earlier steps first, like nested-loop algorithm."""
@@ -386,6 +645,7 @@ class PrioResourceAware(Prio):
     """Execute tasks with less non-resident data first."""
 
     arity = 5
+    depends_on_residency = True
 
     def task_priority(self, task: _Task) -> Any:
         non_res = sum(
@@ -405,6 +665,119 @@ class PrioResourceAware(Prio):
         return result
 
 
+_CostKey = Tuple[str, int, bool]
+
+
+def _cost_key(task: _Task) -> _CostKey:
+    return type(task).__name__, task.step_id, task.has_all_batches()
+
+
+class PrioCostModel(Prio):
+    """Execute tasks with the longest estimated remaining path first,
+    adjusted by the estimated spill volume.
+
+    The model estimates the time and output space of tasks for each step
+    from the `RunTrace` of a previous run of the same pipeline if given,
+    otherwise from the first `warm_up` tasks of each kind in the current
+    run. A task's priority is the estimated time of the longest path of
+    steps from the task to the end of the run, minus `spill_cost` seconds
+    per byte of non-resident inputs and per byte that the task adds to the
+    resident space. Until there are estimates, the order is the same as
+    for `PrioResourceAware`."""
+
+    arity = 6
+    depends_on_residency = True
+
+    def __init__(
+        self,
+        trace: Optional["RunTrace"] = None,
+        warm_up: int = 3,
+        spill_cost: float = 1e-8,
+    ):
+        self.warm_up = warm_up
+        self.spill_cost = spill_cost
+        self._time: Dict[_CostKey, float] = {}
+        self._space: Dict[_CostKey, float] = {}
+        self._count: Dict[_CostKey, int] = {}
+        self._succ_keys: Dict[_CostKey, Set[_CostKey]] = {}
+        self._rank: Dict[_CostKey, float] = {}
+        if trace is not None:
+            for record in trace.records:
+                self._observe(_cost_key(record.task), record.time, record.space)
+                self._add_succ_keys(record.task)
+            self._count = {key: max(n, warm_up) for key, n in self._count.items()}
+            self._update_ranks()
+
+    def _observe(self, key: _CostKey, task_time: float, space: int) -> None:
+        n = self._count.get(key, 0)
+        self._time[key] = (n * self._time.get(key, 0.0) + task_time) / (n + 1)
+        self._space[key] = (n * self._space.get(key, 0.0) + space) / (n + 1)
+        self._count[key] = n + 1
+
+    def _add_succ_keys(self, task: _Task) -> bool:
+        """Add the steps that follow the task to the step graph, and
+        return whether that added any edges."""
+        succ_keys = self._succ_keys.setdefault(_cost_key(task), set())
+        n_before = len(succ_keys)
+        succ_keys.update(_cost_key(succ) for succ in task.succs)
+        return len(succ_keys) > n_before
+
+    def _update_ranks(self) -> None:
+        self._rank = {}
+        for key in itertools.chain(self._time, self._succ_keys):
+            self._step_rank(key, set())
+
+    def record_task(self, task: _Task, task_time: float) -> None:
+        key = _cost_key(task)
+        changed = self._add_succ_keys(task)
+        if self._count.get(key, 0) < self.warm_up:
+            if isinstance(task, _ApplyTask) and task.batch is not None:
+                space = task.batch.space
+            else:
+                space = 0
+            self._observe(key, task_time, space)
+            changed = True
+        if changed:
+            self._update_ranks()
+
+    def _step_rank(self, key: _CostKey, visiting: Set[_CostKey]) -> float:
+        if key not in self._rank:
+            visiting.add(key)
+            self._rank[key] = self._time.get(key, 0.0) + max(
+                (
+                    self._step_rank(k, visiting)
+                    for k in self._succ_keys.get(key, set())
+                    if k not in visiting  # e.g. partial_fit chains
+                ),
+                default=0.0,
+            )
+            visiting.remove(key)
+        return self._rank[key]
+
+    def task_priority(self, task: _Task) -> Any:
+        key = _cost_key(task)
+        non_res = 0
+        freed = 0
+        for p in task.preds:
+            if isinstance(p, _ApplyTask) and p.batch is not None:
+                if p.batch.status != _BatchStatus.RESIDENT:
+                    non_res += p.batch.space
+                if p.unfinished_succs == 1:
+                    freed += p.batch.space
+        added = self._space.get(key, 0.0) - freed
+        spill_time = self.spill_cost * (non_res + max(0.0, added))
+        result = (
+            task.status.value,
+            spill_time - self._rank.get(key, 0.0),
+            non_res,
+            task.batch_ids,
+            task.step_id,
+            _task_type_prio(task),
+        )
+        assert len(result) == self.arity
+        return result
+
+
 def _step_id_to_string(
     step_id: int,
     pipeline: TrainablePipeline,
@@ -412,9 +785,10 @@ def _step_id_to_string(
 ) -> str:
     if step_id == _DUMMY_INPUT_STEP:
         return "INP"
-    if step_id == _DUMMY_SCORE_STEP:
+    steps = pipeline.steps_list()
+    if step_id >= len(steps):  # one score step per candidate sink
         return "SCR"
-    step = pipeline.steps_list()[step_id]
+    step = steps[step_id]
     cls = step.class_name()
     return cls2label[cls] if cls2label and cls in cls2label else step.name()
 
@@ -448,6 +822,7 @@ class _RunStats:
                 "load_count": 0,
                 "spill_space": 0,
                 "load_space": 0,
+                "prefetch_count": 0,
                 "min_resident": 0,
                 "max_resident": 0,
                 "train_count": 0,
@@ -480,33 +855,455 @@ class _TraceRecord:
     task: _Task
     time: float
 
-    def __init__(self, task: _Task, task_time: float):
+    def __init__(
+        self,
+        task: _Task,
+        task_time: float,
+        operation: str = "",
+        step: str = "",
+        start: float = 0.0,
+        worker: int = 0,
+        space_in: int = 0,
+        spills: Tuple[int, int] = (0, 0),
+        loads: Tuple[int, int] = (0, 0),
+    ):
         self.task = task
         self.time = task_time
+        self.operation = operation
+        self.step = step
+        self.start = start
+        self.worker = worker
+        self.space_in = space_in
+        self.spill_count, self.spill_space = spills
+        self.load_count, self.load_space = loads
         if isinstance(task, _ApplyTask) and task.batch is not None:
             self.space = task.batch.space
         else:
             self.space = 0  # TODO: size for train tasks and metrics tasks
 
 
+def _task_type_name(task: _Task) -> str:
+    if isinstance(task, _TrainTask):
+        return "train"
+    if isinstance(task, _ApplyTask):
+        return "apply"
+    assert isinstance(task, _MetricTask), type(task)
+    return "metric"
+
+
+def _current_worker() -> Tuple[int, int]:
+    return os.getpid(), threading.get_ident()
+
+
+class _TraceEvent:
+    def __init__(self, kind: str, batch: "_Batch", resident_space: int, lane: int):
+        self.kind = kind
+        self.lane = lane
+        self.time = time.time()
+        self.batch_ids = "" if batch.task is None else ",".join(batch.task.batch_ids)
+        self.space = batch.space
+        self.resident_space = resident_space
+
+
+class RunTrace:
+    """Profile of task graph runs, for finding which steps dominate.
+
+    Pass an instance as the `trace` argument of `fit_with_batches`,
+    `cross_val_score`, or `cross_validate` to record every finished task
+    with its worker, wall-clock time, bytes in and out, and the batches
+    spilled or loaded to make room for it. Runs with `verbose>=2` record
+    the same information internally."""
+
+    def __init__(self):
+        self.records: List[_TraceRecord] = []
+        self.events: List[_TraceEvent] = []
+        self._worker2lane: Dict[Tuple[int, int], int] = {}
+        self._scheduler_lanes: Set[int] = set()
+
+    def _lane(self, worker: Tuple[int, int]) -> int:
+        if worker not in self._worker2lane:
+            self._worker2lane[worker] = len(self._worker2lane)
+        return self._worker2lane[worker]
+
+    def _start_run(self) -> int:
+        """Register the calling thread as a scheduler and return its lane."""
+        lane = self._lane(_current_worker())
+        self._scheduler_lanes.add(lane)
+        return lane
+
+    def _origin(self) -> float:
+        times = [r.start for r in self.records] + [e.time for e in self.events]
+        return min(times, default=0.0)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """One row per finished task, in the order in which they finished.
+
+        Times are in seconds since the start of the first recorded task,
+        spaces in bytes as estimated for the max_resident budget."""
+        origin = self._origin()
+        rows = [
+            {
+                "task_type": _task_type_name(r.task),
+                "operation": r.operation,
+                "step_id": r.task.step_id,
+                "step": r.step,
+                "batch_ids": ",".join(r.task.batch_ids),
+                "held_out": r.task.held_out,
+                "worker": r.worker,
+                "start": r.start - origin,
+                "wall_time": r.time,
+                "bytes_in": r.space_in,
+                "bytes_out": r.space,
+                "spill_count": r.spill_count,
+                "spill_bytes": r.spill_space,
+                "load_count": r.load_count,
+                "load_bytes": r.load_space,
+            }
+            for r in self.records
+        ]
+        columns = [
+            "task_type",
+            "operation",
+            "step_id",
+            "step",
+            "batch_ids",
+            "held_out",
+            "worker",
+            "start",
+            "wall_time",
+            "bytes_in",
+            "bytes_out",
+            "spill_count",
+            "spill_bytes",
+            "load_count",
+            "load_bytes",
+        ]
+        return pd.DataFrame(rows, columns=columns)
+
+    def to_chrome_trace(
+        self, path: Optional[Union[str, pathlib.Path]] = None
+    ) -> Dict[str, Any]:
+        """Trace in the Chrome trace-event format, with one lane per worker.
+
+        Tasks become complete events, spills and loads become instant
+        events on the scheduler lane along with a counter of the resident
+        bytes. If `path` is given, the trace is also written there as JSON
+        for viewing in chrome://tracing or https://ui.perfetto.dev."""
+        origin = self._origin()
+
+        def micros(seconds: float) -> float:
+            return round((seconds - origin) * 1e6, 1)
+
+        trace_events: List[Dict[str, Any]] = []
+        for lane in self._worker2lane.values():
+            name = "scheduler" if lane in self._scheduler_lanes else f"worker {lane}"
+            trace_events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 0,
+                    "tid": lane,
+                    "args": {"name": name},
+                }
+            )
+        for r in self.records:
+            trace_events.append(
+                {
+                    "name": f"{r.operation} {r.step}",
+                    "cat": _task_type_name(r.task),
+                    "ph": "X",
+                    "ts": micros(r.start),
+                    "dur": round(r.time * 1e6, 1),
+                    "pid": 0,
+                    "tid": r.worker,
+                    "args": {
+                        "batch_ids": ",".join(r.task.batch_ids),
+                        "held_out": r.task.held_out,
+                        "bytes_in": r.space_in,
+                        "bytes_out": r.space,
+                        "spill_count": r.spill_count,
+                        "spill_bytes": r.spill_space,
+                        "load_count": r.load_count,
+                        "load_bytes": r.load_space,
+                    },
+                }
+            )
+        for e in self.events:
+            trace_events.append(
+                {
+                    "name": e.kind,
+                    "cat": "io",
+                    "ph": "i",
+                    "s": "t",
+                    "ts": micros(e.time),
+                    "pid": 0,
+                    "tid": e.lane,
+                    "args": {"batch_ids": e.batch_ids, "bytes": e.space},
+                }
+            )
+            trace_events.append(
+                {
+                    "name": "resident",
+                    "ph": "C",
+                    "ts": micros(e.time),
+                    "pid": 0,
+                    "args": {"bytes": e.resident_space},
+                }
+            )
+        result = {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+        return result
+
+
+def _write_atomically(path: pathlib.Path, data: bytes) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _monoid_to_bytes(monoid: Any) -> Any:
+    return monoid.to_bytes() if isinstance(monoid, Monoid) else monoid
+
+
+def _monoid_from_bytes(data: Any) -> Any:
+    return (
+        Monoid.from_bytes(data, allow_pickle=True) if isinstance(data, bytes) else data
+    )
+
+
+class _Checkpoint:
+    """Directory with the outputs of finished train and metric tasks, so a
+    rerun after an interruption can skip those tasks and resume scanning.
+    Monoids are stored in the :method:Monoid.to_bytes format.
+
+    Batches are not saved, so a rerun rescans from the first batch whose
+    tasks are not finished or whose data is still needed by unfinished tasks.
+
+    Trained operators can be arbitrary Python objects, so the files are
+    read back with pickle.  Only resume from a directory that you trust,
+    since loading a crafted pickle can execute arbitrary code.
+    """
+
+    _STATE_FILE = "state.pkl"
+
+    def __init__(
+        self,
+        directory: Union[str, pathlib.Path],
+        fingerprint: str,
+        interval: float = 60.0,
+    ):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fingerprint = fingerprint
+        self.interval = interval  # minimum seconds between saves while scanning
+        self.last_save = time.time()
+        self.n_batches_scanned = 0
+        self.resume_from = 0
+        self.restorable: Dict[_MemoKey, Optional[str]] = {}  # key to file name
+        self.written: Dict[_MemoKey, str] = {}
+        state_path = self.directory / self._STATE_FILE
+        if state_path.exists():
+            with open(state_path, "rb") as f:
+                state = pickle.load(f)  # nosec  # trusted checkpoint directory
+            if state["fingerprint"] != fingerprint:
+                raise ValueError(
+                    f"The checkpoint in {self.directory} was written for a different pipeline or configuration."
+                )
+            self.n_batches_scanned = state["n_batches_scanned"]
+            self.resume_from = state["resume_from"]
+            self.restorable = state["done"]
+            self.written = {k: v for k, v in self.restorable.items() if v is not None}
+
+    def restore(self, task: "_Task") -> None:
+        key = task.memo_key()
+        if key not in self.restorable:
+            return
+        file_name = self.restorable[key]
+        if file_name is not None:
+            with open(self.directory / file_name, "rb") as f:
+                output = pickle.load(f)  # nosec  # trusted checkpoint directory
+            if isinstance(task, _TrainTask):
+                monoid, task.trained = output
+                task.monoid = _monoid_from_bytes(monoid)
+            else:
+                assert isinstance(task, _MetricTask)
+                task.mmonoid = _monoid_from_bytes(output)
+        task.status = _TaskStatus.DONE
+
+    def has_output(self, task: "_Task") -> bool:
+        if isinstance(task, _TrainTask):
+            return task.monoid is not None or task.trained is not None
+        if isinstance(task, _MetricTask):
+            return task.mmonoid is not None
+        return False
+
+    def write(self, task: "_Task") -> None:
+        if not self.has_output(task):
+            return
+        if isinstance(task, _TrainTask):
+            output: Any = _monoid_to_bytes(task.monoid), task.trained
+        else:
+            output = _monoid_to_bytes(cast(_MetricTask, task).mmonoid)
+        key = task.memo_key()
+        # all earlier files, including restored ones, are in self.written
+        file_name = self.written.get(key, f"task_{len(self.written)}.pkl")
+        _write_atomically(self.directory / file_name, pickle.dumps(output))
+        self.written[key] = file_name
+
+    def is_persisted(self, task: "_Task") -> bool:
+        if task.status is not _TaskStatus.DONE or not self.has_output(task):
+            return False
+        if task.memo_key() not in self.written:
+            self.write(task)  # for example, made done by an absorbing monoid
+        return True
+
+    def save(self, tg: "_TaskGraph", n_batches_scanned: int) -> None:
+        # unfinished tasks plus the preds they need that cannot be restored
+        needed = [t for t in tg.all_tasks.values() if t.status is not _TaskStatus.DONE]
+        needed_set = set(needed)
+        while len(needed) > 0:
+            for pred in needed.pop().preds:
+                if pred not in needed_set and not self.is_persisted(pred):
+                    needed_set.add(pred)
+                    needed.append(pred)
+        resume_from = min(
+            (
+                _get_idx(t.batch_ids[0])
+                for t in needed_set
+                if len(t.batch_ids) == 1 and not t.has_all_batches()
+            ),
+            default=n_batches_scanned,
+        )
+        done: Dict[_MemoKey, Optional[str]] = {}
+        for task in tg.all_tasks.values():
+            if task.status is _TaskStatus.DONE and task not in needed_set:
+                if isinstance(task, (_TrainTask, _MetricTask)):
+                    key = task.memo_key()
+                    has_output = self.has_output(task) and key in self.written
+                    done[key] = self.written[key] if has_output else None
+        state = {
+            "fingerprint": self.fingerprint,
+            "n_batches_scanned": n_batches_scanned,
+            "resume_from": min(resume_from, n_batches_scanned),
+            "done": done,
+        }
+        _write_atomically(self.directory / self._STATE_FILE, pickle.dumps(state))
+        referenced = set(done.values())
+        for key, file_name in list(self.written.items()):
+            if file_name not in referenced:
+                (self.directory / file_name).unlink(missing_ok=True)
+                del self.written[key]
+        self.last_save = time.time()
+
+    def save_if_due(self, tg: "_TaskGraph", n_batches_scanned: int) -> None:
+        if time.time() - self.last_save >= self.interval:
+            self.save(tg, n_batches_scanned)
+
+
+def _same_step(op1: TrainableIndividualOp, op2: TrainableIndividualOp) -> bool:
+    if op1 is op2:
+        return True
+    if is_pretrained(op1) or is_pretrained(op2):
+        return False  # learned state is not part of the hyperparameters
+    if op1.class_name() != op2.class_name():
+        return False
+    try:
+        return bool(op1.hyperparams_all() == op2.hyperparams_all())
+    except ValueError:  # ambiguous truth value of array comparison
+        return False
+
+
+_StepMap = Dict[TrainableIndividualOp, TrainableIndividualOp]
+
+
+def _merge_pipelines(
+    pipelines: List[TrainablePipeline[TrainableIndividualOp]],
+) -> Tuple[TrainablePipeline[TrainableIndividualOp], List[_StepMap]]:
+    """Merge candidate pipelines into a single pipeline with one sink per
+    candidate, where steps with the same class, hyperparameters, and
+    (already merged) preds are shared, so their tasks get shared too.
+    Also return, per candidate, a map from its steps to the merged steps."""
+    if len(pipelines) == 1:
+        only = pipelines[0]
+        return only, [{step: step for step in only.steps_list()}]
+    merged_steps: List[TrainableIndividualOp] = []
+    merged_preds: Dict[TrainableIndividualOp, List[TrainableIndividualOp]] = {}
+    merged_edges: List[Tuple[TrainableIndividualOp, TrainableIndividualOp]] = []
+    step_maps: List[_StepMap] = []
+    for pipeline in pipelines:
+        step_map: _StepMap = {}
+        for step in pipeline.steps_list():
+            preds = [step_map[p] for p in pipeline._preds[step]]
+            found = None
+            for merged in merged_steps:
+                merged_pred_list = merged_preds[merged]
+                if (
+                    len(merged_pred_list) == len(preds)
+                    and all(p1 is p2 for p1, p2 in zip(merged_pred_list, preds))
+                    and _same_step(merged, step)
+                ):
+                    found = merged
+                    break
+            if found is None:
+                found = step
+                if found in merged_preds:  # same object under different preds
+                    if is_pretrained(step):
+                        found = copy.copy(step)
+                    else:
+                        found = cast(TrainableIndividualOp, step.clone())
+                merged_steps.append(found)
+                merged_preds[found] = preds
+                merged_edges.extend((p, found) for p in preds)
+            step_map[step] = found
+        step_maps.append(step_map)
+    result = TrainablePipeline(merged_steps, merged_edges, ordered=True)
+    return result, step_maps
+
+
 class _TaskGraph:
     step_ids: Dict[TrainableIndividualOp, int]
     step_id_preds: Dict[int, List[int]]
     fresh_tasks: List[_Task]
     all_tasks: Dict[_MemoKey, _Task]
     tasks_with_all_batches: List[_Task]
+    tasks_by_step: Dict[Tuple[Type["_Task"], int, Optional[str]], List[_Task]]
+    combine_stacks: Dict[_Task, Dict[str, List[Tuple[int, _Task]]]]
+    prior_monoids: Dict[int, Monoid]
+    candidates: List[TrainablePipeline[TrainableIndividualOp]]
+    step_maps: List[_StepMap]
+    score_step_ids: List[Optional[int]]  # per candidate, None if several sinks
+    score_sinks: Dict[int, int]  # from score step id to sink step id
+    is_trained: bool  # for inference, all train tasks are done up-front
+    output_step_id: Optional[int]  # step whose apply outputs get collected
 
     def __init__(
         self,
-        pipeline: TrainablePipeline[TrainableIndividualOp],
+        pipeline: Union[
+            TrainablePipeline[TrainableIndividualOp],
+            List[TrainablePipeline[TrainableIndividualOp]],
+        ],
         folds: List[str],
         partial_transform: Union[bool, str],
         same_fold: bool,
+        combine_fan_in: Optional[int] = None,
+        checkpoint: Optional[_Checkpoint] = None,
+        prior_monoids: Optional[Dict[int, Monoid]] = None,
+        is_trained: bool = False,
     ):
+        self.candidates = pipeline if isinstance(pipeline, list) else [pipeline]
+        pipeline, self.step_maps = _merge_pipelines(self.candidates)
         self.pipeline = pipeline
         self.folds = folds
         self.partial_transform = partial_transform
         self.same_fold = same_fold
+        self.combine_fan_in = combine_fan_in
+        self.checkpoint = checkpoint
+        self.prior_monoids = {} if prior_monoids is None else prior_monoids
+        self.is_trained = is_trained
+        self.output_step_id = None
         self.step_ids = {step: i for i, step in enumerate(pipeline.steps_list())}
         self.step_id_preds = {
             self.step_ids[s]: (
@@ -516,9 +1313,25 @@ class _TaskGraph:
             )
             for s in pipeline.steps_list()
         }
+        self.score_step_ids = []
+        self.score_sinks = {}
+        sink2score_step: Dict[int, int] = {}
+        for candidate, step_map in zip(self.candidates, self.step_maps):
+            sink = candidate.get_last()
+            if sink is None:  # can only be fitted, not scored
+                self.score_step_ids.append(None)
+                continue
+            sink_id = self.step_ids[step_map[sink]]
+            if sink_id not in sink2score_step:
+                score_step_id = _DUMMY_SCORE_STEP - len(sink2score_step)
+                sink2score_step[sink_id] = score_step_id
+                self.score_sinks[score_step_id] = sink_id
+            self.score_step_ids.append(sink2score_step[sink_id])
         self.fresh_tasks = []
         self.all_tasks = {}
         self.tasks_with_all_batches = []
+        self.tasks_by_step = {}
+        self.combine_stacks = {}  # per task with all batches, per fold
 
     def __enter__(self) -> "_TaskGraph":
         return self
@@ -527,17 +1340,27 @@ class _TaskGraph:
         for task in self.all_tasks.values():
             # preds form a garbage collection cycle with succs
             task.preds.clear()
+            task.pred_set.clear()
             task.succs.clear()
             # tasks form a garbage collection cycle with batches
             if isinstance(task, _ApplyTask) and task.batch is not None:
                 task.batch.task = None
                 task.batch = None
         self.all_tasks.clear()
+        self.tasks_by_step.clear()
+        self.combine_stacks.clear()
+
+    def extract_scores(
+        self, scoring: MetricMonoidFactory, candidate: int = 0
+    ) -> List[float]:
+        score_step_id = self.score_step_ids[candidate]
+        assert score_step_id is not None
 
-    def extract_scores(self, scoring: MetricMonoidFactory) -> List[float]:
         def extract_score(held_out: str) -> float:
             batch_ids = (_batch_id(held_out, _ALL_BATCHES),)
-            task = self.all_tasks[(_MetricTask, _DUMMY_SCORE_STEP, batch_ids, held_out)]
+            task_held_out = None if len(self.folds) == 1 else held_out
+            memo_key = (_MetricTask, score_step_id, batch_ids, task_held_out)
+            task = self.all_tasks[memo_key]
             assert isinstance(task, _MetricTask) and task.mmonoid is not None
             return scoring.from_monoid(task.mmonoid)
 
@@ -545,7 +1368,7 @@ class _TaskGraph:
         return scores
 
     def extract_trained_pipeline(
-        self, held_out: Optional[str], up_to: int
+        self, held_out: Optional[str], up_to: int, candidate: int = 0
     ) -> TrainedPipeline:
         if up_to == _ALL_BATCHES:
             batch_ids = _batch_ids_except(self.folds, held_out)
@@ -559,11 +1382,12 @@ class _TaskGraph:
             )
             return task.get_trained(self.pipeline)
 
+        pipeline = self.candidates[candidate]
         step_map = {
-            old_step: extract_trained_step(step_id)
-            for step_id, old_step in enumerate(self.pipeline.steps_list())
+            old_step: extract_trained_step(self.step_ids[merged_step])
+            for old_step, merged_step in self.step_maps[candidate].items()
         }
-        trained_edges = [(step_map[x], step_map[y]) for x, y in self.pipeline.edges()]
+        trained_edges = [(step_map[x], step_map[y]) for x, y in pipeline.edges()]
         result = TrainedPipeline(
             list(step_map.values()), trained_edges, ordered=True, _lale_trained=True
         )
@@ -579,10 +1403,24 @@ class _TaskGraph:
         memo_key = task_class, step_id, batch_ids, held_out
         if memo_key not in self.all_tasks:
             task = task_class(step_id, batch_ids, held_out)
+            if isinstance(task, _TrainTask) and self.is_trained:
+                trained = self.pipeline.steps_list()[step_id]
+                task.trained = cast(TrainedIndividualOp, trained)
+                task.status = _TaskStatus.DONE
+                task.deletable_output = False
+            if isinstance(task, _TrainTask) and step_id in self.prior_monoids:
+                # only tasks that cover a prefix of the batches get trained
+                if _get_idx(batch_ids[0]) in [0, _ALL_BATCHES]:
+                    task.prior_monoid = self.prior_monoids[step_id]
+            if self.checkpoint is not None:
+                self.checkpoint.restore(task)
             self.all_tasks[memo_key] = task
-            self.fresh_tasks.append(task)
+            if task.status is not _TaskStatus.DONE:
+                self.fresh_tasks.append(task)
             if task.has_all_batches():
                 self.tasks_with_all_batches.append(task)
+            step_key = task_class, step_id, held_out
+            self.tasks_by_step.setdefault(step_key, []).append(task)
         return self.all_tasks[memo_key]
 
     def visualize(
@@ -603,6 +1441,8 @@ class _TaskGraph:
                 color = "lightgreen" if task is next_task else "yellow"
             elif task.status is _TaskStatus.WAITING:
                 color = "coral"
+            elif task.status is _TaskStatus.RUNNING:
+                color = "lightblue"
             else:
                 assert task.status is _TaskStatus.DONE
                 color = "lightgray"
@@ -641,21 +1481,23 @@ def _create_initial_tasks(
     tg: _TaskGraph, need_metrics: bool, keep_estimator: bool
 ) -> None:
     held_out: Optional[str]
+    first_idx = 0 if tg.checkpoint is None else tg.checkpoint.resume_from
     _ = tg.find_or_create(
         _ApplyTask,
         _DUMMY_INPUT_STEP,
-        (_batch_id(tg.folds[0] if len(tg.folds) == 1 else _ALL_FOLDS, 0),),
+        (_batch_id(tg.folds[0] if len(tg.folds) == 1 else _ALL_FOLDS, first_idx),),
         None,
     )
     if need_metrics:
-        for held_out in tg.folds:
-            task = tg.find_or_create(
-                _MetricTask,
-                _DUMMY_SCORE_STEP,
-                (_batch_id(held_out, _ALL_BATCHES),),
-                None if len(tg.folds) == 1 else held_out,
-            )
-            task.deletable_output = False
+        for score_step_id in tg.score_sinks:
+            for held_out in tg.folds:
+                task = tg.find_or_create(
+                    _MetricTask,
+                    score_step_id,
+                    (_batch_id(held_out, _ALL_BATCHES),),
+                    None if len(tg.folds) == 1 else held_out,
+                )
+                task.deletable_output = False
     if keep_estimator:
         for step_id in tg.step_ids.values():
             held_outs = cast(
@@ -678,7 +1520,10 @@ def _create_initial_tasks(
 
 def _backward_chain_tasks(
     tg: _TaskGraph, n_batches_scanned: int, end_of_scanned_batches: bool
-) -> None:
+) -> List[_Task]:
+    """Create preds for all fresh tasks and return the ones that became ready."""
+    ready_tasks: List[_Task] = []
+
     def apply_pred_ho(task, pred_batch_id, pred_step_id):
         assert isinstance(task, _TrainTask), type(task)
         if len(tg.folds) == 1 or pred_step_id == _DUMMY_INPUT_STEP:
@@ -699,6 +1544,42 @@ def _backward_chain_tasks(
             result = task.held_out
         return result
 
+    def add_combine_tree_preds(task: _Task) -> None:
+        """Keep the preds of a task with all batches a forest of balanced
+        COMBINE tasks with combine_fan_in inputs each, one per fold, so
+        monoids get combined with logarithmic depth while scanning."""
+        fan_in = cast(int, tg.combine_fan_in)
+        stacks = tg.combine_stacks.setdefault(task, {})  # (level, task) pairs
+        for batch_id in task.expand_new_batches(n_batches_scanned):
+            if isinstance(task, _TrainTask):
+                held_out = train_pred_ho(task, (batch_id,))
+            else:
+                held_out = task.held_out
+            leaf = tg.find_or_create(type(task), task.step_id, (batch_id,), held_out)
+            task.add_pred(leaf)
+            stack = stacks.setdefault(_get_fold(batch_id), [])
+            stack.append((0, leaf))
+            while len(stack) >= fan_in and stack[-fan_in][0] == stack[-1][0]:
+                level = stack[-1][0]
+                group = [t for _, t in stack[-fan_in:]]
+                block_ids = tuple(
+                    itertools.chain.from_iterable(t.batch_ids for t in group)
+                )
+                if isinstance(task, _TrainTask):
+                    held_out = train_pred_ho(task, block_ids)
+                else:
+                    held_out = task.held_out
+                block = tg.find_or_create(type(task), task.step_id, block_ids, held_out)
+                for t in group:
+                    block.add_pred(t)
+                task.add_pred(block)
+                for t in group:
+                    task.remove_pred(t)
+                del stack[-fan_in:]
+                stack.append((level + 1, block))
+        # combine in batch order, in case monoids are not commutative
+        task.preds = [t for fold in sorted(stacks) for _, t in stacks[fold]]
+
     pred_batch_ids: Tuple[str, ...]
     while len(tg.fresh_tasks) > 0:
         task = tg.fresh_tasks.pop()
@@ -753,8 +1634,8 @@ def _backward_chain_tasks(
                                         train_pred_ho(task, pred_batch_ids),
                                     )
                                 )
-                    else:
-                        for batch_id in task.expand_batches(n_batches_scanned):
+                    elif tg.combine_fan_in is None:
+                        for batch_id in task.expand_new_batches(n_batches_scanned):
                             pred_batch_ids = (batch_id,)
                             task.add_pred(
                                 tg.find_or_create(
@@ -764,6 +1645,9 @@ def _backward_chain_tasks(
                                     train_pred_ho(task, pred_batch_ids),
                                 )
                             )
+                    elif task.has_all_batches():
+                        add_combine_tree_preds(task)
+                    # else inner node of a combine tree, preds already added
                 elif is_incremental(step):
                     if task.has_all_batches():
                         if n_batches_scanned > 0:
@@ -799,8 +1683,9 @@ def _backward_chain_tasks(
                                 )
                             )
                 else:
+                    new_batch_ids = task.expand_new_batches(n_batches_scanned)
                     for pred_step_id in tg.step_id_preds[task.step_id]:
-                        for pred_batch_id in task.expand_batches(n_batches_scanned):
+                        for pred_batch_id in new_batch_ids:
                             task.add_pred(
                                 tg.find_or_create(
                                     _ApplyTask,
@@ -866,40 +1751,86 @@ def _backward_chain_tasks(
                         _ApplyTask, _DUMMY_INPUT_STEP, task.batch_ids, None
                     )
                 )
-                sink = tg.pipeline.get_last()
-                assert sink is not None
                 task.add_pred(
                     tg.find_or_create(
-                        _ApplyTask, tg.step_ids[sink], task.batch_ids, task.held_out
+                        _ApplyTask,
+                        tg.score_sinks[task.step_id],
+                        task.batch_ids,
+                        task.held_out,
                     )
                 )
-            else:
-                for batch_id in task.expand_batches(n_batches_scanned):
+            elif tg.combine_fan_in is None:
+                for batch_id in task.expand_new_batches(n_batches_scanned):
                     task.add_pred(
                         tg.find_or_create(
                             _MetricTask, task.step_id, (batch_id,), task.held_out
                         )
                     )
+            elif task.has_all_batches():
+                add_combine_tree_preds(task)
+            # else inner node of a combine tree, preds already added
         else:
             assert False, type(task)
         if task.status is not _TaskStatus.DONE:
             if task.can_be_ready(end_of_scanned_batches):
                 task.status = _TaskStatus.READY
+                ready_tasks.append(task)
             else:
                 task.status = _TaskStatus.WAITING
+    return ready_tasks
 
 
 def _create_tasks(
-    pipeline: TrainablePipeline[TrainableIndividualOp],
+    pipeline: Union[
+        TrainablePipeline[TrainableIndividualOp],
+        List[TrainablePipeline[TrainableIndividualOp]],
+    ],
     folds: List[str],
     need_metrics: bool,
     keep_estimator: bool,
     partial_transform: Union[bool, str],
     same_fold: bool,
+    combine_fan_in: Optional[int] = None,
+    checkpoint_dir: Optional[Union[str, pathlib.Path]] = None,
+    cv=None,
+    prior_monoids: Optional[Dict[int, Monoid]] = None,
+    is_trained: bool = False,
 ) -> _TaskGraph:
-    tg = _TaskGraph(pipeline, folds, partial_transform, same_fold)
+    if combine_fan_in is not None and combine_fan_in < 2:
+        raise ValueError(f"expected combine_fan_in >= 2, got {combine_fan_in}")
+    checkpoint = None
+    if checkpoint_dir is not None:
+        if isinstance(pipeline, list):
+            pipeline_s: Any = [lale.pretty_print.to_string(p) for p in pipeline]
+        else:
+            pipeline_s = lale.pretty_print.to_string(pipeline)
+        fingerprint = repr(
+            (
+                pipeline_s,
+                folds,
+                need_metrics,
+                keep_estimator,
+                partial_transform,
+                same_fold,
+                combine_fan_in,
+                cv,
+            )
+        )
+        checkpoint = _Checkpoint(checkpoint_dir, fingerprint)
+    tg = _TaskGraph(
+        pipeline,
+        folds,
+        partial_transform,
+        same_fold,
+        combine_fan_in,
+        checkpoint,
+        prior_monoids,
+        is_trained,
+    )
     _create_initial_tasks(tg, need_metrics, keep_estimator)
-    _backward_chain_tasks(tg, 0, False)
+    _backward_chain_tasks(
+        tg, 0 if checkpoint is None else checkpoint.resume_from, False
+    )
     return tg
 
 
@@ -941,33 +1872,201 @@ def _analyze_run_trace(stats: _RunStats, trace: List[_TraceRecord]) -> _RunStats
     return stats
 
 
+class _ReadyQueue:
+    """Priority queue of ready tasks with lazy invalidation.
+
+    Entries of tasks that are no longer ready are discarded when they
+    reach the top of the heap. Entries whose priority went up since they
+    were pushed are re-pushed when they reach the top; when a priority
+    goes down, callers push the task again via `update`."""
+
+    _heap: List[Tuple[Any, int, _Task]]
+
+    def __init__(self, prio: Prio):
+        self.prio = prio
+        self._heap = []
+        self._counter = itertools.count()  # tie-breaker, avoids comparing tasks
+
+    def push(self, task: _Task) -> None:
+        assert task.status is _TaskStatus.READY
+        entry = (self.prio.task_priority(task), next(self._counter), task)
+        heapq.heappush(self._heap, entry)
+
+    def update(self, task: _Task) -> None:
+        if task.status is _TaskStatus.READY:
+            self.push(task)
+
+    def peek(self, can_start: Callable[[_Task], bool]) -> Optional[_Task]:
+        """Return the highest-priority ready task that can start, if any."""
+        result = self.peek_many(1, can_start)
+        return result[0] if len(result) > 0 else None
+
+    def peek_many(self, n: int, can_start: Callable[[_Task], bool]) -> List[_Task]:
+        """Return up to n highest-priority ready tasks that can start."""
+        popped = []
+        result: List[_Task] = []
+        while len(self._heap) > 0 and len(result) < n:
+            priority, _, task = self._heap[0]
+            if task.status is not _TaskStatus.READY:
+                heapq.heappop(self._heap)
+                continue
+            current = self.prio.task_priority(task)
+            if current != priority:
+                entry = (current, next(self._counter), task)
+                heapq.heapreplace(self._heap, entry)
+                continue
+            popped.append(heapq.heappop(self._heap))
+            if can_start(task):
+                result.append(task)
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return result
+
+
+class _ScanAhead:
+    """Iterator that reads items from another iterable on a background
+    thread, up to `limit` items ahead of the consumer, to overlap data
+    loading with computation. The limit can be changed at any time."""
+
+    def __init__(self, iterable: Iterable[Any], limit: int):
+        self.limit = limit
+        self._buffer: Deque[Tuple[str, Any]] = collections.deque()
+        self._cond = threading.Condition()
+        self._n_waiting = 0  # number of consumers blocked in __next__
+        self._closed = False
+        self._exhausted = False
+        self._thread = threading.Thread(
+            target=self._produce, args=(iterable,), daemon=True
+        )
+        self._thread.start()
+
+    def _produce(self, iterable: Iterable[Any]) -> None:
+        entry: Tuple[str, Any]
+        iterator = iter(iterable)
+        while True:
+            with self._cond:
+                while not self._closed and len(self._buffer) >= max(
+                    self.limit, self._n_waiting
+                ):
+                    self._cond.wait()
+                if self._closed:
+                    return
+            try:
+                entry = ("item", next(iterator))
+            except StopIteration:
+                entry = ("end", None)
+            except BaseException as exc:  # re-raised by __next__
+                entry = ("error", exc)
+            with self._cond:
+                self._buffer.append(entry)
+                self._cond.notify_all()
+            if entry[0] != "item":
+                return
+
+    def __iter__(self) -> "_ScanAhead":
+        return self
+
+    def __next__(self) -> Any:
+        if self._exhausted:
+            raise StopIteration
+        with self._cond:
+            self._n_waiting += 1
+            self._cond.notify_all()
+            while len(self._buffer) == 0:
+                self._cond.wait()
+            self._n_waiting -= 1
+            kind, value = self._buffer.popleft()
+            self._cond.notify_all()
+        if kind == "item":
+            return value
+        self._exhausted = True
+        if kind == "error":
+            raise value
+        raise StopIteration
+
+    def n_buffered(self) -> int:
+        with self._cond:
+            return sum(1 for kind, _ in self._buffer if kind == "item")
+
+    def set_limit(self, limit: int) -> None:
+        with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class _SpillKey:
+    """Wrapper that reverses the order of batch priorities, so the heap
+    in `_BatchCache` pops the batch that is least important to keep."""
+
+    __slots__ = ["priority"]
+
+    def __init__(self, priority: Any):
+        self.priority = priority
+
+    def __lt__(self, other: "_SpillKey") -> bool:
+        return other.priority < self.priority
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _SpillKey) and self.priority == other.priority
+
+
 class _BatchCache:
     spill_dir: Optional[tempfile.TemporaryDirectory]
     spill_path: Optional[pathlib.Path]
 
     def __init__(
         self,
-        tasks: Dict[_MemoKey, _Task],
         max_resident: Optional[int],
         prio: Prio,
         verbose: int,
+        spill_format: Optional[SpillFormat] = None,
+        prefetch: int = 0,
     ):
-        self.tasks = tasks
         self.max_resident = sys.maxsize if max_resident is None else max_resident
         self.prio = prio
+        self.spill_format = SpillPickle() if spill_format is None else spill_format
         self.spill_dir = None
         self.spill_path = None
         self.verbose = verbose
         self.stats = _RunStats()
         self.stats.max_resident = self.max_resident
+        self.in_flight: Dict[_Task, int] = {}
+        self.ready_queue: Optional[_ReadyQueue] = None
+        self.resident_space = 0  # total space of resident batches
+        self.held_space = 0  # part of resident_space held outside the cache
+        self.step_space: Dict[int, int] = {}  # total space of live batches per step
+        self.step_count: Dict[int, int] = {}  # number of live batches per step
+        self._spill_heap: List[Tuple[_SpillKey, int, _Batch]] = []
+        self._counter = itertools.count()
+        self.prefetch = prefetch
+        self.io_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.loading: Dict[_Batch, concurrent.futures.Future] = {}
+        self.scan_ahead: Optional[_ScanAhead] = None
+        self.trace: Optional[RunTrace] = None
+        self.trace_lane = 0
+
+    def _trace_event(self, kind: str, batch: _Batch) -> None:
+        if self.trace is not None:
+            event = _TraceEvent(kind, batch, self.resident_space, self.trace_lane)
+            self.trace.events.append(event)
 
     def __enter__(self) -> "_BatchCache":
         if self.max_resident < sys.maxsize:
             self.spill_dir = tempfile.TemporaryDirectory()
             self.spill_path = pathlib.Path(self.spill_dir.name)
+            if self.prefetch > 0:
+                self.io_executor = concurrent.futures.ThreadPoolExecutor(1)
         return self
 
     def __exit__(self, exc_value, exc_type, traceback) -> None:
+        if self.io_executor is not None:
+            self.cancel_prefetch()
+            self.io_executor.shutdown()
         if self.spill_dir is not None:
             self.spill_dir.cleanup()
 
@@ -977,69 +2076,447 @@ class _BatchCache:
         return result
 
     def estimate_space(self, task: _ApplyTask) -> int:
-        other_tasks_with_similar_output = (
-            t
-            for t in self.tasks.values()
-            if t is not task and isinstance(t, _ApplyTask)
-            if t.step_id == task.step_id and t.batch is not None
-        )
-        try:
-            surrogate = next(other_tasks_with_similar_output)
-            assert isinstance(surrogate, _ApplyTask) and surrogate.batch is not None
-            return surrogate.batch.space
-        except StopIteration:  # the iterator was empty
-            if task.step_id == _DUMMY_INPUT_STEP:
-                return 1  # safe to underestimate on first batch scanned
-            apply_preds = self._get_apply_preds(task)
-            return sum(cast(_Batch, t.batch).space for t in apply_preds)
+        count = self.step_count.get(task.step_id, 0)
+        if task.batch is not None:
+            count -= 1
+        if count > 0:
+            other_space = self.step_space[task.step_id]
+            if task.batch is not None:
+                other_space -= task.batch.space
+            return other_space // count
+        if task.step_id == _DUMMY_INPUT_STEP:
+            return 1  # safe to underestimate on first batch scanned
+        apply_preds = self._get_apply_preds(task)
+        return sum(cast(_Batch, t.batch).space for t in apply_preds)
+
+    def add(self, batch: _Batch) -> None:
+        """Start tracking a newly computed resident batch."""
+        assert batch.task is not None and batch.status == _BatchStatus.RESIDENT
+        step_id = batch.task.step_id
+        self.step_space[step_id] = self.step_space.get(step_id, 0) + batch.space
+        self.step_count[step_id] = self.step_count.get(step_id, 0) + 1
+        self.resident_space += batch.space
+        self.update(batch)
+
+    def remove(self, batch: _Batch) -> None:
+        """Stop tracking a batch that is no longer needed."""
+        assert batch.task is not None
+        step_id = batch.task.step_id
+        self.step_space[step_id] -= batch.space
+        self.step_count[step_id] -= 1
+        if batch in self.loading:
+            future = self.loading.pop(batch)
+            if not future.cancel():
+                # the load already started, so let it finish reading the
+                # spilled files before deleting them
+                concurrent.futures.wait([future])
+            self.resident_space -= batch.space
+        elif batch.status == _BatchStatus.RESIDENT:
+            self.resident_space -= batch.space
+        batch.delete_spilled()
+        # entries in the spill heap are discarded lazily
+
+    def set_held_space(self, space: int) -> None:
+        """Account for data that the caller holds outside the cache, e.g.
+        outputs waiting for earlier ones, as resident but not spillable."""
+        self.resident_space += space - self.held_space
+        self.held_space = space
+
+    def update(self, batch: _Batch) -> None:
+        """Reconsider a resident batch for spilling, e.g. after its priority
+        went up. Entries whose priority went down since they were pushed
+        are re-pushed lazily when they reach the top of the heap."""
+        if self.max_resident < sys.maxsize:
+            if batch.status == _BatchStatus.RESIDENT:
+                key = _SpillKey(self.prio.batch_priority(batch))
+                heapq.heappush(self._spill_heap, (key, -next(self._counter), batch))
+
+    def _pop_spill_candidate(self) -> Optional[_Batch]:
+        """Remove and return the resident batch with the highest priority."""
+        while len(self._spill_heap) > 0:
+            key, _, batch = self._spill_heap[0]
+            if (
+                batch.task is None
+                or batch.task.batch is not batch
+                or batch.status != _BatchStatus.RESIDENT
+            ):
+                heapq.heappop(self._spill_heap)
+                continue
+            current = _SpillKey(self.prio.batch_priority(batch))
+            if current != key:
+                entry = (current, -next(self._counter), batch)
+                heapq.heapreplace(self._spill_heap, entry)
+                continue
+            heapq.heappop(self._spill_heap)
+            return batch
+        return None
+
+    def acquire(self, task: _Task, output_space: int) -> None:
+        """Pin the inputs of a running task and reserve space for its output."""
+        self.in_flight[task] = output_space
+
+    def release(self, task: _Task) -> None:
+        del self.in_flight[task]
+
+    def has_space_for(self, task: _Task) -> bool:
+        """Can the task run alongside the running tasks within max_resident?"""
+        if len(self.in_flight) == 0:
+            return True
+        pinned = {
+            p.batch
+            for t in itertools.chain(self.in_flight, [task])
+            for p in t.preds
+            if isinstance(p, _ApplyTask) and p.batch is not None
+        }
+        needed = sum(b.space for b in pinned) + sum(self.in_flight.values())
+        needed += self.scan_ahead_space()
+        needed += sum(b.space for b in self.loading if b not in pinned)
+        if isinstance(task, _ApplyTask):
+            needed += self.estimate_space(task)
+        return needed <= self.max_resident
 
     def ensure_space(self, amount_needed: int, no_spill_set: Set[_Batch]) -> None:
+        if len(self.in_flight) > 0:
+            no_spill_set = no_spill_set.union(
+                p.batch
+                for t in self.in_flight
+                for p in t.preds
+                if isinstance(p, _ApplyTask) and p.batch is not None
+            )
+            amount_needed += sum(self.in_flight.values())
+        amount_needed += self.scan_ahead_space()
         no_spill_space = sum(b.space for b in no_spill_set)
         min_resident = amount_needed + no_spill_space
         self.stats.min_resident = max(self.stats.min_resident, min_resident)
-        resident_batches = [
-            t.batch
-            for t in self.tasks.values()
-            if isinstance(t, _ApplyTask) and t.batch is not None
-            if t.batch.status == _BatchStatus.RESIDENT
-        ]
-        resident_batches.sort(key=self.prio.batch_priority)
-        resident_batches_space = sum(b.space for b in resident_batches)
-        while resident_batches_space + amount_needed > self.max_resident:
-            if len(resident_batches) == 0:
+        aborted = []
+        while self.resident_space + amount_needed > self.max_resident:
+            batch = self._pop_spill_candidate()
+            if len(self.loading) > 0 and (batch is None or batch in no_spill_set):
+                if batch is not None:
+                    aborted.append(batch)
+                self.cancel_prefetch()  # only pinned batches left to spill
+                continue
+            if batch is None:
                 logger.warning(
                     f"ensure_space() failed, amount_needed {amount_needed}, no_spill_space {no_spill_space}, min_resident {min_resident}, max_resident {self.max_resident}"
                 )
                 break
-            batch = resident_batches.pop()
-            assert batch.status == _BatchStatus.RESIDENT and batch.task is not None
+            assert batch.task is not None
             if batch in no_spill_set:
                 logger.warning(f"aborted spill of batch {batch}")
+                aborted.append(batch)
             else:
                 assert self.spill_path is not None, self.max_resident
-                batch.spill(self.spill_path)
+                batch.spill(self.spill_path, self.spill_format)
+                self.resident_space -= batch.space
                 self.stats.spill_count += 1
                 self.stats.spill_space += batch.space
+                self._trace_event("spill", batch)
                 if self.verbose >= 2:
                     print(f"spill {batch.X} {batch.y}")
-                resident_batches_space -= batch.space
+                if self.prio.depends_on_residency:  # priorities may have gone up
+                    for succ in batch.task.succs:
+                        for pred in succ.preds:
+                            if isinstance(pred, _ApplyTask) and pred.batch is not None:
+                                self.update(pred.batch)
+        for batch in aborted:
+            self.update(batch)
 
     def load_input_batches(self, task: _Task) -> None:
         apply_preds = self._get_apply_preds(task)
         no_spill_set = cast(Set[_Batch], set(t.batch for t in apply_preds))
         for pred in apply_preds:
             assert pred.batch is not None
-            if pred.batch.status == _BatchStatus.SPILLED:
+            if pred.batch in self.loading:  # space was reserved by prefetch
+                if self.verbose >= 2:
+                    print(f"wait for prefetch {pred.batch.X} {pred.batch.y}")
+                future = self.loading.pop(pred.batch)
+                pred.batch.X, pred.batch.y = future.result()
+                self.update(pred.batch)
+                self.stats.load_count += 1
+                self.stats.load_space += pred.batch.space
+                self._trace_event("load", pred.batch)
+                if self.ready_queue is not None:  # priorities may have gone down
+                    for succ in pred.succs:
+                        self.ready_queue.update(succ)
+            elif pred.batch.status == _BatchStatus.SPILLED:
                 self.ensure_space(pred.batch.space, no_spill_set)
                 if self.verbose >= 2:
                     print(f"load {pred.batch.X} {pred.batch.y}")
-                pred.batch.load_spilled()
+                pred.batch.load_spilled(self.spill_format)
+                self.resident_space += pred.batch.space
+                self.update(pred.batch)
                 self.stats.load_count += 1
                 self.stats.load_space += pred.batch.space
+                self._trace_event("load", pred.batch)
+                if self.ready_queue is not None:  # priorities may have gone down
+                    for succ in pred.succs:
+                        self.ready_queue.update(succ)
         for pred in apply_preds:
             assert pred.batch is not None
             assert pred.batch.status == _BatchStatus.RESIDENT
 
+    def _scanned_batch_space(self) -> int:
+        count = self.step_count.get(_DUMMY_INPUT_STEP, 0)
+        if count == 0:
+            return 1  # safe to underestimate on first batch scanned
+        return max(1, self.step_space[_DUMMY_INPUT_STEP] // count)
+
+    def scan_ahead_space(self) -> int:
+        if self.scan_ahead is None:
+            return 0
+        return self.scan_ahead.n_buffered() * self._scanned_batch_space()
+
+    def limit_scan_ahead(self) -> None:
+        """Let the scan-ahead thread read as many batches as fit in the
+        space that is neither resident nor reserved, up to prefetch."""
+        if self.scan_ahead is None:
+            return
+        if self.max_resident == sys.maxsize:
+            limit = self.prefetch
+        elif self.step_count.get(_DUMMY_INPUT_STEP, 0) == 0:
+            limit = 0  # wait until the size of scanned batches is known
+        else:
+            n_buffered = self.scan_ahead.n_buffered()
+            reserved_space = sum(self.in_flight.values()) + self.scan_ahead_space()
+            free_space = self.max_resident - self.resident_space - reserved_space
+            n_more = max(0, free_space) // self._scanned_batch_space()
+            limit = min(self.prefetch, n_buffered + n_more)
+        self.scan_ahead.set_limit(limit)
+
+    def prefetch_input_batches(self, tasks: List[_Task]) -> None:
+        """Start loading spilled inputs of upcoming tasks on the background
+        I/O thread, as long as that does not require spilling."""
+        if self.io_executor is None:
+            return
+        reserved_space = sum(self.in_flight.values()) + self.scan_ahead_space()
+        for task in tasks:
+            for pred in task.preds:
+                if not isinstance(pred, _ApplyTask) or pred.batch is None:
+                    continue
+                batch = pred.batch
+                if batch.status == _BatchStatus.RESIDENT or batch in self.loading:
+                    continue
+                needed = self.resident_space + reserved_space + batch.space
+                if needed > self.max_resident:
+                    return
+                if self.verbose >= 2:
+                    print(f"prefetch {batch.X} {batch.y}")
+                self.loading[batch] = self.io_executor.submit(
+                    _read_spilled, self.spill_format, batch.X, batch.y
+                )
+                self.resident_space += batch.space
+                self.stats.prefetch_count += 1
+                self._trace_event("prefetch", batch)
+
+    def cancel_prefetch(self) -> None:
+        """Give up on prefetched batches to free their space. The batches
+        stay spilled, and their loads are discarded once they finish."""
+        for batch, future in self.loading.items():
+            future.cancel()
+            self.resident_space -= batch.space
+        self.loading.clear()
+
+
+def _read_spilled(
+    spill_format: SpillFormat,
+    path_X: pathlib.Path,
+    path_y: Optional[pathlib.Path],
+) -> Tuple[Any, Any]:
+    y = None if path_y is None else spill_format.read(path_y)
+    return spill_format.read(path_X), y
+
+
+def _run_apply(trained: TrainedIndividualOp, is_transform: bool, input_X, input_y):
+    if is_transform:
+        if trained.has_method("transform_X_y"):
+            return trained.transform_X_y(input_X, input_y)
+        return trained.transform(input_X), input_y
+    y_pred = trained.predict(input_X)
+    if isinstance(y_pred, np.ndarray) and input_y is not None:
+        y_pred = pd.Series(
+            y_pred,
+            cast(pd.Series, input_y).index,
+            cast(pd.Series, input_y).dtype,
+            "y_pred",
+        )
+    return input_X, y_pred
+
+
+def _run_fit(trainable: TrainableIndividualOp, list_X: List[Any], list_y: List[Any]):
+    if len(list_X) == 1:
+        input_X, input_y = list_X[0], list_y[0]
+    elif all(isinstance(X, pd.DataFrame) for X in list_X):
+        input_X = pd.concat(list_X)
+        input_y = pd.concat(list_y)
+    elif lale.helpers.spark_installed and all(
+        isinstance(X, SparkDataFrame) for X in list_X
+    ):
+        input_X = functools.reduce(lambda a, b: a.union(b), list_X)  # type: ignore
+        input_y = functools.reduce(lambda a, b: a.union(b), list_y)  # type: ignore
+    elif all(isinstance(X, np.ndarray) for X in list_X):
+        input_X = np.concatenate(list_X)
+        input_y = np.concatenate(list_y)
+    else:
+        raise ValueError(
+            f"""Input of {type(list_X[0])} is not supported for
+            fit on a non-incremental operator.
+            Supported types are: pandas DataFrame, numpy ndarray, and spark DataFrame."""
+        )
+    return trainable.fit(input_X, input_y)
+
+
+def _run_partial_fit(
+    trainee: TrainableIndividualOp,
+    input_X,
+    input_y,
+    unique_class_labels: List[Union[str, int, float]],
+):
+    if trainee.is_supervised():
+        return trainee.partial_fit(input_X, input_y, classes=unique_class_labels)
+    return trainee.partial_fit(input_X, input_y)
+
+
+def _run_to_monoid(factory: MonoidFactory, batch) -> Monoid:
+    return factory.to_monoid(batch)
+
+
+def _run_combine(monoids: List[Monoid]) -> Monoid:
+    return functools.reduce(lambda a, b: a.combine(b), monoids)
+
+
+def _run_timed(
+    function: Callable[..., Any], *args
+) -> Tuple[Any, float, float, Tuple[int, int]]:
+    start_time = time.time()
+    result = function(*args)
+    return result, start_time, time.time() - start_time, _current_worker()
+
+
+def _build_column_engines(data: Any) -> None:
+    """Pandas builds the hash table of the column index on the first column
+    lookup, which breaks when several worker threads read the same batch
+    at once, so do it up front on the scheduler thread."""
+    if isinstance(data, pd.DataFrame):
+        if len(data.columns) > 0:
+            _ = data.columns.get_loc(data.columns[0])
+    elif isinstance(data, (list, tuple)):
+        for item in data:
+            _build_column_engines(item)
+
+
+def _io_counts(stats: _RunStats) -> List[int]:
+    return [
+        int(stats.spill_count),
+        int(stats.spill_space),
+        int(stats.load_count),
+        int(stats.load_space),
+    ]
+
+
+_FOLD_COLUMN = "__lale_fold"
+_POSITION_COLUMN = "__lale_position"
+_PARTITION_COLUMN = "__lale_partition"
+
+
+def _spark_fold_of_rank(rank, fold_ends: np.ndarray):
+    """Fold of a row given its 0-based rank and the cumulative fold sizes."""
+    result = lit(0)
+    for end in fold_ends[:-1]:
+        result = result + when(rank >= int(end), 1).otherwise(0)
+    return result
+
+
+def _is_exactly(cv, cv_class) -> bool:
+    # subclasses may split differently, so only the class itself qualifies
+    return type(cv) is cv_class  # pylint: disable=unidiomatic-typecheck
+
+
+def _spark_assign_folds(cv, X, y):
+    """Spark DataFrame with the index columns of y and the fold of each
+    row, matching the test folds of unshuffled KFold or StratifiedKFold
+    without collecting the data on the driver. Rows of X and y are matched
+    by their index, which must be unique. Returns None for other cv,
+    including shuffled ones, or data without index columns."""
+    index_names = getattr(y, "index_names", None)
+    if index_names is None or getattr(X, "index_names", None) != index_names:
+        return None
+    label_names = [c for c in y.columns if c not in index_names]
+    n_splits = cv.get_n_splits()
+    y = y.withColumn(_POSITION_COLUMN, monotonically_increasing_id())
+    if _is_exactly(cv, sklearn.model_selection.KFold) and not cv.shuffle:
+        # rank rows within their partition and add the number of rows in
+        # earlier partitions, instead of a global window on one executor
+        y = y.withColumn(_PARTITION_COLUMN, spark_partition_id())
+        partition_counts = sorted(
+            (r[_PARTITION_COLUMN], r["count"])
+            for r in y.groupBy(_PARTITION_COLUMN).count().collect()
+        )
+        offsets = np.cumsum([0] + [n for _, n in partition_counts])
+        n_rows = int(offsets[-1])
+        offset_map = create_map(
+            *itertools.chain.from_iterable(
+                (lit(pid), lit(int(offset)))
+                for (pid, _), offset in zip(partition_counts, offsets)
+            )
+        )
+        rank_window = Window.partitionBy(_PARTITION_COLUMN).orderBy(_POSITION_COLUMN)
+        rank = offset_map[col(_PARTITION_COLUMN)] + row_number().over(rank_window) - 1
+        fold_sizes = np.full(n_splits, n_rows // n_splits)
+        fold_sizes[: n_rows % n_splits] += 1
+        fold = _spark_fold_of_rank(rank, np.cumsum(fold_sizes))
+    elif (
+        _is_exactly(cv, sklearn.model_selection.StratifiedKFold)
+        and not cv.shuffle
+        and len(label_names) == 1
+    ):
+        label = label_names[0]
+        classes = y.groupBy(label).agg(
+            spark_count(lit(1)).alias("count"),
+            spark_min(_POSITION_COLUMN).alias("first"),
+        )
+        # like sklearn, order classes by first occurrence
+        class_rows = sorted(classes.collect(), key=lambda r: r["first"])
+        class_counts = [r["count"] for r in class_rows]
+        if all(n_splits > c for c in class_counts):
+            raise ValueError(
+                f"n_splits={n_splits} cannot be greater than the number of members in each class."
+            )
+        y_order = np.repeat(np.arange(len(class_rows)), class_counts)
+        allocation = np.asarray(
+            [
+                np.bincount(y_order[i::n_splits], minlength=len(class_rows))
+                for i in range(n_splits)
+            ]
+        )
+        rank_window = Window.partitionBy(label).orderBy(_POSITION_COLUMN)
+        rank = row_number().over(rank_window) - 1
+        fold = None
+        for class_idx, class_row in enumerate(class_rows):
+            is_class = col(label) == class_row[label]
+            class_fold = _spark_fold_of_rank(rank, np.cumsum(allocation[:, class_idx]))
+            if fold is None:
+                fold = when(is_class, class_fold)
+            else:
+                fold = fold.when(is_class, class_fold)
+    else:
+        return None
+    return y.select(*index_names, fold.alias(_FOLD_COLUMN))
+
+
+def _spark_select_fold(data, folds, fold_idx: int):
+    """Rows of data in the given fold, in their original order."""
+    index_names = data.index_names
+    fold_rows = folds.where(col(_FOLD_COLUMN) == fold_idx).select(*index_names)
+    result = (
+        data.withColumn(_POSITION_COLUMN, monotonically_increasing_id())
+        .join(fold_rows, on=index_names, how="left_semi")
+        .orderBy(_POSITION_COLUMN)
+        .drop(_POSITION_COLUMN)
+    )
+    result = SparkDataFrameWithIndex(result, index_names)
+    return add_table_name(result, get_table_name(data))
+
 
 def _run_tasks_inner(
     tg: _TaskGraph,
@@ -1053,12 +2530,22 @@ def _run_tasks_inner(
     verbose: int,
     progress_callback: Optional[Callable[[float, float, int, bool], None]],
     call_depth: int,
+    executor: Optional[concurrent.futures.Executor],
+    n_workers: int,
+    trace: Optional[RunTrace] = None,
+    output_callback: Optional[Callable[[int, Any], int]] = None,
 ) -> None:
     for task in tg.all_tasks.values():
         assert task.status is not _TaskStatus.FRESH
-    n_batches_scanned = 0
+    n_batches_scanned = 0 if tg.checkpoint is None else tg.checkpoint.resume_from
     end_of_scanned_batches = False
-    ready_keys = {k for k, t in tg.all_tasks.items() if t.status is _TaskStatus.READY}
+    ready_queue = _ReadyQueue(prio)
+    for task in tg.all_tasks.values():
+        if task.status is _TaskStatus.READY:
+            ready_queue.push(task)
+    cache.ready_queue = ready_queue
+    running: Dict[concurrent.futures.Future, _Task] = {}
+    partial_fit_steps: Set[int] = set()  # steps with a running partial_fit
 
     def find_task(
         task_class: Type["_Task"], task_list: List[_Task]
@@ -1071,10 +2558,10 @@ def _run_tasks_inner(
 
     def try_to_delete_output(task: _Task) -> None:
         if task.deletable_output:
-            if all(s.status is _TaskStatus.DONE for s in task.succs):
+            if task.unfinished_succs == 0:
                 if isinstance(task, _ApplyTask):
                     if task.batch is not None:
-                        task.batch.delete_if_spilled()
+                        cache.remove(task.batch)
                     task.batch = None
                 elif isinstance(task, _TrainTask):
                     task.monoid = None
@@ -1089,44 +2576,44 @@ def _run_tasks_inner(
         try_to_delete_output(task)
         if task.status is _TaskStatus.DONE:
             return
-        if task.status is _TaskStatus.READY:
-            ready_keys.remove(task.memo_key())
         task.status = _TaskStatus.DONE
+        for pred in task.preds:
+            pred.unfinished_succs -= 1
+            if isinstance(pred, _ApplyTask) and pred.batch is not None:
+                cache.update(pred.batch)  # batch priority may have gone up
         for succ in task.succs:
+            succ.unfinished_preds -= 1
             if succ.status is _TaskStatus.WAITING:
                 if succ.can_be_ready(end_of_scanned_batches):
                     succ.status = _TaskStatus.READY
-                    ready_keys.add(succ.memo_key())
+                    ready_queue.push(succ)
         for pred in task.preds:
-            if all(s.status is _TaskStatus.DONE for s in pred.succs):
+            if pred.unfinished_succs == 0:
                 mark_done(pred)
         if isinstance(task, _TrainTask):
             if task.get_operation(tg.pipeline) is _Operation.TO_MONOID:
                 if task.monoid is not None and task.monoid.is_absorbing:
 
-                    def is_moot(task2):  # same modulo batch_ids
-                        type1, step1, _, hold1 = task.memo_key()
-                        type2, step2, _, hold2 = task2.memo_key()
-                        return type1 == type2 and step1 == step2 and hold1 == hold2
-
                     task_monoid = task.monoid  # prevent accidental None assignment
-                    for task2 in tg.all_tasks.values():
-                        if task2.status is not _TaskStatus.DONE and is_moot(task2):
+                    step_key = type(task), task.step_id, task.held_out
+                    # same modulo batch_ids
+                    for task2 in list(tg.tasks_by_step[step_key]):
+                        if task2.status is not _TaskStatus.DONE:
                             assert isinstance(task2, _TrainTask)
                             task2.monoid = task_monoid
                             mark_done(task2)
 
-    trace: Optional[List[_TraceRecord]] = [] if verbose >= 2 else None
-    batches_iterator = iter(batches_train)
-    while len(ready_keys) > 0:
-        task = tg.all_tasks[
-            min(ready_keys, key=lambda k: prio.task_priority(tg.all_tasks[k]))
-        ]
-        if verbose >= 3:
-            tg.visualize(prio, call_depth + 1, trace)
-            print(_task_to_string(task, tg.pipeline, sep=" "))
+    def can_start(task: _Task) -> bool:
+        if task.step_id in partial_fit_steps:
+            return task.get_operation(tg.pipeline) is not _Operation.PARTIAL_FIT
+        return True
+
+    def start(task: _Task) -> Optional[Tuple[Callable[..., Any], Tuple[Any, ...]]]:
+        """Run the task right away if it is cheap or has side effects on
+        the scheduler state, otherwise return the function and arguments
+        for the actual computation, which may be run by a worker."""
+        nonlocal n_batches_scanned, end_of_scanned_batches
         operation = task.get_operation(tg.pipeline)
-        start_time = time.time() if verbose >= 2 else float("nan")
         if operation is _Operation.SCAN:
             assert not end_of_scanned_batches
             assert isinstance(task, _ApplyTask)
@@ -1135,6 +2622,7 @@ def _run_tasks_inner(
             try:
                 X, y = next(batches_iterator)
                 task.batch = _Batch(X, y, task)
+                cache.add(task.batch)
                 n_batches_scanned += 1
                 _ = tg.find_or_create(
                     _ApplyTask,
@@ -1142,6 +2630,17 @@ def _run_tasks_inner(
                     (_batch_id(_get_fold(task.batch_ids[0]), n_batches_scanned),),
                     None,
                 )
+                if tg.output_step_id is not None:
+                    _ = tg.find_or_create(
+                        _ApplyTask,
+                        tg.output_step_id,
+                        (
+                            _batch_id(
+                                _get_fold(task.batch_ids[0]), n_batches_scanned - 1
+                            ),
+                        ),
+                        None,
+                    )
             except StopIteration:
                 end_of_scanned_batches = True
                 assert n_batches_scanned >= 1
@@ -1151,10 +2650,12 @@ def _run_tasks_inner(
                     tg.fresh_tasks.append(task_with_ab)
                 else:
                     assert task_with_ab.status is _TaskStatus.DONE
-            _backward_chain_tasks(tg, n_batches_scanned, end_of_scanned_batches)
-            ready_keys = {
-                k for k, t in tg.all_tasks.items() if t.status is _TaskStatus.READY
-            }
+            for ready_task in _backward_chain_tasks(
+                tg, n_batches_scanned, end_of_scanned_batches
+            ):
+                ready_queue.push(ready_task)
+            if tg.checkpoint is not None:
+                tg.checkpoint.save_if_due(tg, n_batches_scanned)
         elif operation is _Operation.SPLIT:
             assert isinstance(task, _ApplyTask)
             assert len(task.batch_ids) == 1 and len(task.preds) == 1
@@ -1164,21 +2665,31 @@ def _run_tasks_inner(
             assert scan_pred.batch is not None
             cache.ensure_space(cache.estimate_space(task), {scan_pred.batch})
             input_X, input_y = scan_pred.batch.Xy
+            fold_idx = ord(_get_fold(batch_id)) - ord("d")
             is_sparky = lale.helpers.spark_installed and isinstance(
                 input_X, SparkDataFrame
             )
-            if is_sparky:  # TODO: use Spark native split instead
-                input_X, input_y = input_X.toPandas(), input_y.toPandas().squeeze()
-            if scan_pred.splits is None:
-                scan_pred.splits = list(cv.split(input_X, input_y))
-            train, test = scan_pred.splits[ord(_get_fold(batch_id)) - ord("d")]
-            dummy_estimator = sklearn.tree.DecisionTreeClassifier()
-            output_X, output_y = lale.helpers.split_with_schemas(
-                dummy_estimator, input_X, input_y, test, train
-            )
-            if is_sparky:  # TODO: use Spark native split instead
-                output_X, output_y = pandas2spark(output_X), pandas2spark(output_y)
+            if is_sparky and scan_pred.splits is None:
+                scan_pred.splits = _spark_assign_folds(cv, input_X, input_y)
+            if is_sparky and scan_pred.splits is not None:
+                output_X = _spark_select_fold(input_X, scan_pred.splits, fold_idx)
+                output_y = _spark_select_fold(input_y, scan_pred.splits, fold_idx)
+            else:
+                if is_sparky:  # cv not supported natively, split on driver
+                    input_X = input_X.toPandas()
+                    input_y = input_y.toPandas().squeeze()
+                if scan_pred.splits is None:
+                    scan_pred.splits = list(cv.split(input_X, input_y))
+                train, test = scan_pred.splits[fold_idx]
+                dummy_estimator = sklearn.tree.DecisionTreeClassifier()
+                output_X, output_y = lale.helpers.split_with_schemas(
+                    dummy_estimator, input_X, input_y, test, train
+                )
+                if is_sparky:
+                    output_X = pandas2spark(output_X)
+                    output_y = pandas2spark(output_y)
             task.batch = _Batch(output_X, output_y, task)
+            cache.add(task.batch)
         elif operation in [_Operation.TRANSFORM, _Operation.PREDICT]:
             assert isinstance(task, _ApplyTask)
             assert len(task.batch_ids) == 1
@@ -1196,23 +2707,11 @@ def _run_tasks_inner(
                 # use it from any one of them.
                 input_y = cast(_Batch, apply_preds[0].batch).y
             no_spill_set = cast(Set[_Batch], set(t.batch for t in apply_preds))
-            cache.ensure_space(cache.estimate_space(task), no_spill_set)
-            if operation is _Operation.TRANSFORM:
-                if trained.has_method("transform_X_y"):
-                    output_X, output_y = trained.transform_X_y(input_X, input_y)
-                else:
-                    output_X, output_y = trained.transform(input_X), input_y
-                task.batch = _Batch(output_X, output_y, task)
-            else:
-                y_pred = trained.predict(input_X)
-                if isinstance(y_pred, np.ndarray):
-                    y_pred = pd.Series(
-                        y_pred,
-                        cast(pd.Series, input_y).index,
-                        cast(pd.Series, input_y).dtype,
-                        "y_pred",
-                    )
-                task.batch = _Batch(input_X, y_pred, task)
+            output_space = cache.estimate_space(task)
+            cache.ensure_space(output_space, no_spill_set)
+            cache.acquire(task, output_space)
+            is_transform = operation is _Operation.TRANSFORM
+            return _run_apply, (trained, is_transform, input_X, input_y)
         elif operation is _Operation.FIT:
             assert isinstance(task, _TrainTask)
             assert all(isinstance(p, _ApplyTask) for p in task.preds)
@@ -1225,31 +2724,12 @@ def _run_tasks_inner(
                     task.trained = cast(TrainedIndividualOp, trainable)
             else:
                 cache.load_input_batches(task)
-                if len(task.preds) == 1:
-                    input_X, input_y = cast(_Batch, apply_preds[0].batch).Xy
-                else:
+                if len(task.preds) > 1:
                     assert not is_incremental(trainable)
-                    list_X = [cast(_Batch, p.batch).X for p in apply_preds]
-                    list_y = [cast(_Batch, p.batch).y for p in apply_preds]
-                    if all(isinstance(X, pd.DataFrame) for X in list_X):
-                        input_X = pd.concat(list_X)
-                        input_y = pd.concat(list_y)
-                    elif lale.helpers.spark_installed and all(
-                        isinstance(X, SparkDataFrame) for X in list_X
-                    ):
-                        input_X = functools.reduce(lambda a, b: a.union(b), list_X)  # type: ignore
-                        input_y = functools.reduce(lambda a, b: a.union(b), list_y)  # type: ignore
-                    elif all(isinstance(X, np.ndarray) for X in list_X):
-                        input_X = np.concatenate(list_X)
-                        input_y = np.concatenate(list_y)
-                    else:
-                        raise ValueError(
-                            f"""Input of {type(list_X[0])} is not supported for
-                            fit on a non-incremental operator.
-                            Supported types are: pandas DataFrame, numpy ndarray, and spark DataFrame."""
-                        )
-
-                task.trained = trainable.fit(input_X, input_y)
+                list_X = [cast(_Batch, p.batch).X for p in apply_preds]
+                list_y = [cast(_Batch, p.batch).y for p in apply_preds]
+                cache.acquire(task, 0)
+                return _run_fit, (trainable, list_X, list_y)
         elif operation is _Operation.PARTIAL_FIT:
             assert isinstance(task, _TrainTask)
             if task.has_all_batches():
@@ -1270,30 +2750,84 @@ def _run_tasks_inner(
                 assert apply_pred.batch is not None
                 cache.load_input_batches(task)
                 input_X, input_y = apply_pred.batch.Xy
-                if trainee.is_supervised():
-                    task.trained = trainee.partial_fit(
-                        input_X, input_y, classes=unique_class_labels
-                    )
-                else:
-                    task.trained = trainee.partial_fit(input_X, input_y)
+                cache.acquire(task, 0)
+                # partial_fit may update the trainee in-place
+                partial_fit_steps.add(task.step_id)
+                return _run_partial_fit, (
+                    trainee,
+                    input_X,
+                    input_y,
+                    unique_class_labels,
+                )
         elif operation is _Operation.TO_MONOID:
             assert len(task.batch_ids) == 1
             assert all(isinstance(p, _ApplyTask) for p in task.preds)
             assert all(cast(_ApplyTask, p).batch is not None for p in task.preds)
             cache.load_input_batches(task)
+            cache.acquire(task, 0)
             if isinstance(task, _TrainTask):
                 assert len(task.preds) == 1
                 trainable = tg.pipeline.steps_list()[task.step_id]
                 input_X, input_y = task.preds[0].batch.Xy  # type: ignore
-                task.monoid = trainable.impl.to_monoid((input_X, input_y))
+                return _run_to_monoid, (trainable.impl, (input_X, input_y))
             elif isinstance(task, _MetricTask):
                 assert len(task.preds) == 2
                 assert task.preds[0].step_id == _DUMMY_INPUT_STEP
                 assert scoring is not None
                 X, y_true = task.preds[0].batch.Xy  # type: ignore
                 y_pred = task.preds[1].batch.y  # type: ignore
-                task.mmonoid = scoring.to_monoid((y_true, y_pred, X))
-                if progress_callback is not None:
+                return _run_to_monoid, (scoring, (y_true, y_pred, X))
+            else:
+                assert False, type(task)
+        elif operation is _Operation.COMBINE:
+            cache.load_input_batches(task)
+            cache.acquire(task, 0)
+            if isinstance(task, _TrainTask):
+                assert all(isinstance(p, _TrainTask) for p in task.preds)
+                monoids = [cast(_TrainTask, p).monoid for p in task.preds]
+            elif isinstance(task, _MetricTask):
+                monoids = [cast(_MetricTask, p).mmonoid for p in task.preds]
+            else:
+                assert False, type(task)
+            return _run_combine, (monoids,)
+        else:
+            assert False, operation
+        return None
+
+    def finish(
+        task: _Task,
+        result: Any,
+        task_start: float,
+        task_time: float,
+        worker: Tuple[int, int],
+    ) -> None:
+        operation = task.get_operation(tg.pipeline)
+        if task in cache.in_flight:
+            cache.release(task)
+        if operation is _Operation.PARTIAL_FIT:
+            partial_fit_steps.discard(task.step_id)
+        if task.status is _TaskStatus.DONE:
+            return  # made moot by an absorbing monoid while it was running
+        if operation in [_Operation.TRANSFORM, _Operation.PREDICT]:
+            assert isinstance(task, _ApplyTask)
+            output_X, output_y = result
+            task.batch = _Batch(output_X, output_y, task)
+            cache.add(task.batch)
+            if task.step_id == tg.output_step_id and output_callback is not None:
+                output = output_y if operation is _Operation.PREDICT else output_X
+                held_space = output_callback(_get_idx(task.batch_ids[0]), output)
+                cache.set_held_space(held_space)
+        elif operation in [_Operation.FIT, _Operation.PARTIAL_FIT]:
+            assert isinstance(task, _TrainTask)
+            if result is not None:
+                task.trained = result
+        elif operation in [_Operation.TO_MONOID, _Operation.COMBINE]:
+            if isinstance(task, _TrainTask):
+                task.monoid = result
+            elif isinstance(task, _MetricTask):
+                task.mmonoid = result
+                if operation is _Operation.TO_MONOID and progress_callback is not None:
+                    assert scoring is not None
                     if batches_valid is None or len(batches_valid) == 0:
                         score_valid = float("nan")
                     else:
@@ -1311,29 +2845,97 @@ def _run_tasks_inner(
                     )
             else:
                 assert False, type(task)
-        elif operation is _Operation.COMBINE:
-            cache.load_input_batches(task)
-            if isinstance(task, _TrainTask):
-                assert all(isinstance(p, _TrainTask) for p in task.preds)
-                trainable = tg.pipeline.steps_list()[task.step_id]
-                monoids = (cast(_TrainTask, p).monoid for p in task.preds)
-                task.monoid = functools.reduce(lambda a, b: a.combine(b), monoids)  # type: ignore
-            elif isinstance(task, _MetricTask):
-                scores = (cast(_MetricTask, p).mmonoid for p in task.preds)
-                task.mmonoid = functools.reduce(lambda a, b: a.combine(b), scores)  # type: ignore
-            else:
-                assert False, type(task)
-        else:
-            assert False, operation
-        if verbose >= 2:
-            finish_time = time.time()
-            assert trace is not None
-            trace.append(_TraceRecord(task, finish_time - start_time))
+        prio.record_task(task, task_time)
+        if tg.checkpoint is not None:
+            tg.checkpoint.write(task)
+        if trace is not None:
+            space_in, spills, loads = task2io.pop(task)
+            record = _TraceRecord(
+                task,
+                task_time,
+                operation.name.lower(),
+                _step_id_to_string(task.step_id, tg.pipeline),
+                task_start,
+                trace._lane(worker),
+                space_in,
+                spills,
+                loads,
+            )
+            trace.records.append(record)
         mark_done(task)
+
+    if trace is None and verbose >= 2:
+        trace = RunTrace()
+    task2io: Dict[_Task, Tuple[int, Tuple[int, int], Tuple[int, int]]] = {}
+    if trace is not None:
+        cache.trace, cache.trace_lane = trace, trace._start_run()
+    stats = cache.stats
+    if hasattr(batches_train, "set_run_stats"):  # loader with adaptive batch size
+        batches_train.set_run_stats(cache.stats)  # type: ignore
+    if tg.checkpoint is not None:
+        if all(t.status is _TaskStatus.DONE for t in tg.tasks_with_all_batches):
+            return  # all results were restored from the checkpoint
+        if n_batches_scanned > 0:
+            batches_train = itertools.islice(batches_train, n_batches_scanned, None)
+    batches_iterator: Iterator[Tuple[Any, Any]]
+    if cache.prefetch > 0:
+        cache.scan_ahead = _ScanAhead(batches_train, 0)
+        cache.limit_scan_ahead()
+        batches_iterator = cache.scan_ahead
+    else:
+        batches_iterator = iter(batches_train)
+    try:
+        while True:
+            while len(running) < n_workers:
+                next_task = ready_queue.peek(can_start)
+                if next_task is None or not cache.has_space_for(next_task):
+                    break
+                task = next_task
+                if verbose >= 3:
+                    tg.visualize(prio, call_depth + 1, trace.records)  # type: ignore
+                    print(_task_to_string(task, tg.pipeline, sep=" "))
+                task.status = _TaskStatus.RUNNING
+                if trace is not None:
+                    space_in = sum(
+                        p.batch.space
+                        for p in task.preds
+                        if isinstance(p, _ApplyTask) and p.batch is not None
+                    )
+                    io_before = _io_counts(stats)
+                start_time = time.time()
+                job = start(task)
+                if trace is not None:
+                    io = [a - b for a, b in zip(_io_counts(stats), io_before)]
+                    task2io[task] = (space_in, (io[0], io[1]), (io[2], io[3]))
+                if job is not None and cache.prefetch > 0:
+                    upcoming = ready_queue.peek_many(cache.prefetch, can_start)
+                    cache.prefetch_input_batches(upcoming)
+                    cache.limit_scan_ahead()
+                if job is None:
+                    task_time = time.time() - start_time
+                    finish(task, None, start_time, task_time, _current_worker())
+                elif executor is None:
+                    finish(task, *_run_timed(job[0], *job[1]))
+                else:
+                    _build_column_engines(job[1])
+                    running[executor.submit(_run_timed, job[0], *job[1])] = task
+            if len(running) == 0:
+                break
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                finish(running.pop(future), *future.result())
+    finally:
+        if cache.scan_ahead is not None:
+            cache.scan_ahead.close()
+            cache.scan_ahead = None
+        if tg.checkpoint is not None:
+            tg.checkpoint.save(tg, n_batches_scanned)
     if verbose >= 2:
-        tg.visualize(prio, call_depth + 1, trace)
         assert trace is not None
-        print(_analyze_run_trace(cache.stats, trace))
+        tg.visualize(prio, call_depth + 1, trace.records)
+        print(_analyze_run_trace(cache.stats, trace.records))
 
 
 def _run_tasks(
@@ -1348,23 +2950,38 @@ def _run_tasks(
     verbose: int,
     progress_callback: Optional[Callable[[float, float, int, bool], None]],
     call_depth: int,
+    n_jobs: Optional[int] = None,
+    executor: str = "thread",
+    spill_format: Optional[SpillFormat] = None,
+    prefetch: int = 0,
+    trace: Optional[RunTrace] = None,
+    output_callback: Optional[Callable[[int, Any], int]] = None,
 ) -> None:
     if scoring is None and progress_callback is not None:
         logger.warning("progress_callback only gets called if scoring is not None")
-    with _BatchCache(tg.all_tasks, max_resident, prio, verbose) as cache:
-        _run_tasks_inner(
-            tg,
-            batches_train,
-            batches_valid,
-            scoring,
-            cv,
-            unique_class_labels,
-            cache,
-            prio,
-            verbose,
-            progress_callback,
-            call_depth + 1,
-        )
+    pool = _create_executor(executor, n_jobs)
+    try:
+        with _BatchCache(max_resident, prio, verbose, spill_format, prefetch) as cache:
+            _run_tasks_inner(
+                tg,
+                batches_train,
+                batches_valid,
+                scoring,
+                cv,
+                unique_class_labels,
+                cache,
+                prio,
+                verbose,
+                progress_callback,
+                call_depth + 1,
+                pool,
+                _n_workers(n_jobs) if pool is not None else 1,
+                trace,
+                output_callback,
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
 
 def fit_with_batches(
@@ -1378,13 +2995,179 @@ def fit_with_batches(
     partial_transform: Union[bool, str],
     verbose: int,
     progress_callback: Optional[Callable[[float, float, int, bool], None]],
+    n_jobs: Optional[int] = None,
+    executor: str = "thread",
+    spill_format: Optional[SpillFormat] = None,
+    prefetch: int = 0,
+    combine_fan_in: Optional[int] = None,
+    checkpoint_dir: Optional[Union[str, pathlib.Path]] = None,
+    trace: Optional[RunTrace] = None,
+) -> TrainedPipeline[TrainedIndividualOp]:
+    """Replacement for the `fit` method on a pipeline (early interface, subject to change).
+
+    With `n_jobs` other than None or 1, independent ready tasks run
+    concurrently on a pool of that many workers (-1 means all cores),
+    using threads if `executor` is "thread" or processes if it is
+    "process". The process pool requires picklable operators and data.
+
+    When intermediate batches exceed `max_resident`, they are spilled to
+    disk using `spill_format`, which defaults to `SpillPickle`.
+
+    With `prefetch` greater than 0, a background thread reads up to that
+    many batches ahead from `batches_train`, and spilled inputs of that
+    many upcoming tasks are loaded in the background, to the extent that
+    they fit in `max_resident` without spilling other batches.
+
+    By default, the monoids of all batches for a step are combined by a
+    single task. With `combine_fan_in` set to an integer k >= 2, they are
+    instead combined by a balanced tree of tasks with k inputs each, which
+    can run concurrently and while batches are still being scanned.
+
+    With `checkpoint_dir` set to a directory, the outputs of finished train
+    and metric tasks are saved there as the run progresses. Calling the
+    function again with the same arguments and directory, for example after
+    an interruption, skips the finished tasks and resumes scanning at the
+    first batch that is still needed. The saved files get loaded with
+    pickle, so only resume from a checkpoint directory that you trust.
+
+    With `trace` set to a `RunTrace`, every finished task gets recorded
+    there for profiling."""
+    return _fit_with_batches(
+        pipeline,
+        batches_train,
+        batches_valid,
+        scoring,
+        unique_class_labels,
+        max_resident,
+        prio,
+        partial_transform,
+        verbose,
+        progress_callback,
+        call_depth=2,
+        n_jobs=n_jobs,
+        executor=executor,
+        spill_format=spill_format,
+        prefetch=prefetch,
+        combine_fan_in=combine_fan_in,
+        checkpoint_dir=checkpoint_dir,
+        trace=trace,
+    )
+
+
+def refit_with_batches(
+    pipeline: TrainedPipeline[TrainedIndividualOp],
+    batches_train: Iterable[Tuple[Any, Any]],
+    batches_valid: Optional[List[Tuple[Any, Any]]],
+    scoring: Optional[MetricMonoidFactory],
+    unique_class_labels: List[Union[str, int, float]],
+    max_resident: Optional[int],
+    prio: Prio,
+    partial_transform: Union[bool, str],
+    verbose: int,
+    progress_callback: Optional[Callable[[float, float, int, bool], None]],
+    n_jobs: Optional[int] = None,
+    executor: str = "thread",
+    spill_format: Optional[SpillFormat] = None,
+    prefetch: int = 0,
+    combine_fan_in: Optional[int] = None,
+    monoids: Optional[List[Optional[Monoid]]] = None,
+    trace: Optional[RunTrace] = None,
+) -> TrainedPipeline[TrainedIndividualOp]:
+    """Update a trained pipeline with new batches only (early interface, subject to change).
+
+    For associative steps, the monoids of the new batches get combined
+    with the monoids from earlier training, which come from `monoids` if
+    given (one per step in `steps_list()` order, None to use the step's
+    own) or from the trained steps. Incremental steps continue with
+    `partial_fit` from a copy of the trained step. Other steps would need
+    all data and raise a ValueError, unless they are frozen.
+
+    Downstream steps see the new batches transformed by the updated
+    upstream steps, whereas their earlier monoids were computed with the
+    earlier upstream steps, so the result can differ from fitting on all
+    data at once, like with `partial_transform`. The other arguments work
+    like for `fit_with_batches`."""
+    steps = pipeline.steps_list()
+    if monoids is not None and len(monoids) != len(steps):
+        raise ValueError(f"expected {len(steps)} monoids, got {len(monoids)}")
+    prior_monoids: Dict[int, Monoid] = {}
+    has_incremental = False
+    for step_id, step in enumerate(steps):
+        if is_pretrained(step):
+            continue
+        if is_associative(step):
+            monoid = None if monoids is None else monoids[step_id]
+            if monoid is None:
+                monoid = getattr(step.impl, "_monoid", None)
+            if monoid is None:
+                raise ValueError(
+                    f"Cannot refit step {step.name()} without a monoid from earlier training."
+                )
+            prior_monoids[step_id] = monoid
+        elif is_incremental(step) and isinstance(step, TrainedIndividualOp):
+            has_incremental = True
+        else:
+            raise ValueError(
+                f"Cannot refit step {step.name()} with new batches only, since it is neither associative nor trained and incremental."
+            )
+    if has_incremental:  # partial_fit updates the trainee in-place
+        pipeline = copy.deepcopy(pipeline)
+    return _fit_with_batches(
+        pipeline,
+        batches_train,
+        batches_valid,
+        scoring,
+        unique_class_labels,
+        max_resident,
+        prio,
+        partial_transform,
+        verbose,
+        progress_callback,
+        call_depth=2,
+        n_jobs=n_jobs,
+        executor=executor,
+        spill_format=spill_format,
+        prefetch=prefetch,
+        combine_fan_in=combine_fan_in,
+        prior_monoids=prior_monoids,
+        trace=trace,
+    )
+
+
+def _fit_with_batches(
+    pipeline: TrainablePipeline[TrainableIndividualOp],
+    batches_train: Iterable[Tuple[Any, Any]],
+    batches_valid: Optional[List[Tuple[Any, Any]]],
+    scoring: Optional[MetricMonoidFactory],
+    unique_class_labels: List[Union[str, int, float]],
+    max_resident: Optional[int],
+    prio: Prio,
+    partial_transform: Union[bool, str],
+    verbose: int,
+    progress_callback: Optional[Callable[[float, float, int, bool], None]],
+    call_depth: int,
+    n_jobs: Optional[int] = None,
+    executor: str = "thread",
+    spill_format: Optional[SpillFormat] = None,
+    prefetch: int = 0,
+    combine_fan_in: Optional[int] = None,
+    checkpoint_dir: Optional[Union[str, pathlib.Path]] = None,
+    prior_monoids: Optional[Dict[int, Monoid]] = None,
+    trace: Optional[RunTrace] = None,
 ) -> TrainedPipeline[TrainedIndividualOp]:
-    """Replacement for the `fit` method on a pipeline (early interface, subject to change)."""
     assert partial_transform in [False, "score", True]
     need_metrics = scoring is not None
     folds = ["d"]
     with _create_tasks(
-        pipeline, folds, need_metrics, True, partial_transform, False
+        pipeline,
+        folds,
+        need_metrics,
+        True,
+        partial_transform,
+        False,
+        combine_fan_in,
+        checkpoint_dir,
+        prior_monoids=prior_monoids,
     ) as tg:
         _run_tasks(
             tg,
@@ -1397,14 +3180,22 @@ def fit_with_batches(
             prio,
             verbose,
             progress_callback,
-            call_depth=2,
+            call_depth=call_depth + 1,
+            n_jobs=n_jobs,
+            executor=executor,
+            spill_format=spill_format,
+            prefetch=prefetch,
+            trace=trace,
         )
         trained_pipeline = tg.extract_trained_pipeline(None, _ALL_BATCHES)
     return trained_pipeline
 
 
 def cross_val_score(
-    pipeline: TrainablePipeline[TrainableIndividualOp],
+    pipeline: Union[
+        TrainablePipeline[TrainableIndividualOp],
+        List[TrainablePipeline[TrainableIndividualOp]],
+    ],
     batches: Iterable[Tuple[Any, Any]],
     scoring: MetricMonoidFactory,
     cv,
@@ -1413,14 +3204,40 @@ def cross_val_score(
     prio: Prio,
     same_fold: bool,
     verbose: int,
-) -> List[float]:
+    n_jobs: Optional[int] = None,
+    executor: str = "thread",
+    spill_format: Optional[SpillFormat] = None,
+    prefetch: int = 0,
+    combine_fan_in: Optional[int] = None,
+    checkpoint_dir: Optional[Union[str, pathlib.Path]] = None,
+    trace: Optional[RunTrace] = None,
+) -> Union[List[float], List[List[float]]]:
     """Replacement for sklearn's `cross_val_score`_ function (early interface, subject to change).
 
+    The `n_jobs`, `executor`, `spill_format`, `prefetch`, `combine_fan_in`,
+    `checkpoint_dir`, and `trace` arguments work like for `fit_with_batches`.
+
+    If `pipeline` is a list of candidate pipelines, they are evaluated
+    together in a single task graph and the result is a list of scores per
+    candidate. Steps with the same class and hyperparameters on the same
+    prefix are shared between candidates, so their tasks run only once
+    and all candidates get scored with one scan over the batches.
+
     .. _`cross_val_score`: https://scikit-learn.org/stable/modules/generated/sklearn.model_selection.cross_val_score.html
     """
     cv = sklearn.model_selection.check_cv(cv)
     folds = [chr(ord("d") + i) for i in range(cv.get_n_splits())]
-    with _create_tasks(pipeline, folds, True, False, False, same_fold) as tg:
+    with _create_tasks(
+        pipeline,
+        folds,
+        True,
+        False,
+        False,
+        same_fold,
+        combine_fan_in,
+        checkpoint_dir,
+        cv,
+    ) as tg:
         _run_tasks(
             tg,
             batches,
@@ -1433,13 +3250,25 @@ def cross_val_score(
             verbose,
             None,
             call_depth=2,
+            n_jobs=n_jobs,
+            executor=executor,
+            spill_format=spill_format,
+            prefetch=prefetch,
+            trace=trace,
         )
-        scores = tg.extract_scores(scoring)
+        scores: Union[List[float], List[List[float]]]
+        if isinstance(pipeline, list):
+            scores = [tg.extract_scores(scoring, i) for i in range(len(pipeline))]
+        else:
+            scores = tg.extract_scores(scoring)
     return scores
 
 
 def cross_validate(
-    pipeline: TrainablePipeline[TrainableIndividualOp],
+    pipeline: Union[
+        TrainablePipeline[TrainableIndividualOp],
+        List[TrainablePipeline[TrainableIndividualOp]],
+    ],
     batches: Iterable[Tuple[Any, Any]],
     scoring: MetricMonoidFactory,
     cv,
@@ -1449,14 +3278,39 @@ def cross_validate(
     same_fold: bool,
     return_estimator: bool,
     verbose: int,
-) -> Dict[str, Union[List[float], List[TrainedPipeline]]]:
+    n_jobs: Optional[int] = None,
+    executor: str = "thread",
+    spill_format: Optional[SpillFormat] = None,
+    prefetch: int = 0,
+    combine_fan_in: Optional[int] = None,
+    checkpoint_dir: Optional[Union[str, pathlib.Path]] = None,
+    trace: Optional[RunTrace] = None,
+) -> Union[
+    Dict[str, Union[List[float], List[TrainedPipeline]]],
+    List[Dict[str, Union[List[float], List[TrainedPipeline]]]],
+]:
     """Replacement for sklearn's `cross_validate`_ function (early interface, subject to change).
 
+    The `n_jobs`, `executor`, `spill_format`, `prefetch`, `combine_fan_in`,
+    `checkpoint_dir`, and `trace` arguments work like for `fit_with_batches`.
+    If `pipeline` is a list of candidate pipelines, the result is a list
+    with one dictionary per candidate, see `cross_val_score`.
+
     .. _`cross_validate`: https://scikit-learn.org/stable/modules/generated/sklearn.model_selection.cross_validate.html
     """
     cv = sklearn.model_selection.check_cv(cv)
     folds = [chr(ord("d") + i) for i in range(cv.get_n_splits())]
-    with _create_tasks(pipeline, folds, True, return_estimator, False, same_fold) as tg:
+    with _create_tasks(
+        pipeline,
+        folds,
+        True,
+        return_estimator,
+        False,
+        same_fold,
+        combine_fan_in,
+        checkpoint_dir,
+        cv,
+    ) as tg:
         _run_tasks(
             tg,
             batches,
@@ -1469,12 +3323,142 @@ def cross_validate(
             verbose,
             None,
             call_depth=2,
+            n_jobs=n_jobs,
+            executor=executor,
+            spill_format=spill_format,
+            prefetch=prefetch,
+            trace=trace,
         )
-        result: Dict[str, Union[List[float], List[TrainedPipeline]]] = {}
-        result["test_score"] = tg.extract_scores(scoring)
-        if return_estimator:
-            result["estimator"] = [
-                tg.extract_trained_pipeline(held_out, _ALL_BATCHES)
-                for held_out in tg.folds
-            ]
-    return result
+        results: List[Dict[str, Union[List[float], List[TrainedPipeline]]]] = []
+        for candidate in range(len(tg.candidates)):
+            result: Dict[str, Union[List[float], List[TrainedPipeline]]] = {}
+            result["test_score"] = tg.extract_scores(scoring, candidate)
+            if return_estimator:
+                result["estimator"] = [
+                    tg.extract_trained_pipeline(held_out, _ALL_BATCHES, candidate)
+                    for held_out in tg.folds
+                ]
+            results.append(result)
+    if isinstance(pipeline, list):
+        return results
+    return results[0]
+
+
+def predict_with_batches(
+    pipeline: TrainedPipeline[TrainedIndividualOp],
+    batches: Iterable[Tuple[Any, Any]],
+    max_resident: Optional[int],
+    prio: Prio,
+    verbose: int,
+    n_jobs: Optional[int] = None,
+    executor: str = "thread",
+    spill_format: Optional[SpillFormat] = None,
+    prefetch: int = 0,
+    trace: Optional[RunTrace] = None,
+    sink: Optional[lale.helpers.BatchSink] = None,
+) -> Any:
+    """Replacement for the `predict` method on a trained pipeline (early interface, subject to change).
+
+    The batches are (X, y) tuples, where y may be None. If the last step
+    of the pipeline is a transformer, the result is its transformed X
+    instead of predictions. The `max_resident`, `prio`, `n_jobs`,
+    `executor`, `spill_format`, `prefetch`, and `trace` arguments work
+    like for `fit_with_batches`.
+
+    With `sink` set to a `lale.helpers.BatchSink`, the output batches get
+    written to it in order as they become available and the result is
+    that of closing the sink, otherwise they get concatenated in memory."""
+    outputs: List[Any] = []  # unless they get written to the sink
+    pending: Dict[int, Tuple[Any, int]] = {}  # finished out of order, with space
+    pending_space = 0
+    n_outputs = 0
+
+    def output_callback(idx: int, output: Any) -> int:
+        """Returns the space of pending outputs, which count against max_resident."""
+        nonlocal n_outputs, pending_space
+        space = _estimate_space(output)
+        pending[idx] = (output, space)
+        pending_space += space
+        while n_outputs in pending:
+            next_output, space = pending.pop(n_outputs)
+            pending_space -= space
+            if sink is None:
+                outputs.append(next_output)
+            else:
+                sink.write(next_output)
+            n_outputs += 1
+        return pending_space
+
+    with _create_tasks(
+        pipeline, ["d"], False, False, False, False, is_trained=True
+    ) as tg:
+        sink_step = pipeline.get_last()
+        if sink_step is None:
+            raise ValueError("predict_with_batches expects a pipeline with one sink")
+        tg.output_step_id = tg.step_ids[sink_step]
+        _run_tasks(
+            tg,
+            batches,
+            None,
+            None,
+            None,
+            [],
+            max_resident,
+            prio,
+            verbose,
+            None,
+            call_depth=2,
+            n_jobs=n_jobs,
+            executor=executor,
+            spill_format=spill_format,
+            prefetch=prefetch,
+            trace=trace,
+            output_callback=output_callback,
+        )
+    assert len(pending) == 0
+    if sink is not None:
+        return sink.close()
+    return lale.helpers.concat_batches(outputs)
+
+
+def score_with_batches(
+    pipeline: TrainedPipeline[TrainedIndividualOp],
+    batches: Iterable[Tuple[Any, Any]],
+    scoring: MetricMonoidFactory,
+    max_resident: Optional[int],
+    prio: Prio,
+    verbose: int,
+    n_jobs: Optional[int] = None,
+    executor: str = "thread",
+    spill_format: Optional[SpillFormat] = None,
+    prefetch: int = 0,
+    trace: Optional[RunTrace] = None,
+) -> float:
+    """Replacement for the `score` method on a trained pipeline (early interface, subject to change).
+
+    Computes the metric in a single pass over the (X, y) batches by
+    combining the monoids of `scoring`. The other arguments work like
+    for `predict_with_batches`."""
+    with _create_tasks(
+        pipeline, ["d"], True, False, False, False, is_trained=True
+    ) as tg:
+        _run_tasks(
+            tg,
+            batches,
+            None,
+            scoring,
+            None,
+            [],
+            max_resident,
+            prio,
+            verbose,
+            None,
+            call_depth=2,
+            n_jobs=n_jobs,
+            executor=executor,
+            spill_format=spill_format,
+            prefetch=prefetch,
+            trace=trace,
+        )
+        score = tg.extract_scores(scoring)[0]
+    return score
@@ -152,7 +152,6 @@ import importlib
 import inspect
 import itertools
 import logging
-import os
 import sys
 import warnings
 from abc import abstractmethod
@@ -163,11 +162,11 @@ from typing import (
     Dict,
     Generic,
     Iterable,
+    Iterator,
     List,
     Mapping,
     Optional,
     Set,
-    Text,
     Tuple,
     Type,
     TypeVar,
@@ -194,9 +193,9 @@ from lale.datasets.data_schemas import (
     strip_schema,
 )
 from lale.helpers import (
-    append_batch,
     are_hyperparameters_equal,
     assignee_name,
+    concat_batches,
     fold_schema,
     get_name_and_index,
     is_empty_dict,
@@ -4812,42 +4811,30 @@ class TrainedPipeline(TrainablePipeline[TrainedOpType_co], TrainedOperator):
         """
         return self._predict_based_on_type("predict_log_proba", "predict_log_proba", X)
 
-    def transform_with_batches(self, X, y=None, serialize=True):
-        """[summary]
+    def iter_transform_with_batches(self, X) -> Iterator[Any]:
+        """Transform or predict batch by batch, yielding the output of the
+        sink node for each batch as soon as it is produced.
 
         Parameters
         ----------
-        X : [type]
-            [description]
-        y : [type], optional
-            by default None
+        X : iterable
+            Batches, each either features or a (features, labels) tuple.
+
         Returns
         -------
-        [type]
-            [description]
+        iterator
+            One output batch per input batch.
         """
-        outputs = {}
-        serialization_out_dir: Text = ""
-        if serialize:
-            serialization_out_dir = os.path.join(
-                os.path.dirname(__file__), "temp_serialized"
-            )
-            if not os.path.exists(serialization_out_dir):
-                os.mkdir(serialization_out_dir)
-
         sink_nodes = self._find_sink_nodes()
         sink_node = sink_nodes[0]
-        operator_idx = 0
         inputs: Any
-        output = None
-
         for batch_data in X:  # batching_transformer will output only one obj
-            if isinstance(batch_data, Tuple):
+            if isinstance(batch_data, tuple):
                 batch_X, batch_y = batch_data
             else:
                 batch_X = batch_data
                 batch_y = None
-
+            outputs: Dict[Any, Any] = {}
             for operator in self._steps:
                 preds = self._preds[operator]
                 if len(preds) == 0:
@@ -4879,63 +4866,39 @@ class TrainedPipeline(TrainablePipeline[TrainedOpType_co], TrainedOperator):
                             batch_output = trained.decision_function(X=inputs)
                         else:
                             batch_output = trained._predict(X=inputs)
-                if trained == sink_node:
-                    if isinstance(batch_output, tuple):
-                        output = append_batch(
-                            output, (batch_output[0], batch_output[1])
-                        )
-                    else:
-                        output = append_batch(output, batch_output)
                 outputs[operator] = batch_output
-                operator_idx += 1
-
-            #     if serialize:
-            #         output = lale.helpers.write_batch_output_to_file(
-            #             output,
-            #             os.path.join(
-            #                 serialization_out_dir,
-            #                 "fit_with_batches" + str(operator_idx) + ".hdf5",
-            #             ),
-            #             len(inputs.dataset),
-            #             batch_idx,
-            #             batch_X,
-            #             batch_y,
-            #             batch_out_X,
-            #             batch_out_y,
-            #         )
-            #     else:
-            #         if batch_out_y is not None:
-            #             output = lale.helpers.append_batch(
-            #                 output, (batch_output, batch_out_y)
-            #             )
-            #         else:
-            #             output = lale.helpers.append_batch(output, batch_output)
-            # if serialize:
-            #     output.close()  # type: ignore
-            #     output = lale.helpers.create_data_loader(
-            #         os.path.join(
-            #             serialization_out_dir,
-            #             "fit_with_batches" + str(operator_idx) + ".hdf5",
-            #         ),
-            #         batch_size=inputs.batch_size,
-            #     )
-            # else:
-            #     if isinstance(output, tuple):
-            #         output = lale.helpers.create_data_loader(
-            #             X=output[0], y=output[1], batch_size=inputs.batch_size
-            #         )
-            #     else:
-            #         output = lale.helpers.create_data_loader(
-            #             X=output, y=None, batch_size=inputs.batch_size
-            #         )
-            # outputs[operator] = output
-            # operator_idx += 1
-
-        return_data = output  # outputs[self._steps[-1]]#.dataset.get_data()
-        # if serialize:
-        #     shutil.rmtree(serialization_out_dir)
-
-        return return_data
+            yield outputs[sink_node]
+
+    def transform_with_batches(self, X, y=None, serialize=True, sink=None):
+        """Transform or predict batch by batch.
+
+        Parameters
+        ----------
+        X : iterable
+            Batches, each either features or a (features, labels) tuple.
+        y : None
+            Ignored, labels come with the batches in X.
+        serialize : bool, optional
+            Ignored, kept for backward compatibility, use `sink` instead.
+        sink : lale.helpers.BatchSink, optional
+            If given, each output batch gets written to it once, for example
+            a `lale.helpers.NpyBatchSink`, so memory stays bounded.
+            By default, the output batches get concatenated in memory.
+
+        Returns
+        -------
+        result :
+            The concatenated output batches, or the result of closing the sink.
+        """
+        batches = self.iter_transform_with_batches(X)
+        if sink is None:
+            return concat_batches(list(batches))
+        try:
+            for batch_output in batches:
+                sink.write(batch_output)
+        finally:
+            result = sink.close()
+        return result
 
     def freeze_trainable(self) -> "TrainedPipeline":
         result = super().freeze_trainable()
@@ -0,0 +1,153 @@
+# Copyright 2022 IBM Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Synthetic benchmark for the scheduling overhead of RASL task graphs.
+
+The pipeline consists of cheap monoid-based steps on tiny batches, so
+almost all of the wall-clock time is spent in the task graph itself.
+The steps measure their own compute time, and the difference to the
+total time is reported as scheduling overhead. Usage::
+
+    python -m test.benchmark_task_graphs --n_batches 1000 10000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import lale.operators
+from lale.lib.rasl import (
+    Monoid,
+    MonoidableOperator,
+    PrioBatch,
+    PrioCostModel,
+    PrioResourceAware,
+    PrioStep,
+    fit_with_batches,
+)
+
+_compute_time = 0.0
+
+
+class _SumData(Monoid):
+    def __init__(self, total, count):
+        self.total = total
+        self.count = count
+
+    def combine(self, other: "_SumData"):
+        global _compute_time
+        start = time.time()
+        result = _SumData(self.total + other.total, self.count + other.count)
+        _compute_time += time.time() - start
+        return result
+
+
+class _CenterImpl(MonoidableOperator[_SumData]):
+    def __init__(self):
+        self._hyperparams = {}
+
+    def to_monoid(self, batch) -> _SumData:
+        global _compute_time
+        start = time.time()
+        X, _ = batch
+        result = _SumData(X.sum(axis=0), len(X))
+        _compute_time += time.time() - start
+        return result
+
+    def from_monoid(self, monoid: _SumData) -> None:
+        self._monoid = monoid
+        self.mean_ = monoid.total / monoid.count
+
+    def transform(self, X):
+        global _compute_time
+        start = time.time()
+        result = X - self.mean_
+        _compute_time += time.time() - start
+        return result
+
+
+_Center = lale.operators.make_operator(_CenterImpl, name="Center")
+
+_prios = {
+    "batch": PrioBatch,
+    "step": PrioStep,
+    "resource_aware": PrioResourceAware,
+    "cost_model": PrioCostModel,
+}
+
+
+def run(
+    n_batches: int,
+    n_steps: int,
+    prio: str,
+    max_resident,
+    n_jobs=None,
+    combine_fan_in=None,
+):
+    global _compute_time
+    rng = np.random.RandomState(42)
+    batches = [(rng.rand(4, 3), rng.rand(4)) for _ in range(n_batches)]
+    pipeline = _Center()
+    for _ in range(n_steps - 1):
+        pipeline = pipeline >> _Center()
+    _compute_time = 0.0
+    start = time.time()
+    fit_with_batches(
+        pipeline=pipeline,
+        batches_train=batches,
+        batches_valid=None,
+        scoring=None,
+        unique_class_labels=[],
+        max_resident=max_resident,
+        prio=_prios[prio](),
+        partial_transform=False,
+        verbose=0,
+        progress_callback=None,
+        n_jobs=n_jobs,
+        combine_fan_in=combine_fan_in,
+    )
+    total_time = time.time() - start
+    return total_time, _compute_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--n_batches", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--n_steps", type=int, default=2)
+    parser.add_argument(
+        "--prio", choices=list(_prios.keys()), nargs="+", default=["batch"]
+    )
+    parser.add_argument("--max_resident", type=int, default=None)
+    parser.add_argument("--n_jobs", type=int, default=None)
+    parser.add_argument("--combine_fan_in", type=int, default=None)
+    args = parser.parse_args()
+    print(f"{'prio':>15} {'batches':>8} {'total':>9} {'compute':>9} {'overhead':>9}")
+    for prio in args.prio:
+        for n_batches in args.n_batches:
+            total, compute = run(
+                n_batches,
+                args.n_steps,
+                prio,
+                args.max_resident,
+                args.n_jobs,
+                args.combine_fan_in,
+            )
+            print(
+                f"{prio:>15} {n_batches:>8} {total:>8.2f}s {compute:>8.2f}s {total - compute:>8.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -164,6 +164,124 @@ class TestBatching(unittest.TestCase):
 
         self.assertEqual(lale_accuracy, sklearn_accuracy)
 
+    def test_fit_auto(self):
+        import pandas as pd
+        from sklearn.preprocessing import StandardScaler as SkStandardScaler
+
+        from lale.lib.rasl import MinMaxScaler, StandardScaler
+
+        X_train = pd.DataFrame(self.X_train, columns=["a", "b", "c", "d"])
+        for max_resident in ["auto", 2 * X_train.memory_usage().sum()]:
+            pipeline = Batching(
+                operator=MinMaxScaler() >> StandardScaler(),
+                batch_size="auto",
+                max_resident=max_resident,
+                shuffle=False,
+            )
+            trained = pipeline.fit(X_train, self.y_train)
+            steps = trained.impl.operator.steps_list()
+            prep = SkMinMaxScaler().fit(self.X_train)
+            scaler = SkStandardScaler().fit(prep.transform(self.X_train))
+            for i in range(4):
+                self.assertAlmostEqual(
+                    steps[0].impl.data_min_[i], prep.data_min_[i], msg=max_resident
+                )
+                self.assertAlmostEqual(
+                    steps[1].impl.mean_[i], scaler.mean_[i], msg=max_resident
+                )
+
+    def test_transform_within_max_resident(self):
+        import numpy as np
+        import pandas as pd
+
+        from lale.lib.rasl import MinMaxScaler, StandardScaler
+
+        X_train = pd.DataFrame(self.X_train, columns=["a", "b", "c", "d"])
+        X_test = pd.DataFrame(self.X_test, columns=["a", "b", "c", "d"])
+        batch_space = X_test.memory_usage().sum() // 3
+        pipeline = Batching(
+            operator=MinMaxScaler() >> StandardScaler(),
+            batch_size="auto",
+            max_resident=3 * batch_space,
+            shuffle=False,
+            priority="step",
+            n_jobs=2,
+        )
+        trained = pipeline.fit(X_train, self.y_train)
+        expected = trained.impl.operator.transform(X_test)
+        batches = iter(np.array_split(X_test, 3))
+        transformed = trained.transform(batches)
+        np.testing.assert_allclose(transformed, expected)
+
+    def test_adaptive_batches_halve_on_spill(self):
+        from lale.lib.rasl.batching import _AdaptiveBatches
+        from lale.lib.rasl.task_graphs import _RunStats
+
+        stats = _RunStats()
+        batches = _AdaptiveBatches(self.X_train, self.y_train, 16, None, 2, False)
+        batches.set_run_stats(stats)
+        batch_X, _ = next(batches)
+        self.assertEqual(batch_X.shape[0], 16)
+        stats.spill_count += 1
+        batch_X, _ = next(batches)
+        self.assertEqual(batch_X.shape[0], 8)
+
+    def test_transform_with_batches_sinks(self):
+        import os
+        import tempfile
+
+        import numpy as np
+        import pandas as pd
+
+        from lale.helpers import NpyBatchSink, ParquetBatchSink
+        from lale.lib.sklearn import MinMaxScaler
+
+        trained = (MinMaxScaler() >> MinMaxScaler()).fit(self.X_train)
+        expected = trained.transform(self.X_test)
+        batches = np.array_split(self.X_test, 3)
+        outputs = list(trained.iter_transform_with_batches(batches))
+        self.assertEqual(len(outputs), 3)
+        in_memory = trained.transform_with_batches(batches)
+        np.testing.assert_allclose(in_memory, expected)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            npy_path = os.path.join(tmp_dir, "out.npy")
+            memmapped = trained.transform_with_batches(
+                batches, sink=NpyBatchSink(npy_path)
+            )
+            self.assertIsInstance(memmapped, np.memmap)
+            np.testing.assert_allclose(memmapped, expected)
+            np.testing.assert_allclose(np.load(npy_path), expected)
+            del memmapped
+            parquet_path = trained.transform_with_batches(
+                batches, sink=ParquetBatchSink(os.path.join(tmp_dir, "out.parquet"))
+            )
+            np.testing.assert_allclose(pd.read_parquet(parquet_path), expected)
+
+    def test_transform_with_batches_hdf5_sink(self):
+        import os
+        import tempfile
+
+        import numpy as np
+
+        try:
+            import h5py
+        except ImportError:
+            self.skipTest("h5py is not installed")
+
+        from lale.helpers import Hdf5BatchSink
+        from lale.lib.sklearn import MinMaxScaler
+
+        trained = (MinMaxScaler() >> MinMaxScaler()).fit(self.X_train)
+        expected = trained.transform(self.X_test)
+        batches = np.array_split(self.X_test, 3)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hdf5_path = trained.transform_with_batches(
+                batches,
+                sink=Hdf5BatchSink(os.path.join(tmp_dir, "out.h5"), dataset="out"),
+            )
+            with h5py.File(hdf5_path, "r") as f:
+                np.testing.assert_allclose(f["out"][:], expected)
+
     # TODO: Nesting doesn't work yet
     # def test_nested_pipeline(self):
     #     from lale.lib.sklearn import MinMaxScaler, MLPClassifier
@@ -1984,6 +1984,36 @@ class TestMap(unittest.TestCase):
             self.assertEqual(result.loc[273, "prod"], 154150, tgt)
             self.assertEqual(result.loc[273, "line"], "P", tgt)
 
+    def test_replace_codes(self):
+        pipeline = Scan(table=it.df) >> Map(
+            columns={
+                "gender": replace(it.gender, {"f": 0, "m": 1}),
+                "state": replace(
+                    it.state,
+                    {"CA": 0, "TX": 1},
+                    handle_unknown="use_encoded_value",
+                    unknown_value=-1,
+                ),
+                "status": replace(
+                    it.status,
+                    {1: "yes"},
+                    handle_unknown="use_encoded_value",
+                    unknown_value=None,
+                ),
+            }
+        )
+        for tgt, datasets in self.tgt2datasets.items():
+            result = pipeline.transform(datasets["df"])
+            result = _ensure_pandas(result)
+            self.assertEqual(result["gender"].tolist(), [1, 0, 1, 1, 0], tgt)
+            self.assertEqual(result["state"].tolist(), [-1, -1, 0, -1, 0], tgt)
+            self.assertEqual(
+                result["status"].tolist(), [None, "yes", "yes", None, "yes"], tgt
+            )
+            if tgt == "pandas":
+                self.assertEqual(result["gender"].dtype, np.int64)
+                self.assertEqual(result["state"].dtype, np.int64)
+
     def test_dynamic_rename(self):
         def expr(X):
             return {("new_" + c): it[c] for c in X.columns}
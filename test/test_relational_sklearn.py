@@ -12,30 +12,36 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import itertools
 import math
 import numbers
 import os.path
+import pathlib
+import pickle  # nosec
 import re
 import tempfile
 import unittest
+import unittest.mock
 import urllib.request
-from typing import Any, Dict, cast
+from typing import Any, Dict, List, cast
 
 import jsonschema
 import numpy as np
 import pandas as pd
+import scipy.sparse
 import sklearn
 import sklearn.datasets
 from category_encoders.hashing import HashingEncoder as SkHashingEncoder
 from sklearn.feature_selection import SelectKBest as SkSelectKBest
+from sklearn.feature_selection import chi2, f_regression
 from sklearn.impute import SimpleImputer as SkSimpleImputer
 from sklearn.metrics import accuracy_score as sk_accuracy_score
 from sklearn.metrics import balanced_accuracy_score as sk_balanced_accuracy_score
 from sklearn.metrics import f1_score as sk_f1_score
 from sklearn.metrics import make_scorer
 from sklearn.metrics import r2_score as sk_r2_score
-from sklearn.model_selection import KFold
+from sklearn.model_selection import KFold, StratifiedKFold
 from sklearn.model_selection import cross_val_score as sk_cross_val_score
 from sklearn.model_selection import cross_validate as sk_cross_validate
 from sklearn.pipeline import make_pipeline as sk_make_pipeline
@@ -58,17 +64,19 @@ from lale.datasets.data_schemas import (
 )
 from lale.datasets.multitable.fetch_datasets import fetch_go_sales_dataset
 from lale.expressions import it
-from lale.helpers import _ensure_pandas, create_data_loader
+from lale.helpers import NpyBatchSink, _ensure_pandas, create_data_loader
 from lale.lib.lightgbm import LGBMClassifier, LGBMRegressor
 from lale.lib.rasl import BatchedBaggingClassifier, ConcatFeatures, Convert
 from lale.lib.rasl import HashingEncoder as RaslHashingEncoder
 from lale.lib.rasl import Map
 from lale.lib.rasl import MinMaxScaler as RaslMinMaxScaler
+from lale.lib.rasl import Monoid
 from lale.lib.rasl import OneHotEncoder as RaslOneHotEncoder
 from lale.lib.rasl import OrdinalEncoder as RaslOrdinalEncoder
-from lale.lib.rasl import PrioBatch, PrioStep, Project, Scan
+from lale.lib.rasl import PrioBatch, PrioCostModel, PrioStep, Project, RunTrace, Scan
 from lale.lib.rasl import SelectKBest as RaslSelectKBest
 from lale.lib.rasl import SimpleImputer as RaslSimpleImputer
+from lale.lib.rasl import SpillArrow, SpillFormat, SpillPickle
 from lale.lib.rasl import StandardScaler as RaslStandardScaler
 from lale.lib.rasl import accuracy_score as rasl_accuracy_score
 from lale.lib.rasl import balanced_accuracy_score as rasl_balanced_accuracy_score
@@ -79,8 +87,15 @@ from lale.lib.rasl import csv_data_loader
 from lale.lib.rasl import f1_score as rasl_f1_score
 from lale.lib.rasl import fit_with_batches
 from lale.lib.rasl import get_scorer as rasl_get_scorer
-from lale.lib.rasl import mockup_data_loader, openml_data_loader
+from lale.lib.rasl import mockup_data_loader, openml_data_loader, predict_with_batches
 from lale.lib.rasl import r2_score as rasl_r2_score
+from lale.lib.rasl import (
+    refit_with_batches,
+    register_space_estimator,
+    score_with_batches,
+    to_monoid_parallel,
+)
+from lale.lib.rasl.scores import Chi2, FClassif, FRegression, MutualInfoClassif
 from lale.lib.rasl.standard_scaler import scale as rasl_scale
 from lale.lib.sklearn import (
     DecisionTreeClassifier,
@@ -88,6 +103,7 @@ from lale.lib.sklearn import (
     RandomForestClassifier,
     SGDClassifier,
 )
+from lale.lib.sklearn import StandardScaler as SklearnStandardScaler
 from lale.lib.xgboost import XGBClassifier, XGBRegressor
 from lale.operators import TrainedPipeline
 
@@ -419,6 +435,82 @@ class TestSelectKBest(unittest.TestCase):
                 self, sk_trained, rasl_trained, f"lower: {lower}, upper: {upper}"
             )
 
+    def test_f_classif_lift(self):
+        lifted = {
+            tgt: FClassif().to_monoid((datasets["X"], datasets["y"]))
+            for tgt, datasets in self.tgt2datasets.items()
+        }
+        pd_lifted, spark_lifted = lifted["pandas"], lifted["spark"]
+        self.assertEqual(sorted(pd_lifted.classes), sorted(spark_lifted.classes))
+        self.assertEqual(pd_lifted.n_samples, spark_lifted.n_samples)
+        for k in pd_lifted.classes:
+            self.assertEqual(
+                pd_lifted.n_samples_per_class[k], spark_lifted.n_samples_per_class[k]
+            )
+            self.assertTrue(
+                np.allclose(pd_lifted.sums_samples[k], spark_lifted.sums_samples[k])
+            )
+        self.assertTrue(np.allclose(pd_lifted.ss_alldata, spark_lifted.ss_alldata))
+        self.assertTrue(np.allclose(pd_lifted.sums_alldata, spark_lifted.sums_alldata))
+
+    def test_fit_chi2(self):
+        sk_trainable = SkSelectKBest(chi2, k=20)
+        X, y = self.tgt2datasets["pandas"]["X"], self.tgt2datasets["pandas"]["y"]
+        sk_trained = sk_trainable.fit(X, y)
+        rasl_trainable = RaslSelectKBest(monoidable_score_func=Chi2, k=20)
+        for tgt, datasets in self.tgt2datasets.items():
+            X, y = datasets["X"], datasets["y"]
+            rasl_trained = rasl_trainable.fit(X, y)
+            _check_trained_select_k_best(self, sk_trained, rasl_trained, tgt)
+
+    def test_chi2_negative(self):
+        X, y = self.tgt2datasets["pandas"]["X"], self.tgt2datasets["pandas"]["y"]
+        X_negative = X.copy()
+        X_negative.iloc[0, 0] = -1
+        with self.assertRaisesRegex(ValueError, "Input X must be non-negative"):
+            chi2(X_negative, y)
+        for tgt in ["pandas", "spark"]:
+            X_tgt, y_tgt = X_negative, y
+            if tgt == "spark":
+                X_tgt, y_tgt = pandas2spark(X_negative), pandas2spark(y)
+            with self.assertRaisesRegex(
+                ValueError, "Input X must be non-negative", msg=tgt
+            ):
+                Chi2().to_monoid((X_tgt, y_tgt))
+
+    def test_fit_f_regression(self):
+        from sklearn.datasets import load_diabetes
+
+        X, y = load_diabetes(return_X_y=True, as_frame=True)
+        sk_trained = SkSelectKBest(f_regression, k=5).fit(X, y)
+        rasl_trainable = RaslSelectKBest(monoidable_score_func=FRegression, k=5)
+        for tgt in ["pandas", "spark"]:
+            if tgt == "pandas":
+                X_tgt, y_tgt = X, y
+            else:
+                X_tgt, y_tgt = pandas2spark(X), pandas2spark(y)
+            rasl_trained = rasl_trainable.fit(X_tgt, y_tgt)
+            _check_trained_select_k_best(self, sk_trained, rasl_trained, tgt)
+        rasl_trainable = RaslSelectKBest(monoidable_score_func=FRegression, k=5)
+        for lower, upper in [[0, 100], [100, 200], [200, X.shape[0]]]:
+            rasl_trained = rasl_trainable.partial_fit(X[lower:upper], y[lower:upper])
+        _check_trained_select_k_best(self, sk_trained, rasl_trained, "partial_fit")
+
+    def test_fit_mutual_info(self):
+        X, y = self.tgt2datasets["pandas"]["X"], self.tgt2datasets["pandas"]["y"]
+        rasl_trainable = RaslSelectKBest(monoidable_score_func=MutualInfoClassif, k=20)
+        full_trained = rasl_trainable.fit(X, y)
+        scores = full_trained.impl.scores_
+        self.assertEqual(len(scores), X.shape[1])
+        self.assertTrue((scores >= 0).all())
+        self.assertEqual(scores[0], 0.0)  # pixel 0 is always blank
+        rasl_trainable = RaslSelectKBest(monoidable_score_func=MutualInfoClassif, k=20)
+        for lower, upper in [[0, 600], [600, 1200], [1200, X.shape[0]]]:
+            rasl_trained = rasl_trainable.partial_fit(X[lower:upper], y[lower:upper])
+        for full_score, batched_score in zip(scores, rasl_trained.impl.scores_):
+            self.assertAlmostEqual(full_score, batched_score)
+        self.assertEqual(full_trained.transform(X).shape, (X.shape[0], 20))
+
 
 def _check_trained_ordinal_encoder(test, op1, op2, msg):
     if hasattr(op1, "feature_names_in_"):
@@ -626,6 +718,24 @@ class TestOneHotEncoder(unittest.TestCase):
                         (row_idx, col_idx, tgt),
                     )
 
+    def test_transform_sparse(self):
+        (train_X, _), (test_X, _) = self.tgt2creditg["pandas"]
+        cat_columns = categorical()(train_X)
+        prefix = Map(columns={c: it[c] for c in cat_columns})
+        sk_trained = (prefix >> SkOneHotEncoder(sparse=True)).fit(train_X)
+        sk_transformed = sk_trained.transform(test_X)
+        rasl_trained = (prefix >> RaslOneHotEncoder(sparse=True)).fit(train_X)
+        rasl_transformed = rasl_trained.transform(test_X)
+        self.assertTrue(scipy.sparse.isspmatrix_csr(rasl_transformed))
+        self.assertEqual(sk_transformed.shape, rasl_transformed.shape)
+        self.assertEqual((sk_transformed != rasl_transformed).nnz, 0)
+        dense_trained = (prefix >> RaslOneHotEncoder()).fit(train_X)
+        dense_transformed = dense_trained.transform(test_X)
+        self.assertEqual(dense_transformed.dtypes.unique().tolist(), [np.float64])
+        self.assertTrue(
+            (dense_transformed.to_numpy() == rasl_transformed.toarray()).all()
+        )
+
     def test_predict(self):
         (train_X_pd, train_y_pd), (test_X_pd, _test_y_pd) = self.tgt2creditg["pandas"]
         cat_columns = categorical()(train_X_pd)
@@ -707,6 +817,78 @@ class TestHashingEncoder(unittest.TestCase):
                         (row_idx, col_idx, tgt),
                     )
 
+    def test_transform_sparse(self):
+        (train_X, _), (test_X, _) = self.tgt2creditg["pandas"]
+        cat_columns = categorical()(train_X)
+        prefix = Map(columns={c: it[c] for c in cat_columns})
+        dense_trained = (prefix >> RaslHashingEncoder()).fit(train_X)
+        dense_transformed = dense_trained.transform(test_X)
+        rasl_trained = (prefix >> RaslHashingEncoder(sparse=True)).fit(train_X)
+        rasl_transformed = rasl_trained.transform(test_X)
+        self.assertTrue(scipy.sparse.isspmatrix_csr(rasl_transformed))
+        self.assertEqual(dense_transformed.shape, rasl_transformed.shape)
+        self.assertTrue(
+            (dense_transformed.to_numpy() == rasl_transformed.toarray()).all()
+        )
+
+    def test_fit_parallel(self):
+        (train_X, _), (test_X, _) = self.tgt2creditg["pandas"]
+        serial = RaslHashingEncoder().fit(train_X)
+        expected = serial.transform(test_X)
+        for executor in ["thread", "process"]:
+            trained = RaslHashingEncoder(n_jobs=2, executor=executor).fit(train_X)
+            self.assertEqual(
+                trained.impl._hyperparams["cols"],
+                serial.impl._hyperparams["cols"],
+                executor,
+            )
+            transformed = trained.transform(test_X)
+            self.assertTrue(expected.equals(transformed), executor)
+
+    def test_fit_with_batches_process(self):
+        (train_X, train_y), (test_X, _) = self.tgt2creditg["pandas"]
+        expected = RaslHashingEncoder().fit(train_X).transform(test_X)
+        trained = fit_with_batches(
+            pipeline=RaslHashingEncoder() >> SGDClassifier(random_state=97),
+            batches_train=mockup_data_loader(train_X, train_y, 3, "pandas"),
+            batches_valid=None,
+            scoring=None,
+            unique_class_labels=list(train_y.unique()),
+            max_resident=None,
+            prio=PrioBatch(),
+            partial_transform=False,
+            verbose=0,
+            progress_callback=None,
+            n_jobs=2,
+            executor="process",
+        )
+        transformed = trained.steps_list()[0].transform(test_X)
+        self.assertTrue(expected.equals(transformed))
+
+    def test_transform_pandas_hash(self):
+        (train_X, _), (test_X, _) = self.tgt2creditg["pandas"]
+        cat_columns = categorical()(train_X)
+        prefix = Map(columns={c: it[c] for c in cat_columns})
+        trainable = prefix >> RaslHashingEncoder(hash_method="pandas")
+        transformed = trainable.fit(train_X).transform(test_X)
+        self.assertEqual(transformed.shape, (test_X.shape[0], 8))
+        counts = transformed.sum(axis=1)
+        self.assertTrue((counts == len(cat_columns)).all())
+
+    def test_hash_methods(self):
+        (train_X, _), (test_X, _) = self.tgt2creditg["pandas"]
+        cat_columns = categorical()(train_X)
+        train_X, test_X = train_X[cat_columns], test_X[cat_columns].head(20)
+        hash_methods = RaslHashingEncoder.hyperparam_schema("hash_method")["enum"]
+        self.assertNotIn("shake_128", hash_methods)
+        for hash_method in hash_methods:
+            trained = RaslHashingEncoder(hash_method=hash_method).fit(train_X)
+            transformed = trained.transform(test_X)
+            counts = transformed.sum(axis=1)
+            self.assertTrue((counts == len(cat_columns)).all(), hash_method)
+        with self.assertRaises(jsonschema.ValidationError):
+            _ = RaslHashingEncoder(hash_method="shake_128")
+
     def test_predict(self):
         (train_X_pd, train_y_pd), (test_X_pd, _test_y_pd) = self.tgt2creditg["pandas"]
         cat_columns = categorical()(train_X_pd)
@@ -1075,21 +1257,59 @@ class TestSimpleImputer(unittest.TestCase):
                             (row_idx, col_idx, tgt),
                         )
 
-    def test_invalid_partial_fit(self):
+    def test_sketch_partial_fit(self):
+        self._fill_missing_value("age", 36.0, -1)
         num_columns = ["age", "fnlwgt", "education-num"]
         prefix = Map(columns={c: it[c] for c in num_columns})
-
-        hyperparams = [
-            {"strategy": "median"},
-            {"strategy": "most_frequent"},
-        ]
-        for hyperparam in hyperparams:
-            rasl_trainable = prefix >> RaslSimpleImputer(
-                missing_values=-1, **hyperparam
+        (train_X, _), (_, _) = self.tgt2adult["pandas"]
+        train_X = prefix.transform(train_X)
+        sketch_error = 0.01
+        for strategy in ["median", "most_frequent"]:
+            sk_trained = SkSimpleImputer(missing_values=-1, strategy=strategy).fit(
+                train_X
             )
-            (train_X, _), (_, _) = self.tgt2adult["pandas"]
-            with self.assertRaises(ValueError):
-                _ = rasl_trainable.partial_fit(train_X)
+            rasl_trainable = RaslSimpleImputer(
+                missing_values=-1, strategy=strategy, sketch_error=sketch_error
+            )
+            # sketches are exact while the data fits into them
+            rasl_trained = rasl_trainable.partial_fit(train_X.iloc[:10])
+            rasl_trained = rasl_trained.partial_fit(train_X.iloc[10:50])
+            sk_small = SkSimpleImputer(missing_values=-1, strategy=strategy).fit(
+                train_X.iloc[:50]
+            )
+            for sk_stats, rasl_stats in zip(
+                sk_small.statistics_, rasl_trained.impl.statistics_
+            ):
+                self.assertEqual(sk_stats, rasl_stats, strategy)
+            rasl_trained = rasl_trained.partial_fit(train_X.iloc[50:])
+            (spark_X, _), (_, _) = self.tgt2adult["spark"]
+            spark_trained = RaslSimpleImputer(
+                missing_values=-1, strategy=strategy, sketch_error=sketch_error
+            ).partial_fit(prefix.transform(spark_X))
+            for tgt, rasl_statistics_ in [
+                ("pandas", rasl_trained.impl.statistics_),
+                ("spark", spark_trained.impl.statistics_),
+            ]:
+                msg = (strategy, tgt)
+                self.assertEqual(len(sk_trained.statistics_), len(rasl_statistics_))
+                for col_idx, col_name in enumerate(num_columns):
+                    column = train_X[col_name][train_X[col_name] != -1]
+                    sk_stats = sk_trained.statistics_[col_idx]
+                    rasl_stats = rasl_statistics_[col_idx]
+                    if strategy == "median":
+                        # with ties, any rank between those bounds is valid
+                        low_rank = (column < rasl_stats).mean()
+                        high_rank = (column <= rasl_stats).mean()
+                        self.assertLessEqual(low_rank, 0.5 + 2 * sketch_error, msg)
+                        self.assertGreaterEqual(high_rank, 0.5 - 2 * sketch_error, msg)
+                    else:
+                        sk_count = (column == sk_stats).sum()
+                        rasl_count = (column == rasl_stats).sum()
+                        self.assertGreaterEqual(
+                            rasl_count, sk_count - sketch_error * len(column), msg
+                        )
+            rasl_transformed = rasl_trained.transform(train_X)
+            self.assertEqual((rasl_transformed == -1).sum().sum(), 0)
 
 
 def _check_trained_standard_scaler(test, op1, op2, msg):
@@ -1147,6 +1367,21 @@ class TestStandardScaler(unittest.TestCase):
             rasl_trained = rasl_trainable.fit(train_X)
             _check_trained_standard_scaler(self, sk_trained, rasl_trained.impl, tgt)
 
+    def test_fit_parallel(self):
+        (train_X, train_y), (_, _) = self.tgt2creditg["pandas"]
+        sk_trained = SkStandardScaler().fit(train_X)
+        for executor in ["thread", "process"]:
+            rasl_trainable = RaslStandardScaler(n_jobs=3, executor=executor)
+            self.assertEqual(rasl_trainable.clone().hyperparams()["n_jobs"], 3)
+            rasl_trained = rasl_trainable.fit(train_X)
+            _check_trained_standard_scaler(
+                self, sk_trained, rasl_trained.impl, executor
+            )
+        rasl_impl = RaslStandardScaler().impl
+        batches = mockup_data_loader(train_X, train_y, 5, "pandas")
+        rasl_impl.from_monoid(to_monoid_parallel(rasl_impl, batches, n_jobs=2))
+        _check_trained_standard_scaler(self, sk_trained, rasl_impl, "batches")
+
     def test_partial_fit(self):
         (train_X_pd, _), (_, _) = self.tgt2creditg["pandas"]
         for tgt in self.tgt2creditg.keys():
@@ -1262,6 +1497,19 @@ class _BatchTestingCallback:
         assert not end_of_scanned_batches
 
 
+class _RecordingSpillFormat(SpillFormat):
+    def __init__(self, spill_format):
+        self.spill_format = spill_format
+        self.written_types = []
+
+    def write(self, data, stem):
+        self.written_types.append(type(data))
+        return self.spill_format.write(data, stem)
+
+    def read(self, path):
+        return self.spill_format.read(path)
+
+
 class TestTaskGraphs(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -1320,8 +1568,60 @@ class TestTaskGraphs(unittest.TestCase):
         sk_trainable = self._make_sk_trainable("sgd")
         sk_trained = sk_trainable.fit(train_X, train_y)
         unique_class_labels = list(train_y.unique())
-        for n_batches in [1, 3]:
-            for prio in [PrioStep(), PrioBatch()]:
+        # each config gets n_batches, prio, and max_resident, where "tight"
+        # forces spilling, plus other keyword arguments of fit_with_batches
+        configs: List[Dict[str, Any]] = [
+            {"n_batches": n_batches, "prio": prio, "max_resident": "tight"}
+            for n_batches in [1, 3]
+            for prio in [PrioStep(), PrioBatch(), PrioCostModel()]
+        ]
+        configs += [
+            {
+                "n_batches": 3,
+                "prio": PrioBatch(),
+                "max_resident": max_resident,
+                "n_jobs": 2,
+                "executor": executor,
+            }
+            for executor in ["thread", "process"]
+            for max_resident in [None, "tight"]
+        ]
+        configs += [
+            {
+                "n_batches": 3,
+                "prio": PrioStep(),
+                "max_resident": "tight",
+                "spill_format": spill_format,
+            }
+            for spill_format in [SpillPickle(), SpillArrow(), SpillArrow("lz4")]
+        ]
+        configs += [
+            {
+                "n_batches": 5,
+                "prio": PrioStep(),
+                "max_resident": max_resident,
+                "n_jobs": n_jobs,
+                "prefetch": 2,
+            }
+            for n_jobs in [None, 2]
+            for max_resident in [None, "tight"]
+        ]
+        configs += [
+            {
+                "n_batches": n_batches,
+                "prio": PrioBatch(),
+                "max_resident": None,
+                "combine_fan_in": combine_fan_in,
+            }
+            for n_batches in [1, 5, 8]
+            for combine_fan_in in [2, 3]
+        ]
+        for config in configs:
+            with self.subTest(**config):
+                kwargs = dict(config)
+                n_batches = kwargs.pop("n_batches")
+                if kwargs["max_resident"] == "tight":
+                    kwargs["max_resident"] = 3 * math.ceil(train_data_space / n_batches)
                 batches = mockup_data_loader(train_X, train_y, n_batches, "pandas")
                 rasl_trainable = self._make_rasl_trainable("sgd")
                 rasl_trained = fit_with_batches(
@@ -1330,25 +1630,342 @@ class TestTaskGraphs(unittest.TestCase):
                     batches_valid=None,
                     scoring=None,
                     unique_class_labels=unique_class_labels,
-                    max_resident=3 * math.ceil(train_data_space / n_batches),
-                    prio=prio,
                     partial_transform=False,
                     verbose=0,
                     progress_callback=None,
+                    **kwargs,
                 )
                 _check_trained_ordinal_encoder(
                     self,
                     sk_trained.steps[0][1],
                     rasl_trained.steps[0][1].impl,
-                    (n_batches, type(prio)),
+                    config,
                 )
                 _check_trained_min_max_scaler(
                     self,
                     sk_trained.steps[1][1],
                     rasl_trained.steps[1][1].impl,
-                    (n_batches, type(prio)),
+                    config,
                 )
 
+    def test_fit_batching_checkpoint(self):
+        train_X, train_y, _ = self.creditg
+        sk_trainable = self._make_sk_trainable("sgd")
+        sk_trained = sk_trainable.fit(train_X, train_y)
+        unique_class_labels = list(train_y.unique())
+        n_batches = 5
+
+        def interrupted_loader(n_ok):
+            batches = mockup_data_loader(train_X, train_y, n_batches, "pandas")
+            for i, batch in enumerate(batches):
+                if i == n_ok:
+                    raise KeyboardInterrupt()
+                yield batch
+
+        for n_ok in [0, 2, n_batches]:
+            for combine_fan_in in [None, 2]:
+                with tempfile.TemporaryDirectory() as checkpoint_dir:
+                    kwargs = {
+                        "batches_valid": None,
+                        "scoring": None,
+                        "unique_class_labels": unique_class_labels,
+                        "max_resident": None,
+                        "prio": PrioBatch(),
+                        "partial_transform": False,
+                        "verbose": 0,
+                        "progress_callback": None,
+                        "combine_fan_in": combine_fan_in,
+                        "checkpoint_dir": checkpoint_dir,
+                    }
+                    if n_ok < n_batches:
+                        with self.assertRaises(KeyboardInterrupt):
+                            _ = fit_with_batches(
+                                pipeline=self._make_rasl_trainable("sgd"),
+                                batches_train=interrupted_loader(n_ok),
+                                **kwargs,
+                            )
+                        batches = mockup_data_loader(
+                            train_X, train_y, n_batches, "pandas"
+                        )
+                    else:
+                        _ = fit_with_batches(
+                            pipeline=self._make_rasl_trainable("sgd"),
+                            batches_train=mockup_data_loader(
+                                train_X, train_y, n_batches, "pandas"
+                            ),
+                            **kwargs,
+                        )
+                        batches = interrupted_loader(0)  # must not be read
+                    rasl_trained = fit_with_batches(
+                        pipeline=self._make_rasl_trainable("sgd"),
+                        batches_train=batches,
+                        **kwargs,
+                    )
+                    _check_trained_ordinal_encoder(
+                        self,
+                        sk_trained.steps[0][1],
+                        rasl_trained.steps[0][1].impl,
+                        (n_ok, combine_fan_in),
+                    )
+                    _check_trained_min_max_scaler(
+                        self,
+                        sk_trained.steps[1][1],
+                        rasl_trained.steps[1][1].impl,
+                        (n_ok, combine_fan_in),
+                    )
+                    with self.assertRaises(ValueError):
+                        _ = fit_with_batches(
+                            pipeline=self._make_rasl_trainable("sgd"),
+                            batches_train=batches,
+                            **{**kwargs, "combine_fan_in": 3},
+                        )
+
+    def test_fit_batching_numpy_space(self):
+        train_X, train_y, _ = self.creditg
+        num_X = pd.DataFrame(SkOrdinalEncoder().fit_transform(train_X))
+        unique_class_labels = list(train_y.unique())
+        space_calls = []
+
+        class CountedArray(np.ndarray):
+            pass
+
+        def counted_space(data):
+            space_calls.append(data.shape)
+            return data.nbytes
+
+        # restore the global registry after the test
+        patcher = unittest.mock.patch.dict(
+            "lale.lib.rasl.task_graphs._space_estimators"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        register_space_estimator(CountedArray, counted_space)
+        batches = [
+            (X.to_numpy().view(CountedArray), y.to_numpy())
+            for X, y in mockup_data_loader(num_X, train_y, 5, "pandas")
+        ]
+        batch_space = batches[0][0].nbytes + batches[0][1].nbytes
+        sk_trained = sk_make_pipeline(
+            SkStandardScaler(), SGDClassifier(random_state=97)
+        ).fit(num_X.to_numpy(), train_y.to_numpy())
+        for max_resident in [None, 3 * batch_space]:
+            space_calls.clear()
+            rasl_trained = fit_with_batches(
+                pipeline=SklearnStandardScaler() >> SGDClassifier(random_state=97),
+                batches_train=batches,
+                batches_valid=None,
+                scoring=None,
+                unique_class_labels=unique_class_labels,
+                max_resident=max_resident,
+                prio=PrioBatch(),
+                partial_transform=False,
+                verbose=0,
+                progress_callback=None,
+            )
+            self.assertGreater(len(space_calls), 0)
+            self.assertTrue(
+                np.allclose(
+                    sk_trained.steps[0][1].mean_, rasl_trained.steps[0][1].impl.mean_
+                ),
+                max_resident,
+            )
+
+    def test_predict_and_score_with_batches(self):
+        X, y, _ = self.creditg
+        trained = self._make_rasl_trainable("sgd").fit(X, y)
+        expected = trained.predict(X)
+        expected_score = sk_accuracy_score(y, expected)
+        data_space = X.memory_usage(deep=True).sum() + y.memory_usage(deep=True)
+        n_batches = 5
+        for n_jobs in [None, 2]:
+            trace = RunTrace()
+            predicted = predict_with_batches(
+                pipeline=trained,
+                batches=mockup_data_loader(X, y, n_batches, "pandas"),
+                max_resident=3 * math.ceil(data_space / n_batches),
+                prio=PrioBatch(),
+                verbose=0,
+                n_jobs=n_jobs,
+                trace=trace,
+            )
+            self.assertTrue(np.array_equal(expected, predicted), n_jobs)
+            df = trace.to_dataframe()
+            self.assertEqual(set(df.operation), {"scan", "transform", "predict"})
+            score = score_with_batches(
+                pipeline=trained,
+                batches=mockup_data_loader(X, y, n_batches, "pandas"),
+                scoring=rasl_get_scorer("accuracy"),
+                max_resident=None,
+                prio=PrioBatch(),
+                verbose=0,
+                n_jobs=n_jobs,
+            )
+            self.assertAlmostEqual(expected_score, score, msg=n_jobs)
+        unlabeled = [
+            (batch_X, None)
+            for batch_X, _ in mockup_data_loader(X, y, n_batches, "pandas")
+        ]
+        X_space = X.memory_usage(deep=True).sum()
+        trace = RunTrace()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            predicted = predict_with_batches(
+                pipeline=trained,
+                batches=unlabeled,
+                max_resident=3 * math.ceil(X_space / n_batches),
+                prio=PrioStep(),
+                verbose=0,
+                trace=trace,
+                sink=NpyBatchSink(os.path.join(tmp_dir, "predicted.npy")),
+            )
+            self.assertTrue(np.array_equal(expected, predicted))
+            del predicted
+        self.assertGreater(trace.to_dataframe().spill_count.sum(), 0)
+
+    def test_fit_batching_spill_sparse(self):
+        X, y, _ = self.creditg
+        data_space = X.memory_usage(deep=True).sum() + y.memory_usage(deep=True)
+        unique_class_labels = list(y.unique())
+        n_batches = 5
+
+        def fit(max_resident, spill_format):
+            return fit_with_batches(
+                pipeline=RaslOneHotEncoder(sparse=True)
+                >> SGDClassifier(random_state=97),
+                batches_train=mockup_data_loader(X, y, n_batches, "pandas"),
+                batches_valid=None,
+                scoring=None,
+                unique_class_labels=unique_class_labels,
+                max_resident=max_resident,
+                prio=PrioStep(),
+                partial_transform=False,
+                verbose=0,
+                progress_callback=None,
+                spill_format=spill_format,
+            )
+
+        expected = fit(None, None).steps[-1][1].impl.coef_
+        for spill_format in [SpillPickle(), SpillArrow()]:
+            recording = _RecordingSpillFormat(spill_format)
+            trained = fit(2 * math.ceil(data_space / n_batches), recording)
+            self.assertIn(scipy.sparse.csr_matrix, recording.written_types)
+            result = trained.steps[-1][1].impl.coef_
+            self.assertTrue(np.array_equal(expected, result), spill_format)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                data = [X.iloc[:3], y.iloc[:3].to_numpy()]
+                path = spill_format.write(data, pathlib.Path(tmp_dir) / "data")
+                loaded = spill_format.read(path)
+                self.assertTrue(loaded[0].equals(data[0]), spill_format)
+                self.assertTrue(np.array_equal(loaded[1], data[1]), spill_format)
+
+    def test_fit_batching_trace(self):
+        train_X, train_y, _ = self.creditg
+        sk_trained = self._make_sk_trainable("sgd").fit(train_X, train_y)
+        train_data_space = train_X.memory_usage(deep=True).sum() + train_y.memory_usage(
+            deep=True
+        )
+        unique_class_labels = list(train_y.unique())
+        n_batches = 5
+        for n_jobs in [None, 2]:
+            trace = RunTrace()
+            _ = fit_with_batches(
+                pipeline=self._make_rasl_trainable("sgd"),
+                batches_train=mockup_data_loader(train_X, train_y, n_batches, "pandas"),
+                batches_valid=None,
+                scoring=None,
+                unique_class_labels=unique_class_labels,
+                max_resident=3 * math.ceil(train_data_space / n_batches),
+                prio=PrioBatch(),
+                partial_transform=False,
+                verbose=0,
+                progress_callback=None,
+                n_jobs=n_jobs,
+                trace=trace,
+            )
+            df = trace.to_dataframe()
+            scans = df[(df.operation == "scan") & (df.bytes_out > 0)]
+            self.assertEqual(len(scans), n_batches, n_jobs)
+            self.assertEqual(
+                set(df.step), {"INP", "OrdinalEncoder", "MinMaxScaler", "SGDClassifier"}
+            )
+            self.assertGreater(df.spill_count.sum(), 0)
+            self.assertEqual(df.load_bytes.sum(), df.spill_bytes.sum())
+            events = trace.to_chrome_trace()["traceEvents"]
+            tasks = [e for e in events if e["ph"] == "X"]
+            self.assertEqual(len(tasks), len(df))
+            spills = [e for e in events if e["name"] == "spill"]
+            self.assertEqual(len(spills), df.spill_count.sum())
+            prio = PrioCostModel(trace)
+            ranks = dict(prio._rank)
+            self.assertGreater(max(ranks.values()), 0.0)
+            for record in trace.records:  # computing priorities has no effects
+                prio.task_priority(record.task)
+            self.assertEqual(ranks, prio._rank)
+            rasl_trained = fit_with_batches(
+                pipeline=self._make_rasl_trainable("sgd"),
+                batches_train=mockup_data_loader(train_X, train_y, n_batches, "pandas"),
+                batches_valid=None,
+                scoring=None,
+                unique_class_labels=unique_class_labels,
+                max_resident=3 * math.ceil(train_data_space / n_batches),
+                prio=prio,
+                partial_transform=False,
+                verbose=0,
+                progress_callback=None,
+                n_jobs=n_jobs,
+            )
+            _check_trained_min_max_scaler(
+                self, sk_trained.steps[1][1], rasl_trained.steps[1][1].impl, n_jobs
+            )
+
+    def test_refit_batching(self):
+        train_X, train_y, _ = self.creditg
+        sk_trainable = self._make_sk_trainable("sgd")
+        sk_trained = sk_trainable.fit(train_X, train_y)
+        unique_class_labels = list(train_y.unique())
+        kwargs = {
+            "batches_valid": None,
+            "scoring": None,
+            "unique_class_labels": unique_class_labels,
+            "max_resident": None,
+            "prio": PrioBatch(),
+            "partial_transform": False,
+            "verbose": 0,
+            "progress_callback": None,
+        }
+        batches = list(mockup_data_loader(train_X, train_y, 5, "pandas"))
+        for n_old in [1, 3]:
+            old_trained = fit_with_batches(
+                pipeline=self._make_rasl_trainable("sgd"),
+                batches_train=batches[:n_old],
+                **kwargs,
+            )
+            old_coef = old_trained.steps[2][1].impl.coef_.copy()
+            rasl_trained = refit_with_batches(
+                pipeline=old_trained, batches_train=batches[n_old:], **kwargs
+            )
+            _check_trained_ordinal_encoder(
+                self,
+                sk_trained.steps[0][1],
+                rasl_trained.steps[0][1].impl,
+                n_old,
+            )
+            _check_trained_min_max_scaler(
+                self,
+                sk_trained.steps[1][1],
+                rasl_trained.steps[1][1].impl,
+                n_old,
+            )
+            self.assertTrue((old_coef == old_trained.steps[2][1].impl.coef_).all())
+        rfc_trained = fit_with_batches(
+            pipeline=self._make_rasl_trainable("rfc"),
+            batches_train=batches,
+            **kwargs,
+        )
+        with self.assertRaises(ValueError):
+            _ = refit_with_batches(
+                pipeline=rfc_trained, batches_train=batches, **kwargs
+            )
+
     def test_partial_transform(self):
         train_X, train_y, _ = self.creditg
         unique_class_labels = list(train_y.unique())
@@ -1434,6 +2051,65 @@ class TestTaskGraphs(unittest.TestCase):
             for sk_s, rasl_s in zip(sk_scores, rasl_scores):
                 self.assertAlmostEqual(sk_s, rasl_s, msg=n_batches)
 
+    def test_cross_val_score_parallel(self):
+        X, y, _ = self.creditg
+        n_splits, n_batches = 3, 3
+        with self.assertWarnsRegex(DeprecationWarning, "trainable operator"):
+            sk_scores = sk_cross_val_score(
+                estimator=self._make_sk_trainable("rfc"),
+                X=X,
+                y=y,
+                scoring=make_scorer(sk_accuracy_score),
+                cv=_BatchTestingKFold(n_batches, n_splits),
+            )
+        for executor in ["thread", "process"]:
+            rasl_scores = rasl_cross_val_score(
+                pipeline=self._make_rasl_trainable("rfc"),
+                batches=mockup_data_loader(X, y, n_batches, "pandas"),
+                scoring=rasl_get_scorer("accuracy"),
+                cv=KFold(n_splits),
+                unique_class_labels=list(y.unique()),
+                max_resident=None,
+                prio=PrioBatch(),
+                same_fold=True,
+                verbose=0,
+                n_jobs=4,
+                executor=executor,
+            )
+            for sk_s, rasl_s in zip(sk_scores, rasl_scores):
+                self.assertAlmostEqual(sk_s, rasl_s, msg=executor)
+
+    def test_cross_val_score_combine_fan_in(self):
+        X, y, _ = self.creditg
+        n_splits, n_batches = 3, 5
+        with self.assertWarnsRegex(DeprecationWarning, "trainable operator"):
+            sk_scores = sk_cross_val_score(
+                estimator=self._make_sk_trainable("rfc"),
+                X=X,
+                y=y,
+                scoring=make_scorer(sk_accuracy_score),
+                cv=_BatchTestingKFold(n_batches, n_splits),
+            )
+        for combine_fan_in in [2, 3]:
+            for same_fold in [True, False]:
+                rasl_scores = rasl_cross_val_score(
+                    pipeline=self._make_rasl_trainable("rfc"),
+                    batches=mockup_data_loader(X, y, n_batches, "pandas"),
+                    scoring=rasl_get_scorer("accuracy"),
+                    cv=KFold(n_splits),
+                    unique_class_labels=list(y.unique()),
+                    max_resident=None,
+                    prio=PrioBatch(),
+                    same_fold=same_fold,
+                    verbose=0,
+                    n_jobs=2,
+                    combine_fan_in=combine_fan_in,
+                )
+                for sk_s, rasl_s in zip(sk_scores, rasl_scores):
+                    self.assertAlmostEqual(
+                        sk_s, rasl_s, msg=(combine_fan_in, same_fold)
+                    )
+
     def test_cross_val_score_disparate_impact(self):
         X, y, fairness_info = self.creditg
         disparate_impact_scorer = lale.lib.aif360.disparate_impact(**fairness_info)
@@ -1461,6 +2137,81 @@ class TestTaskGraphs(unittest.TestCase):
             for sk_s, rasl_s in zip(sk_scores, rasl_scores):
                 self.assertAlmostEqual(sk_s, rasl_s, msg=n_batches)
 
+    def test_cross_val_score_candidates(self):
+        X, y, _ = self.creditg
+        n_splits, n_batches = 3, 3
+        final_ests = ["sgd", "rfc", "sgd"]
+        separate_traces = [RunTrace() for _ in final_ests]
+        separate_scores = [
+            rasl_cross_val_score(
+                pipeline=self._make_rasl_trainable(final_est),
+                batches=mockup_data_loader(X, y, n_batches, "pandas"),
+                scoring=rasl_get_scorer("accuracy"),
+                cv=KFold(n_splits),
+                unique_class_labels=list(y.unique()),
+                max_resident=None,
+                prio=PrioBatch(),
+                same_fold=True,
+                verbose=0,
+                trace=separate_trace,
+            )
+            for final_est, separate_trace in zip(final_ests, separate_traces)
+        ]
+        trace = RunTrace()
+        rasl_scores = rasl_cross_val_score(
+            pipeline=[self._make_rasl_trainable(e) for e in final_ests],
+            batches=mockup_data_loader(X, y, n_batches, "pandas"),
+            scoring=rasl_get_scorer("accuracy"),
+            cv=KFold(n_splits),
+            unique_class_labels=list(y.unique()),
+            max_resident=None,
+            prio=PrioBatch(),
+            same_fold=True,
+            verbose=0,
+            trace=trace,
+        )
+        self.assertEqual(len(rasl_scores), len(final_ests))
+        for separate, together in zip(separate_scores, rasl_scores):
+            for separate_s, together_s in zip(separate, together):
+                self.assertAlmostEqual(separate_s, together_s)
+        df = trace.to_dataframe()
+        scans = df[(df.operation == "scan") & (df.bytes_out > 0)]
+        self.assertEqual(len(scans), n_batches)
+        # the shared prefix runs as many tasks as for a single candidate
+        separate_counts = separate_traces[0].to_dataframe().groupby("step").size()
+        together_counts = df.groupby("step").size()
+        for step in ["OrdinalEncoder", "MinMaxScaler"]:
+            self.assertEqual(separate_counts[step], together_counts[step], step)
+        self.assertEqual(
+            separate_counts["SGDClassifier"], together_counts["SGDClassifier"]
+        )
+
+    def test_fit_batching_multi_sink(self):
+        X, y, _ = self.creditg
+        encoded = SkOrdinalEncoder().fit_transform(X)
+        sk_min_max = SkMinMaxScaler().fit(encoded)
+        sk_standard = SkStandardScaler().fit(encoded)
+        rasl_trainable = RaslOrdinalEncoder() >> (
+            RaslMinMaxScaler() & RaslStandardScaler()
+        )
+        self.assertEqual(len(rasl_trainable._find_sink_nodes()), 2)
+        rasl_trained = fit_with_batches(
+            pipeline=rasl_trainable,
+            batches_train=mockup_data_loader(X, y, 3, "pandas"),
+            batches_valid=None,
+            scoring=None,
+            unique_class_labels=list(y.unique()),
+            max_resident=None,
+            prio=PrioBatch(),
+            partial_transform=False,
+            verbose=0,
+            progress_callback=None,
+        )
+        steps = rasl_trained.steps_list()
+        _check_trained_min_max_scaler(self, sk_min_max, steps[1].impl, "multi-sink")
+        for i in range(encoded.shape[1]):
+            self.assertAlmostEqual(sk_standard.mean_[i], steps[2].impl.mean_[i])
+
     def test_cross_validate(self):
         X, y, _ = self.creditg
         n_splits = 3
@@ -1934,6 +2685,48 @@ class TestTaskGraphsSpark(unittest.TestCase):
                 for sk_s, rasl_s in zip(sk_scores, rasl_scores):
                     self.assertAlmostEqual(sk_s, rasl_s, msg=(tgt, n_batches))
 
+    @unittest.skipIf(
+        not lale.helpers.spark_installed, "native Spark folds need pyspark"
+    )
+    def test_spark_folds_match_sklearn(self):
+        from lale.lib.rasl.task_graphs import _spark_assign_folds
+
+        rng = np.random.RandomState(42)
+        X = pd.DataFrame({"f": rng.rand(101)})
+        y = pd.Series(rng.choice(["a", "b", "c"], 101, p=[0.6, 0.3, 0.1]), name="y")
+        X_spark, y_spark = pandas2spark(X), pandas2spark(y)
+        index_name = get_index_name(y_spark)
+        for cv in [KFold(3), StratifiedKFold(3)]:
+            folds = _spark_assign_folds(cv, X_spark, y_spark)
+            self.assertIsNotNone(folds, cv)
+            folds = folds.toPandas()
+            for fold_idx, (_, test_idx) in enumerate(cv.split(X, y)):
+                in_fold = folds[folds["__lale_fold"] == fold_idx][index_name]
+                self.assertEqual(
+                    sorted(in_fold.tolist()), X.index[test_idx].tolist(), cv
+                )
+        self.assertIsNone(_spark_assign_folds(KFold(3, shuffle=True), X_spark, y_spark))
+
+    def test_cross_val_score_stratified(self):
+        X, y = self.creditg
+        unique_class_labels = list(y.unique())
+        for n_batches in [1, 3]:
+            scores = {}
+            for tgt in ["pandas", "spark"]:
+                scores[tgt] = rasl_cross_val_score(
+                    pipeline=self._make_rasl_trainable(),
+                    batches=mockup_data_loader(X, y, n_batches, tgt),
+                    scoring=rasl_get_scorer("accuracy"),
+                    cv=StratifiedKFold(3),
+                    unique_class_labels=unique_class_labels,
+                    max_resident=None,
+                    prio=PrioBatch(),
+                    same_fold=True,
+                    verbose=0,
+                )
+            for pandas_s, spark_s in zip(scores["pandas"], scores["spark"]):
+                self.assertAlmostEqual(pandas_s, spark_s, msg=n_batches)
+
     def test_cross_validate(self):
         X, y = self.creditg
         with self.assertWarnsRegex(DeprecationWarning, "trainable operator"):
@@ -2046,6 +2839,46 @@ class TestMetrics(unittest.TestCase):
         )
 
 
+class TestMonoidSerialization(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.creditg = lale.datasets.openml.fetch(
+            "credit-g", "classification", preprocess=True, astype="pandas"
+        )
+
+    def test_monoid_to_bytes(self):
+        (train_X, train_y), (test_X, test_y) = self.creditg
+        est = LogisticRegression().fit(train_X, train_y)
+        y_pred = est.predict(test_X)
+        for metric in ["accuracy", "balanced_accuracy", "f1", "r2"]:
+            scorer = rasl_get_scorer(metric)
+            batches = mockup_data_loader(test_X, test_y, 3, "pandas")
+            lifted = None
+            for X, y in batches:
+                data = scorer.to_monoid((y, est.predict(X), X)).to_bytes()
+                monoid = Monoid.from_bytes(data)
+                lifted = monoid if lifted is None else lifted.combine(monoid)
+            self.assertAlmostEqual(
+                scorer.score_data(test_y, y_pred), scorer.from_monoid(lifted)
+            )
+        for op in [RaslSimpleImputer(), RaslSelectKBest(k=3)]:
+            impl = op.impl
+            monoid = impl.to_monoid((train_X, train_y))
+            data = monoid.to_bytes()
+            self.assertIsInstance(type(monoid).from_bytes(data), type(monoid))
+            expected = op.fit(train_X, train_y).transform(test_X)
+            impl.from_monoid(Monoid.from_bytes(data))
+            self.assertTrue(expected.equals(impl.transform(test_X)))
+        with self.assertRaises(ValueError):
+            Monoid.from_bytes(b"not a monoid")
+        monoid.extra = collections.OrderedDict(a=1)
+        data = monoid.to_bytes()
+        with self.assertRaises(ValueError):
+            Monoid.from_bytes(data)
+        restored = Monoid.from_bytes(data, allow_pickle=True)
+        self.assertIsInstance(restored.extra, collections.OrderedDict)
+
+
 class TestBatchedBaggingClassifier(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -2179,6 +3012,42 @@ class TestBatchedBaggingClassifier(unittest.TestCase):
                 verbose=0,
             )
 
+    def test_predict_voting(self):
+        X, y = sklearn.datasets.load_iris(return_X_y=True, as_frame=True)
+
+        def fit_batches(**hyperparams):
+            trained = BatchedBaggingClassifier(
+                base_estimator=DecisionTreeClassifier(max_depth=2, random_state=42),
+                **hyperparams,
+            )
+            for bX, by in mockup_data_loader(X, y, 5, "pandas"):
+                trained = trained.partial_fit(bX, by)
+            return trained
+
+        hard = fit_batches()
+        members = hard.impl.classifiers_list
+        votes = pd.DataFrame([member.predict(X) for member in members]).transpose()
+        expected = votes.mode(axis=1).iloc[:, 0].to_numpy()
+        self.assertEqual(hard.predict(X).tolist(), expected.tolist())
+        for executor in ["thread", "process"]:
+            parallel = fit_batches(n_jobs=2, executor=executor)
+            self.assertEqual(parallel.predict(X).tolist(), expected.tolist())
+            pool = parallel.impl._pool
+            self.assertIsNotNone(pool, executor)
+            self.assertEqual(parallel.predict(X).tolist(), expected.tolist())
+            self.assertIs(parallel.impl._pool, pool, executor)
+            unpickled = pickle.loads(pickle.dumps(parallel))  # nosec
+            self.assertEqual(unpickled.predict(X).tolist(), expected.tolist())
+
+        probabilities = hard.predict_proba(X)
+        self.assertEqual(probabilities.shape, (X.shape[0], 3))
+        self.assertTrue(np.allclose(probabilities.sum(axis=1), 1.0))
+        soft = fit_batches(voting="soft", n_jobs=2)
+        self.assertTrue(np.allclose(soft.predict_proba(X), probabilities))
+        self.assertEqual(
+            soft.predict(X).tolist(), probabilities.argmax(axis=1).tolist()
+        )
+
 
 class TestXGBoost(unittest.TestCase):
     def test_partial_fit_xgb_classifier(self):